@@ -0,0 +1,333 @@
+# query_app/compiler.py
+
+"""
+Compiles query builder configurations into parameterized SQL.
+
+The same configuration the query builder page POSTs (tables, columns,
+joins, where, groupBy, orderBy, aggregates, selectSubqueries, limit,
+pagination/cursor) is turned into a (sql, params) pair that can be run
+on any cursor.
+"""
+import json
+import base64
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .schema_index import get_schema_index
+
+KEYSET_ALIAS = '_keyset_cursor'
+DEFAULT_LIMIT = 100
+
+
+class QueryCompileError(ValueError):
+    """Raised when a configuration cannot be compiled into SQL."""
+    pass
+
+
+class CompiledQuery:
+    """
+    SQL statement built from a query builder configuration.
+
+    Attributes:
+        sql: Statement with %s placeholders
+        params: Statement parameters
+        limit: Row limit applied, None if the statement is uncapped
+        keyset: Whether rows carry the KEYSET_ALIAS pagination column
+    """
+
+    def __init__(self, sql, params, limit=None, keyset=False):
+        self.sql = sql
+        self.params = params
+        self.limit = limit
+        self.keyset = keyset
+
+    def __iter__(self):
+        # Unpacks as (sql, params)
+        return iter((self.sql, self.params))
+
+    def __repr__(self):
+        return f"<CompiledQuery {self.sql!r}>"
+
+
+def encode_cursor(value):
+    """Opaque pagination cursor holding the last value of the keyset column."""
+    raw = json.dumps([value], cls=DjangoJSONEncoder).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Value stored in a pagination cursor; raises QueryCompileError if it is malformed."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))[0]
+    except Exception:
+        raise QueryCompileError('Invalid pagination cursor.')
+
+
+def _build_subquery_sql(subquery_data):
+    """
+    Builds a raw SQL subquery string and its parameters from subquery data.
+    Handles literal values and Outer References for correlated subqueries.
+    """
+    sub_model_name = subquery_data.get('model')
+    sub_function = subquery_data.get('function', '').upper()
+    sub_field = subquery_data.get('field')
+    sub_filters = subquery_data.get('filters', {}).get('rules', [])
+
+    if not all([sub_model_name, sub_field]):
+        return None, []
+
+    db_table = get_schema_index().table_for_model(sub_model_name)
+    if not db_table:
+        return None, []
+
+    select_expression = ""
+    limit_clause = ""
+
+    if sub_function:
+        valid_functions = ['COUNT', 'AVG', 'SUM', 'MAX', 'MIN']
+        if sub_function not in valid_functions:
+            return None, []
+        select_expression = f"{sub_function}(`{sub_field}`)"
+    else:
+        select_expression = f"`{sub_field}`"
+        limit_clause = " LIMIT 1"
+
+    sub_sql = f"SELECT {select_expression} FROM `{db_table}`"
+    
+    sub_where_clause = ""
+    sub_params = []
+    if sub_filters:
+        where_parts = []
+        for cond in sub_filters:
+            field, op, value = cond.get('field'), cond.get('operator'), cond.get('value')
+            if not all([field, op]) or value is None:
+                continue
+
+            if isinstance(value, dict) and value.get('type') == 'OUTER_REF':
+                outer_ref_field = value.get('field', '')
+                if '.' in outer_ref_field:
+                    table, column = outer_ref_field.split('.', 1)
+                    safe_outer_ref = f"`{table}`.`{column}`"
+                    where_parts.append(f"`{field}` {op} {safe_outer_ref}")
+            elif str(value) != '':
+                where_parts.append(f"`{field}` {op} %s")
+                sub_params.append(value)
+        
+        if where_parts:
+            sub_where_clause = f" WHERE {' AND '.join(where_parts)}"
+
+    final_sub_sql = f"{sub_sql}{sub_where_clause}{limit_clause}"
+    return final_sub_sql, sub_params
+
+def _build_where_recursive(group_data, tables_in_query):
+    """
+    Recursively builds a WHERE clause from a nested data structure.
+    """
+    if not group_data or not group_data.get('rules'):
+        return "", []
+
+    condition = group_data.get('condition', 'AND').upper()
+    if condition not in ['AND', 'OR']:
+        condition = 'AND'
+    
+    sql_parts = []
+    params = []
+
+    for rule in group_data['rules']:
+        if 'condition' in rule:
+            nested_sql, nested_params = _build_where_recursive(rule, tables_in_query)
+            if nested_sql:
+                sql_parts.append(f"({nested_sql})")
+                params.extend(nested_params)
+        else:
+            field = rule.get('field')
+            op = rule.get('operator')
+            value = rule.get('value')
+
+            if not all([field, op]):
+                continue
+            
+            table_name = field.split('.')[0]
+            if '.' not in field or table_name not in tables_in_query:
+                continue
+
+            safe_field = f"`{table_name}`.`{field.split('.')[1]}`"
+            
+            op_lower = op.lower() if op else ''
+            if op_lower in ['between', 'not between']:
+                val1 = value.get('value1') if isinstance(value, dict) else None
+                val2 = value.get('value2') if isinstance(value, dict) else None
+                if val1 is not None and val2 is not None and val1 != '' and val2 != '':
+                    sql_parts.append(f"{safe_field} {op.upper()} %s AND %s")
+                    params.extend([val1, val2])
+            elif isinstance(value, dict) and 'model' in value:
+                sub_sql, sub_params = _build_subquery_sql(value)
+                if sub_sql:
+                    sql_parts.append(f"{safe_field} {op} ({sub_sql})")
+                    params.extend(sub_params)
+            elif op_lower in ['is null', 'is not null']:
+                sql_parts.append(f"{safe_field} {op.upper()}")
+            elif value is not None and str(value) != '':
+                if op_lower in ['in', 'not in']:
+                    values_list = [v.strip() for v in str(value).split(',') if v.strip()]
+                    if not values_list: continue
+                    placeholders = ', '.join(['%s'] * len(values_list))
+                    sql_parts.append(f"{safe_field} {op.upper()} ({placeholders})")
+                    params.extend(values_list)
+                else:
+                    sql_parts.append(f"{safe_field} {op} %s")
+                    params.append(value)
+
+    if not sql_parts:
+        return "", []
+    
+    return f" {condition} ".join(sql_parts), params
+
+
+def _resolve_joins(base_table, joins):
+    """
+    Orders joins so each one attaches to a table already in the query.
+
+    Returns:
+        Tuple of (JOIN clause, set of tables in the query)
+    """
+    tables_in_query = {base_table}
+
+    final_join_parts = []
+    joins_to_process = [j for j in joins if all(j.get(k) for k in ['left_table', 'right_table', 'left_field', 'right_field'])]
+    added_join_in_pass = True
+    while added_join_in_pass and joins_to_process:
+        added_join_in_pass = False
+        remaining_joins = []
+        for join in joins_to_process:
+            lt, rt = join.get('left_table'), join.get('right_table')
+            if lt in tables_in_query and rt not in tables_in_query:
+                final_join_parts.append(f"LEFT JOIN `{rt}` ON `{lt}`.`{join['left_field']}` = `{rt}`.`{join['right_field']}`")
+                tables_in_query.add(rt)
+                added_join_in_pass = True
+            elif rt in tables_in_query and lt not in tables_in_query:
+                final_join_parts.append(f"LEFT JOIN `{lt}` ON `{lt}`.`{join['left_field']}` = `{rt}`.`{join['right_field']}`")
+                tables_in_query.add(lt)
+                added_join_in_pass = True
+            elif lt in tables_in_query and rt in tables_in_query:
+                pass
+            else:
+                remaining_joins.append(join)
+
+        if len(remaining_joins) == len(joins_to_process):
+            break
+        joins_to_process = remaining_joins
+    return ' '.join(final_join_parts), tables_in_query
+
+
+def compile_query(config, capped=True):
+    """
+    Build the SQL of a query builder configuration.
+
+    Args:
+        config: Query configuration as posted by the query builder page
+        capped: Apply the default limit when the configuration sets none
+
+    Returns:
+        CompiledQuery, which also unpacks as (sql, params)
+    """
+    tables = config.get('tables', [])
+    columns = config.get('columns', [])
+    joins = config.get('joins', [])
+    where_data = config.get('where', {})
+    group_by_fields = config.get('groupBy', [])
+    order_by_fields = config.get('orderBy', [])
+    aggregates_data = config.get('aggregates', [])
+    select_subqueries = config.get('selectSubqueries', [])
+    limit = config.get('limit', DEFAULT_LIMIT)
+    pagination = config.get('pagination')
+
+    safe_limit = int(limit) if str(limit).isdigit() and int(limit) > 0 else DEFAULT_LIMIT
+
+    if not tables:
+        raise QueryCompileError('No tables selected.')
+
+    base_table = tables[0]
+    from_clause = f"FROM `{base_table}`"
+    join_clause, tables_in_query = _resolve_joins(base_table, joins)
+
+    select_parts = []
+    params = []
+
+    if columns:
+        for item in columns:
+            column_name = item.get('column')
+            alias = item.get('alias')
+            if column_name and '.' in column_name:
+                table, column = column_name.split('.', 1)
+                safe_column = f"`{table}`.`{column}`"
+                if alias:
+                    safe_alias = f"`{alias.replace('`', '')}`"
+                    select_parts.append(f"{safe_column} AS {safe_alias}")
+                else:
+                    select_parts.append(safe_column)
+
+    if aggregates_data:
+        for col in aggregates_data:
+            if ':' in col and col.split(':', 1)[1]:
+                func, fld = col.split(':', 1)
+                if '.' in fld: 
+                    safe_fld = f"`{fld.split('.')[0]}`.`{fld.split('.')[1]}`"
+                    alias = f'`{func}_{fld.replace(".", "_")}`'
+                    select_parts.append(f'{func.upper()}({safe_fld}) AS {alias}')
+
+    if select_subqueries:
+        for item in select_subqueries:
+            alias = item.get('alias')
+            subquery_data = item.get('subquery')
+            if alias and subquery_data:
+                sub_sql, sub_params = _build_subquery_sql(subquery_data)
+                if sub_sql:
+                    select_parts.append(f"({sub_sql}) AS `{alias}`")
+                    params.extend(sub_params)
+
+    if not select_parts:
+        select_parts.append('*')
+
+    where_sql, where_params = _build_where_recursive(where_data, tables_in_query)
+
+    if pagination == 'keyset':
+        # Pages continue after the last value of the first orderBy column,
+        # which should be unique (e.g. a primary key)
+        keyset_field = next((o for o in order_by_fields if '.' in o), None)
+        if not keyset_field:
+            raise QueryCompileError('Keyset pagination needs an orderBy column.')
+        keyset_table, keyset_column = keyset_field.lstrip('-').split('.', 1)
+        safe_keyset = f"`{keyset_table}`.`{keyset_column}`"
+        select_parts.append(f"{safe_keyset} AS `{KEYSET_ALIAS}`")
+
+        if config.get('cursor'):
+            keyset_sql = f"{safe_keyset} {'<' if keyset_field.startswith('-') else '>'} %s"
+            where_sql = f"({where_sql}) AND {keyset_sql}" if where_sql else keyset_sql
+            where_params = where_params + [decode_cursor(config['cursor'])]
+
+    select_clause = f"SELECT {', '.join(select_parts)}"
+
+    where_clause = ""
+    if where_sql:
+        where_clause = f"WHERE {where_sql}"
+
+    final_params = params + where_params
+
+    group_by_clause = ""
+    if group_by_fields:
+        safe_group_by = [f"`{f.split('.')[0]}`.`{f.split('.')[1]}`" for f in group_by_fields if '.' in f]
+        if safe_group_by:
+            group_by_clause = f"GROUP BY {', '.join(safe_group_by)}"
+
+    order_by_clause = ""
+    if order_by_fields:
+        final_order = [f"`{o.lstrip('-').split('.')[0]}`.`{o.lstrip('-').split('.')[1]}` {'DESC' if o.startswith('-') else 'ASC'}" for o in order_by_fields if '.' in o]
+        if final_order:
+            order_by_clause = f"ORDER BY {', '.join(final_order)}"
+
+    applied_limit = safe_limit if capped or 'limit' in config else None
+    limit_clause = f"LIMIT {applied_limit}" if applied_limit else ""
+    final_sql = f"{select_clause} {from_clause} {join_clause} {where_clause} {group_by_clause} {order_by_clause} {limit_clause}"
+
+    return CompiledQuery(final_sql, final_params, limit=applied_limit, keyset=pagination == 'keyset')
@@ -0,0 +1,30 @@
+"""
+Management command to write the query builder schema snapshot
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.query.schema_index import SchemaIndex
+
+
+class Command(BaseCommand):
+    help = 'Build the query builder schema index and write it to a snapshot file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Snapshot path (default: QUERY_SCHEMA_SNAPSHOT)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['output'] or getattr(settings, 'QUERY_SCHEMA_SNAPSHOT', None)
+        if not path:
+            raise CommandError('Pass --output or set QUERY_SCHEMA_SNAPSHOT')
+
+        index = SchemaIndex.build()
+        index.dump(path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(index.models)} models to {path} (ETag {index.etag})'
+        ))
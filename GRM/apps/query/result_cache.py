@@ -0,0 +1,142 @@
+# query_app/result_cache.py
+
+"""
+Opt-in result cache for query builder queries.
+
+Entries are keyed on the final SQL (whitespace-normalized) and its params,
+plus a version token for every table the SQL reads. Writing to a table
+replaces its token, so every cached result that depends on it stops
+matching at once and simply expires with its TTL.
+"""
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60
+TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+`([^`]+)`', re.IGNORECASE)
+
+
+def get_cache():
+    return caches[getattr(settings, 'QUERY_RESULT_CACHE_ALIAS', 'default')]
+
+
+def resolve_ttl(option):
+    """
+    Cache TTL in seconds from a request or template 'cache' option.
+
+    The option may be true (default TTL), a number of seconds, or a dict
+    like {"ttl": 30}. Returns None when caching is not requested.
+    """
+    if isinstance(option, dict):
+        option = option.get('ttl', True)
+    if option is True:
+        return getattr(settings, 'QUERY_RESULT_CACHE_TTL', DEFAULT_TTL)
+    if isinstance(option, (int, float)) and not isinstance(option, bool) and option > 0:
+        return option
+    return None
+
+
+def tables_in_sql(sql):
+    """Tables a query builder statement reads, including subqueries."""
+    return sorted(set(TABLE_PATTERN.findall(sql)))
+
+
+def _table_key(table):
+    return f"query_result_table:{table}"
+
+
+def _table_versions(tables):
+    """Current version token of each table, creating missing tokens."""
+    cache = get_cache()
+    versions = cache.get_many([_table_key(table) for table in tables])
+
+    for table in tables:
+        key = _table_key(table)
+        if key not in versions:
+            # A lost token must not bring back results cached under an older one
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+
+    return [versions[_table_key(table)] for table in tables]
+
+
+def result_key(sql, params):
+    """Cache key of a statement at the current versions of its tables."""
+    tables = tables_in_sql(sql)
+    material = json.dumps(
+        [' '.join(sql.split()), list(params), tables, _table_versions(tables)],
+        default=str
+    )
+    return f"query_result:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+
+def invalidate_tables(tables):
+    """Evict all cached results that read any of the given tables."""
+    tables = [table for table in tables if table]
+    if not tables:
+        return
+    try:
+        get_cache().set_many({_table_key(table): uuid.uuid4().hex for table in tables}, None)
+    except Exception as e:
+        logger.error(f"Failed to invalidate query results of {', '.join(tables)}: {e}")
+
+
+def _count(name):
+    cache = get_cache()
+    key = f"query_result_stats:{name}"
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+def stats():
+    """Cache hits and misses counted since the cache backend started."""
+    counts = get_cache().get_many(['query_result_stats:hits', 'query_result_stats:misses'])
+    return {
+        'hits': counts.get('query_result_stats:hits', 0),
+        'misses': counts.get('query_result_stats:misses', 0),
+    }
+
+
+def cached_query(sql, params, ttl, execute):
+    """
+    Run a statement through the result cache.
+
+    Args:
+        sql: Final SQL statement
+        params: Statement parameters
+        ttl: Seconds a result is kept
+        execute: Callable returning the rows on a miss
+
+    Returns:
+        Tuple of (rows, cache info for the response)
+    """
+    key = result_key(sql, params)
+    entry = get_cache().get(key)
+    hit = entry is not None
+
+    if hit:
+        _count('hits')
+    else:
+        entry = {'data': execute(), 'cached_at': time.time()}
+        get_cache().set(key, entry, ttl)
+        _count('misses')
+
+    info = {
+        'hit': hit,
+        'ttl': ttl,
+        'age': round(time.time() - entry['cached_at'], 3),
+        'tables': tables_in_sql(sql),
+    }
+    info.update(stats())
+    return entry['data'], info
@@ -0,0 +1,190 @@
+# query_app/schema_index.py
+
+"""
+Schema index of the models available to the query builder.
+
+Model discovery walks every registered model, which is slow with the
+hundreds of unmanaged models in this app. The index is built once per
+process, or loaded from the snapshot file named by QUERY_SCHEMA_SNAPSHOT
+(see the build_schema_snapshot command), and shared by the query builder
+API, subquery table lookups and the workflow query integration.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from django.apps import apps
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class SchemaIndex:
+    """
+    Name, table, column and join lookups over the discoverable models.
+
+    Attributes:
+        models: Query builder model list, as returned by the GET API
+        model_details: Per-model field details used by the workflow integration
+        model_tables: Model class name -> table name
+        table_columns: Table name -> set of column names
+        join_graph: Table name -> foreign keys from and to the table
+        etag: Fingerprint of the whole index
+    """
+
+    def __init__(self, models, model_details, model_tables, join_graph):
+        self.models = models
+        self.model_details = model_details
+        self.model_tables = model_tables
+        self.table_columns = {model['tableName']: frozenset(model['fields']) for model in models}
+        self.join_graph = join_graph
+        self.etag = '"%s"' % hashlib.sha256(
+            json.dumps(self.to_dict(), sort_keys=True).encode('utf-8')
+        ).hexdigest()[:32]
+
+    def table_for_model(self, model_name):
+        """Table of a model class name, None if there is no such model."""
+        return self.model_tables.get(model_name)
+
+    def has_column(self, table, column):
+        return column in self.table_columns.get(table, ())
+
+    def join_keys(self, left_table, right_table):
+        """Foreign keys linking two tables, as (left column, right column) pairs."""
+        keys = []
+        for edge in self.join_graph.get(left_table, []):
+            if edge['table'] == left_table and edge['references_table'] == right_table:
+                keys.append((edge['column'], edge['references_column']))
+            elif edge['references_table'] == left_table and edge['table'] == right_table:
+                keys.append((edge['references_column'], edge['column']))
+        return keys
+
+    def to_dict(self):
+        return {
+            'version': SNAPSHOT_VERSION,
+            'models': self.models,
+            'model_details': self.model_details,
+            'model_tables': self.model_tables,
+            'join_graph': self.join_graph,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported schema snapshot version: {data.get('version')}")
+        return cls(data['models'], data['model_details'], data['model_tables'], data['join_graph'])
+
+    @classmethod
+    def build(cls):
+        """Build the index from the app registry."""
+        models_dict = {}
+        model_details = []
+        model_tables = {}
+        join_graph = {}
+
+        for model in apps.get_models():
+            # Subqueries could always name any model, including Django's own
+            model_tables.setdefault(model.__name__, model._meta.db_table)
+
+            if 'django.contrib' in model.__module__:
+                continue
+            db_table_name = model._meta.db_table
+            concrete_fields = [f for f in model._meta.get_fields() if getattr(f, 'column', None)]
+
+            model_details.append({
+                'name': model.__name__,
+                'table_name': db_table_name,
+                'app_label': model._meta.app_label,
+                'fields': [
+                    {
+                        'name': field.name,
+                        'column': field.column,
+                        'type': field.__class__.__name__,
+                        'nullable': field.null if hasattr(field, 'null') else False,
+                        'max_length': getattr(field, 'max_length', None)
+                    }
+                    for field in concrete_fields
+                ]
+            })
+
+            for field in concrete_fields:
+                if field.is_relation and field.related_model is not None and getattr(field, 'target_field', None):
+                    edge = {
+                        'table': db_table_name,
+                        'column': field.column,
+                        'references_table': field.related_model._meta.db_table,
+                        'references_column': field.target_field.column,
+                    }
+                    for table in {edge['table'], edge['references_table']}:
+                        if edge not in join_graph.setdefault(table, []):
+                            join_graph[table].append(edge)
+
+            # Prefer the concrete model when a proxy shares its table
+            if db_table_name in models_dict:
+                is_existing_proxy = models_dict[db_table_name]['is_proxy']
+                if not (is_existing_proxy and not model._meta.proxy):
+                    continue
+
+            models_dict[db_table_name] = {
+                'displayName': model.__name__,
+                'tableName': db_table_name,
+                'fields': sorted({field.column for field in concrete_fields}),
+                'is_proxy': model._meta.proxy
+            }
+
+        models = sorted(models_dict.values(), key=lambda x: x['displayName'])
+        for model_data in models:
+            del model_data['is_proxy']
+
+        return cls(models, sorted(model_details, key=lambda x: x['name']), model_tables, join_graph)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def dump(self, path):
+        """Write the index to a snapshot file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, sort_keys=True)
+        os.replace(temp_path, path)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_schema_index():
+    """
+    Return the process-wide schema index, loading or building it on first use.
+
+    A snapshot that cannot be read is ignored and the index is built from
+    the app registry instead.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                snapshot = getattr(settings, 'QUERY_SCHEMA_SNAPSHOT', None)
+                if snapshot and os.path.exists(snapshot):
+                    try:
+                        _index = SchemaIndex.load(snapshot)
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.error(f"Ignoring schema snapshot {snapshot}: {e}")
+                if _index is None:
+                    _index = SchemaIndex.build()
+    return _index
+
+
+def reset_schema_index():
+    """Forget the loaded index, e.g. after models or the snapshot changed."""
+    global _index
+    with _index_lock:
+        _index = None
@@ -8,6 +8,7 @@ from .models import (
     NodeType, Workflow, WorkflowExecution, NodeExecution,
     WorkflowWebhook, WorkflowSchedule, WorkflowTemplate, WorkflowVariable
 )
+from .webhooks import endpoint_cache
 
 @admin.register(NodeType)
 class NodeTypeAdmin(admin.ModelAdmin):
@@ -62,7 +63,7 @@ class WorkflowAdmin(admin.ModelAdmin):
             'fields': ('name', 'description', 'status')
         }),
         ('Execution Settings', {
-            'fields': ('timeout_seconds', 'max_retries', 'retry_delay_seconds'),
+            'fields': ('timeout_seconds', 'max_retries', 'retry_delay_seconds', 'max_parallel_nodes', 'retention_days'),
             'classes': ('collapse',)
         }),
         ('Scheduling', {
@@ -82,14 +83,23 @@ class WorkflowAdmin(admin.ModelAdmin):
     actions = ['activate_workflows', 'deactivate_workflows']
     
     def activate_workflows(self, request, queryset):
-        updated = queryset.update(status='active')
+        updated = self._update_status(queryset, 'active')
         self.message_user(request, f'{updated} workflows activated.')
     activate_workflows.short_description = 'Activate selected workflows'
     
     def deactivate_workflows(self, request, queryset):
-        updated = queryset.update(status='inactive')
+        updated = self._update_status(queryset, 'inactive')
         self.message_user(request, f'{updated} workflows deactivated.')
     deactivate_workflows.short_description = 'Deactivate selected workflows'
+    
+    def _update_status(self, queryset, status):
+        # update() sends no post_save, drop the cached webhook endpoints here instead
+        workflow_ids = list(queryset.values_list('id', flat=True))
+        updated = Workflow.objects.filter(id__in=workflow_ids).update(status=status)
+        endpoint_cache.invalidate(*WorkflowWebhook.objects.filter(
+            workflow_id__in=workflow_ids
+        ).values_list('endpoint_path', flat=True))
+        return updated
 
     def created_by_display(self, obj):
         try:
@@ -131,8 +141,8 @@ class WorkflowExecutionAdmin(admin.ModelAdmin):
 
 @admin.register(NodeExecution)
 class NodeExecutionAdmin(admin.ModelAdmin):
-    list_display = ['node_name', 'node_type', 'workflow_execution', 'status', 'duration_ms', 'started_at']
-    list_filter = ['status', 'node_type', 'started_at']
+    list_display = ['node_name', 'node_type', 'workflow_execution', 'status', 'duration_ms', 'cache_hit', 'started_at']
+    list_filter = ['status', 'node_type', 'cache_hit', 'started_at']
     search_fields = ['node_name', 'workflow_execution__workflow__name']
     readonly_fields = ['started_at', 'finished_at', 'duration_ms']
 
@@ -3,10 +3,10 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
 from django.http import JsonResponse
-from datetime import timedelta
 import json
 import uuid
 
@@ -15,12 +15,14 @@ from .models import (
     WorkflowWebhook, WorkflowSchedule, WorkflowTemplate, WorkflowVariable
 )
 from .serializers import (
-    NodeTypeSerializer, WorkflowSerializer, WorkflowExecutionSerializer,
+    NodeTypeSerializer, WorkflowSerializer, WorkflowListSerializer, WorkflowExecutionSerializer,
     WorkflowWebhookSerializer, WorkflowScheduleSerializer, WorkflowTemplateSerializer,
     WorkflowVariableSerializer, WorkflowExecuteSerializer
 )
 from .engine import WorkflowEngine
-from .tasks import execute_workflow_task
+from .payload_store import is_payload_reference, load_payload, PayloadStoreError
+from .rollup import get_execution_totals, get_daily_execution_counts
+from .tasks import dispatch_executions
 
 class NodeTypeViewSet(viewsets.ReadOnlyModelViewSet):
     """API for node types"""
@@ -34,7 +36,16 @@ class WorkflowViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Workflow.objects.filter(created_by_id=self.request.user.id)
+        queryset = Workflow.objects.filter(created_by_id=self.request.user.id)
+        if self.action == 'list':
+            # Summary fields cover the list, the definition can be large
+            queryset = queryset.defer('definition')
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return WorkflowListSerializer
+        return WorkflowSerializer
     
     def perform_create(self, serializer):
         serializer.save(created_by_id=self.request.user.id)
@@ -132,7 +143,7 @@ class WorkflowViewSet(viewsets.ModelViewSet):
             })
         else:
             # Execute asynchronously
-            execute_workflow_task.delay(str(execution.id))
+            dispatch_executions([execution])
             
             return Response({
                 'execution_id': str(execution.id),
@@ -145,7 +156,7 @@ class WorkflowViewSet(viewsets.ModelViewSet):
         """Activate a workflow"""
         workflow = self.get_object()
         workflow.status = 'active'
-        workflow.save()
+        workflow.save(update_fields=['status', 'updated_at'])
         
         return Response({'status': 'active', 'message': 'Workflow activated'})
     
@@ -154,7 +165,7 @@ class WorkflowViewSet(viewsets.ModelViewSet):
         """Deactivate a workflow"""
         workflow = self.get_object()
         workflow.status = 'inactive'
-        workflow.save()
+        workflow.save(update_fields=['status', 'updated_at'])
         
         return Response({'status': 'inactive', 'message': 'Workflow deactivated'})
     
@@ -220,6 +231,59 @@ class WorkflowExecutionViewSet(viewsets.ReadOnlyModelViewSet):
                 {'error': 'Execution cannot be cancelled'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+    
+    @action(detail=True, methods=['post'])
+    def retry_from_failed(self, request, pk=None):
+        """Re-run a finished execution from its failed node, reusing the outputs of the nodes that succeeded"""
+        previous = self.get_object()
+        
+        if previous.status not in ['failed', 'cancelled', 'timeout']:
+            return Response(
+                {'error': 'Only failed, cancelled or timed out executions can be retried'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if previous.workflow.status != 'active':
+            return Response(
+                {'error': 'Workflow must be active to execute'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        execution_context = dict(previous.execution_context)
+        execution_context.update({
+            'manual_trigger': True,
+            'resume_from': str(previous.id)
+        })
+        
+        execution = WorkflowExecution.objects.create(
+            workflow=previous.workflow,
+            triggered_by='manual',
+            triggered_by_user_id=request.user.id,
+            input_data=previous.input_data,
+            execution_context=execution_context
+        )
+        
+        if request.data.get('sync', False):
+            success = WorkflowEngine().execute_workflow(str(execution.id))
+            execution.refresh_from_db()
+            
+            return Response({
+                'execution_id': str(execution.id),
+                'resumed_from': str(previous.id),
+                'status': execution.status,
+                'success': success,
+                'output_data': execution.output_data,
+                'duration_seconds': execution.duration_seconds
+            })
+        
+        dispatch_executions([execution])
+        
+        return Response({
+            'execution_id': str(execution.id),
+            'resumed_from': str(previous.id),
+            'status': 'queued',
+            'message': 'Workflow execution resumed from the failed node'
+        })
 
 class WorkflowVariableViewSet(viewsets.ModelViewSet):
     """API for workflow variables"""
@@ -286,29 +350,20 @@ class WorkflowTemplateViewSet(viewsets.ModelViewSet):
 def dashboard_stats_api(request):
     """Get dashboard statistics"""
     user_workflows = Workflow.objects.filter(created_by_id=request.user.id)
-    user_executions = WorkflowExecution.objects.filter(workflow__in=user_workflows)
     
-    # Calculate statistics
+    # Calculate statistics, execution counts come from the ExecutionDailyStats rollup
     total_workflows = user_workflows.count()
     active_workflows = user_workflows.filter(status='active').count()
-    total_executions = user_executions.count()
-    successful_executions = user_executions.filter(status='success').count()
-    failed_executions = user_executions.filter(status='failed').count()
-    running_executions = user_executions.filter(status='running').count()
+    totals = get_execution_totals(created_by_id=request.user.id)
+    total_executions = totals['total']
+    successful_executions = totals['success']
+    failed_executions = totals['failed']
+    running_executions = totals['running']
     
     success_rate = round((successful_executions / total_executions * 100) if total_executions > 0 else 0, 1)
     
     # Daily execution data
-    daily_executions = []
-    for i in range(7):
-        date = timezone.now().date() - timedelta(days=i)
-        day_executions = user_executions.filter(started_at__date=date)
-        daily_executions.append({
-            'day': date.strftime('%m/%d'),
-            'successful': day_executions.filter(status='success').count(),
-            'failed': day_executions.filter(status='failed').count()
-        })
-    daily_executions.reverse()
+    daily_executions = get_daily_execution_counts(7, created_by_id=request.user.id)
     
     return Response({
         'total_workflows': total_workflows,
@@ -375,8 +430,8 @@ def execution_logs_api(request, execution_id):
                 'message': node_execution.error_message or f"Node executed with status: {node_execution.status}",
                 'duration_ms': node_execution.duration_ms,
                 'status': node_execution.status,
-                'input_data': node_execution.input_data,
-                'output_data': node_execution.output_data
+                'input_data': _payload_summary(request, execution, node_execution, 'input_data'),
+                'output_data': _payload_summary(request, execution, node_execution, 'output_data')
             })
         
         return Response({
@@ -393,6 +448,40 @@ def execution_logs_api(request, execution_id):
     except WorkflowExecution.DoesNotExist:
         return Response({'error': 'Execution not found'}, status=404)
 
+def _payload_summary(request, execution, node_execution, field):
+    """Stored node data, with a link to the full payload if it is kept out of line"""
+    value = getattr(node_execution, field)
+    if not is_payload_reference(value):
+        return value
+    
+    summary = dict(value)
+    summary['payload_url'] = request.build_absolute_uri(reverse(
+        'workflow_app:node_payload',
+        args=[execution.id, node_execution.id, field]
+    ))
+    return summary
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def node_payload_api(request, execution_id, node_execution_id, field):
+    """Get the full input or output data of a node execution"""
+    if field not in ('input_data', 'output_data'):
+        return Response({'error': 'Unknown payload field'}, status=404)
+    
+    try:
+        node_execution = NodeExecution.objects.only(field).get(
+            id=node_execution_id,
+            workflow_execution_id=execution_id,
+            workflow_execution__workflow__created_by_id=request.user.id
+        )
+    except NodeExecution.DoesNotExist:
+        return Response({'error': 'Node execution not found'}, status=404)
+    
+    try:
+        return Response({field: load_payload(getattr(node_execution, field))})
+    except PayloadStoreError as e:
+        return Response({'error': str(e)}, status=410)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def test_workflow_api(request, workflow_id):
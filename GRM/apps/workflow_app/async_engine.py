@@ -0,0 +1,307 @@
+"""
+Async Workflow Engine - runs whole executions on a single asyncio event loop
+"""
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from collections import deque
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Workflow, WorkflowExecution
+from .engine import WorkflowEngine
+from . import node_cache
+from .planner import CompiledWorkflowPlan
+from .handlers import NODE_HANDLERS
+from .handlers.base import BaseNodeHandler
+from .handlers.async_http import async_http_available, build_async_client, shared_async_client
+
+logger = logging.getLogger(__name__)
+
+def prefers_async_engine(workflow: Workflow) -> bool:
+    """
+    Check whether executions of a workflow should run on AsyncWorkflowEngine
+
+    Controlled by WORKFLOW_ASYNC_EXECUTION: False (default) keeps every
+    execution on WorkflowEngine, True sends all of them to the async
+    engine and 'auto' only workflows with a node that awaits I/O natively
+    (HTTP requests, webhooks, Slack, delays).
+
+    Args:
+        workflow: Workflow to be executed
+
+    Returns:
+        bool: True if the async engine should run it
+    """
+    mode = getattr(settings, 'WORKFLOW_ASYNC_EXECUTION', False)
+    if mode != 'auto':
+        return bool(mode)
+
+    for node in (workflow.definition or {}).get('nodes', []):
+        handler_class = NODE_HANDLERS.get(node.get('type'))
+        if handler_class is not None and handler_class.aexecute is not BaseNodeHandler.aexecute:
+            return True
+    return False
+
+class AsyncWorkflowEngine(WorkflowEngine):
+    """
+    Workflow engine that awaits node handlers instead of blocking on them
+
+    Handlers with a native aexecute (HTTP requests, webhooks, Slack, delays)
+    never block the loop, every other handler runs on a worker thread.
+    Database access goes through sync_to_async, so many executions can share
+    one process via aexecute_many().
+    """
+
+    def execute_workflow(self, execution_id: str, resume: bool = False) -> bool:
+        """
+        Execute a complete workflow on a fresh event loop
+
+        Args:
+            execution_id: UUID of the WorkflowExecution to run
+            resume: Keep the outputs of nodes that succeeded in an earlier attempt
+
+        Returns:
+            bool: True if successful, False if failed
+        """
+        return asyncio.run(self.aexecute_many([execution_id], resume=resume))[execution_id]
+
+    async def aexecute_many(self, execution_ids: List[str], concurrency: int = 100, resume: bool = False) -> Dict[str, bool]:
+        """
+        Run several executions concurrently on the current event loop
+
+        Args:
+            execution_ids: UUIDs of the WorkflowExecutions to run
+            concurrency: Maximum number of executions in flight at once
+            resume: Keep the outputs of nodes that succeeded in an earlier attempt
+
+        Returns:
+            Dict mapping execution id to its success flag
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run_one(execution_id, http_client):
+            async with semaphore:
+                return await self.aexecute_workflow(execution_id, http_client, resume=resume)
+
+        if async_http_available():
+            async with build_async_client() as http_client:
+                outcomes = await asyncio.gather(*[run_one(execution_id, http_client) for execution_id in execution_ids])
+        else:
+            outcomes = await asyncio.gather(*[run_one(execution_id, None) for execution_id in execution_ids])
+
+        return dict(zip(execution_ids, outcomes))
+
+    async def aexecute_workflow(self, execution_id: str, http_client=None, resume: bool = False) -> bool:
+        """
+        Execute a complete workflow without blocking the event loop
+
+        Args:
+            execution_id: UUID of the WorkflowExecution to run
+            http_client: Optional shared httpx.AsyncClient for outbound requests
+            resume: Keep the outputs of nodes that succeeded in an earlier attempt
+
+        Returns:
+            bool: True if successful, False if failed
+        """
+        try:
+            execution, execution_graph, execution_context, node_results = await sync_to_async(
+                self._start_execution
+            )(execution_id, resume)
+
+            with shared_async_client(http_client):
+                success = await self._aexecute_nodes(
+                    execution,
+                    execution_graph,
+                    execution_context,
+                    node_results
+                )
+
+            await sync_to_async(self._finish_execution)(execution, success, node_results)
+            return success
+
+        except Exception as e:
+            await sync_to_async(self._fail_execution)(execution_id, e)
+            return False
+
+    async def _aexecute_nodes(
+        self,
+        execution: WorkflowExecution,
+        graph: Dict,
+        context: Dict,
+        results: Dict
+    ) -> bool:
+        """
+        Execute nodes as soon as their predecessors are done, as asyncio tasks
+
+        At most workflow.max_parallel_nodes nodes of one execution are in
+        flight at a time. Branching and continue_on_error follow the same
+        rules as the synchronous engine.
+        """
+        node_lookup = graph['nodes']
+        order_index = {node_id: index for index, node_id in enumerate(graph['execution_order'])}
+        pending_parents = {
+            node_id: len(graph['incoming'].get(node_id, []))
+            for node_id in graph['execution_order']
+        }
+        ready = deque(node_id for node_id in graph['execution_order'] if pending_parents[node_id] == 0)
+        max_parallel_nodes = max(1, execution.workflow.max_parallel_nodes or 1)
+        running = {}
+        nodes_to_skip = set()
+        fanned_out = set()
+        resumed = self._resumed.get(str(execution.id), set())
+        success = True
+        halted = False
+
+        def release_downstream(node_id):
+            for connection in graph['outgoing'].get(node_id, []):
+                target = connection['target']
+                pending_parents[target] -= 1
+                if pending_parents[target] == 0:
+                    ready.append(target)
+
+        while running or (ready and not halted):
+            while ready and not halted and len(running) < max_parallel_nodes:
+                node_id = ready.popleft()
+                node_def = node_lookup[node_id]
+
+                if node_id in resumed:
+                    self._replay_resumed_node(node_id, graph, results, nodes_to_skip)
+                    release_downstream(node_id)
+                    continue
+
+                if node_id in fanned_out:
+                    release_downstream(node_id)
+                    continue
+
+                if node_id in nodes_to_skip:
+                    await sync_to_async(self._create_node_execution_record)(
+                        execution, node_def, {}, {}, order_index[node_id], 'skipped'
+                    )
+                    release_downstream(node_id)
+                    continue
+
+                try:
+                    # Materializing a RowStream input runs queries, keep it off the loop
+                    node_input = await sync_to_async(self._prepare_node_input)(
+                        node_id, node_def, graph['incoming'], results, context
+                    )
+                except Exception as e:
+                    logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
+                    await sync_to_async(self._create_node_execution_record)(
+                        execution, node_def, {}, {}, order_index[node_id], 'failed', str(e)
+                    )
+                    if not node_def.get('config', {}).get('continue_on_error', False):
+                        success = False
+                        halted = True
+                    else:
+                        release_downstream(node_id)
+                    continue
+
+                task = asyncio.ensure_future(
+                    self._aexecute_single_node(execution, node_def, node_input, context, order_index[node_id], graph)
+                )
+                running[task] = node_id
+
+            if not running:
+                continue
+
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                node_id = running.pop(task)
+                node_def = node_lookup[node_id]
+
+                try:
+                    node_result = task.result()
+                except Exception as e:
+                    logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
+                    if not node_def.get('config', {}).get('continue_on_error', False):
+                        success = False
+                        halted = True
+                    else:
+                        release_downstream(node_id)
+                    continue
+
+                results[node_id] = node_result
+                context['node_results'] = results
+
+                if 'branch_condition' in node_result:
+                    self._handle_conditional_branching(
+                        node_id,
+                        node_result,
+                        graph,
+                        nodes_to_skip
+                    )
+
+                # Batches of a split node run on their own thread pool
+                if 'fan_out' in node_result:
+                    try:
+                        body, fan_out_success = await sync_to_async(self._run_fan_out, thread_sensitive=False)(
+                            execution, node_id, node_result, graph, context, results
+                        )
+                    except Exception as e:
+                        logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
+                        body, fan_out_success = [], False
+                    fanned_out.update(body)
+                    if not fan_out_success and not node_def.get('config', {}).get('continue_on_error', False):
+                        success = False
+                        halted = True
+                        continue
+
+                release_downstream(node_id)
+
+        return success
+
+    async def _aexecute_single_node(
+        self,
+        execution: WorkflowExecution,
+        node_def: Dict,
+        node_input: Dict,
+        context: Dict,
+        execution_order: int,
+        plan: Optional[CompiledWorkflowPlan] = None
+    ) -> Dict:
+        """
+        Execute a single node by awaiting its handler's aexecute
+
+        Args:
+            execution: WorkflowExecution instance
+            node_def: Node definition
+            node_input: Prepared input data
+            context: Execution context
+            execution_order: Order in execution sequence
+            plan: Compiled plan providing the node's handler and config
+
+        Returns:
+            Dict containing node execution result
+        """
+        logger.info(f"Executing node: {node_def.get('name', node_def['type'])} ({node_def['id']})")
+
+        start_time = time.time()
+
+        try:
+            handler, node_config = self._prepare_node_handler(node_def, node_input, context, plan)
+
+            cache_entry, cached_result = await sync_to_async(self._lookup_node_cache, thread_sensitive=False)(
+                node_def, node_config, node_input
+            )
+            if cached_result is not None:
+                return await sync_to_async(self._complete_node)(
+                    execution, node_def, node_input, cached_result, execution_order, start_time, cache_hit=True
+                )
+
+            result = await handler.aexecute(node_config, node_input, context)
+
+            if cache_entry is not None:
+                await sync_to_async(node_cache.store, thread_sensitive=False)(*cache_entry, result)
+
+            return await sync_to_async(self._complete_node)(
+                execution, node_def, node_input, result, execution_order, start_time
+            )
+
+        except Exception as e:
+            await sync_to_async(self._record_node_failure)(
+                execution, node_def, node_input, execution_order, start_time, e
+            )
+            raise
@@ -0,0 +1,154 @@
+"""
+Set-based INSERT and upsert for database nodes
+"""
+import logging
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Bound parameters per statement for backends that do not report a limit
+DEFAULT_MAX_PARAMS = 65535
+
+def parse_columns(columns: Any) -> List[str]:
+    """
+    Column list from a node option
+
+    Args:
+        columns: List of names or a comma separated string like "id,email"
+
+    Returns:
+        List of column names
+    """
+    if not columns:
+        return []
+    if isinstance(columns, str):
+        columns = columns.split(',')
+    return [str(column).strip() for column in columns if str(column).strip()]
+
+def quote_table(connection, table_name: str) -> str:
+    """Quote a table name, including schema-qualified names like schema.table"""
+    return '.'.join(connection.ops.quote_name(part) for part in table_name.split('.'))
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _chunk_columns(chunk: Sequence[Dict[str, Any]]) -> List[str]:
+    """Columns of a chunk in first-seen order, rows without a column insert NULL"""
+    columns = {}
+    for row in chunk:
+        if not isinstance(row, dict):
+            raise ValueError(f"Rows must be dicts, got {type(row).__name__}")
+        for column in row:
+            columns.setdefault(column, None)
+    return list(columns)
+
+def _rows_per_statement(connection, column_count: int, chunk_size: int) -> int:
+    max_params = connection.features.max_query_params or DEFAULT_MAX_PARAMS
+    return max(1, min(chunk_size, max_params // max(1, column_count)))
+
+def _upsert_clause(connection, columns: List[str], unique_columns: List[str], update_columns: Optional[List[str]]) -> str:
+    """ON DUPLICATE KEY / ON CONFLICT clause for the connection's backend"""
+    quote = connection.ops.quote_name
+    if update_columns is None:
+        update_columns = [column for column in columns if column not in unique_columns]
+    else:
+        update_columns = [column for column in update_columns if column in columns]
+
+    if connection.vendor == 'mysql':
+        # MySQL matches on any unique key, updating a key column to itself keeps a no-op valid
+        update_columns = update_columns or unique_columns[:1]
+        assignments = ', '.join(f"{quote(column)} = VALUES({quote(column)})" for column in update_columns)
+        return f" ON DUPLICATE KEY UPDATE {assignments}"
+
+    conflict = ', '.join(quote(column) for column in unique_columns)
+    if not update_columns:
+        return f" ON CONFLICT ({conflict}) DO NOTHING"
+    assignments = ', '.join(f"{quote(column)} = EXCLUDED.{quote(column)}" for column in update_columns)
+    return f" ON CONFLICT ({conflict}) DO UPDATE SET {assignments}"
+
+def supports_native_upsert(connection) -> bool:
+    return connection.vendor in ('mysql', 'postgresql', 'sqlite')
+
+def bulk_write(
+    table_name: str,
+    rows: Iterable[Dict[str, Any]],
+    using: str = 'default',
+    chunk_size: Optional[int] = None,
+    unique_columns: Optional[List[str]] = None,
+    update_columns: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Write rows with multi-row INSERT statements, one transaction per chunk
+
+    With unique_columns the statements become upserts: ON DUPLICATE KEY
+    UPDATE on MySQL, ON CONFLICT ... DO UPDATE on PostgreSQL and SQLite.
+    Chunks are further split so no statement exceeds the backend's bound
+    parameter limit. Rows can be any iterable, including a RowStream, and
+    are read one chunk at a time. Chunks committed before a failing chunk
+    stay written.
+
+    Args:
+        table_name: Table to write to
+        rows: Row dicts keyed by column name
+        using: Database alias
+        chunk_size: Rows per transaction (WORKFLOW_WRITE_CHUNK_SIZE by default)
+        unique_columns: Conflict target columns, makes the write an upsert
+        update_columns: Columns updated on conflict, all other columns by default
+
+    Returns:
+        Dict with rows, affected_rows (as reported by the driver) and statements
+
+    Raises:
+        ValueError: If the backend has no native upsert or a chunk fails
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'WORKFLOW_WRITE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    chunk_size = max(1, int(chunk_size))
+    connection = connections[using]
+    quote = connection.ops.quote_name
+
+    if unique_columns and not supports_native_upsert(connection):
+        raise ValueError(f"Bulk upsert is not supported on {connection.vendor}")
+
+    stats = {'rows': 0, 'affected_rows': 0, 'statements': 0}
+
+    for chunk in _chunks(rows, chunk_size):
+        columns = _chunk_columns(chunk)
+        if not columns:
+            continue
+
+        missing = [column for column in unique_columns or [] if column not in columns]
+        if missing:
+            raise ValueError(f"Upsert rows are missing unique columns: {', '.join(missing)}")
+
+        prefix = f"INSERT INTO {quote_table(connection, table_name)} ({', '.join(quote(column) for column in columns)}) VALUES "
+        row_placeholder = f"({', '.join(['%s'] * len(columns))})"
+        suffix = _upsert_clause(connection, columns, unique_columns, update_columns) if unique_columns else ''
+        rows_per_statement = _rows_per_statement(connection, len(columns), chunk_size)
+
+        try:
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                for start in range(0, len(chunk), rows_per_statement):
+                    statement_rows = chunk[start:start + rows_per_statement]
+                    params = [row.get(column) for row in statement_rows for column in columns]
+                    cursor.execute(prefix + ', '.join([row_placeholder] * len(statement_rows)) + suffix, params)
+                    stats['affected_rows'] += max(cursor.rowcount, 0)
+                    stats['statements'] += 1
+        except Exception as e:
+            raise ValueError(f"{str(e)} (after {stats['rows']} rows were written)") from e
+
+        stats['rows'] += len(chunk)
+
+    logger.debug(f"Wrote {stats['rows']} rows to {table_name} with {stats['statements']} statements")
+    return stats
@@ -0,0 +1,342 @@
+"""
+Cron Scheduler - claims and fires due WorkflowSchedules from a min-heap of due times
+
+Several scheduler processes can run side by side: due rows are claimed with
+SELECT ... FOR UPDATE SKIP LOCKED and their next run is moved forward in the
+same transaction, so every due time fires exactly once.
+"""
+import time
+import heapq
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+import pytz
+from croniter import croniter
+from django.conf import settings
+from django.db import transaction, connection
+from django.utils import timezone
+
+from .models import WorkflowSchedule, WorkflowExecution
+
+logger = logging.getLogger(__name__)
+
+class CompiledCron:
+    """
+    Parsed cron expression bound to a timezone
+
+    croniter parses the expression on construction, which dominates the
+    cost of computing a next run. A compiled instance is reused by moving
+    its start time, guarded by a lock since croniter is stateful.
+    """
+
+    def __init__(self, expression: str, timezone_name: str = 'UTC'):
+        self.expression = expression
+        self.tz = pytz.timezone(timezone_name or 'UTC')
+        self._cron = croniter(expression, datetime.now(self.tz))
+        self._lock = threading.Lock()
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        First run strictly after a moment
+
+        Args:
+            moment: Aware datetime
+
+        Returns:
+            Next run time in UTC
+        """
+        with self._lock:
+            self._cron.set_current(moment.astimezone(self.tz))
+            next_time = self._cron.get_next(datetime)
+        return next_time.astimezone(pytz.UTC)
+
+@lru_cache(maxsize=4096)
+def get_compiled_cron(expression: str, timezone_name: str = 'UTC') -> CompiledCron:
+    """
+    Compiled cron object, cached per (expression, timezone)
+
+    Raises:
+        ValueError: If the expression or timezone is invalid
+    """
+    try:
+        return CompiledCron(expression, timezone_name)
+    except pytz.UnknownTimeZoneError:
+        raise ValueError(f"Unknown timezone: {timezone_name}")
+    except Exception as e:
+        raise ValueError(f"Invalid cron expression '{expression}': {str(e)}")
+
+def next_run_time(expression: str, timezone_name: str = 'UTC', after: Optional[datetime] = None) -> datetime:
+    """
+    Next run of a cron expression after a moment, now by default
+
+    Args:
+        expression: Cron expression
+        timezone_name: Timezone the expression is evaluated in
+        after: Aware datetime to start from
+
+    Returns:
+        Next run time in UTC
+    """
+    return get_compiled_cron(expression, timezone_name).next_after(after or timezone.now())
+
+class CronScheduler:
+    """
+    Fires due workflow schedules
+
+    Due times within the lookahead window are kept in a min-heap, so the
+    loop sleeps until the earliest one instead of polling every row. The heap
+    is reloaded every refresh_interval seconds to pick up new or changed
+    schedules and work done by other replicas.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        lookahead: Optional[float] = None,
+        refresh_interval: Optional[float] = None
+    ):
+        self.batch_size = batch_size or getattr(settings, 'WORKFLOW_SCHEDULER_BATCH_SIZE', 500)
+        self.lookahead = lookahead or getattr(settings, 'WORKFLOW_SCHEDULER_LOOKAHEAD', 60)
+        self.refresh_interval = refresh_interval or getattr(settings, 'WORKFLOW_SCHEDULER_REFRESH_INTERVAL', 30)
+        self._heap: List[Tuple[datetime, str]] = []
+        self._last_refresh = None
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        """
+        Reload the heap with schedules due before now + lookahead
+
+        Schedules without a next run time get one first.
+
+        Returns:
+            int: Number of due times in the heap
+        """
+        now = now or timezone.now()
+        self.initialize_missing(now)
+
+        due_rows = WorkflowSchedule.objects.filter(
+            is_active=True,
+            workflow__status='active',
+            next_execution_at__lte=now + timedelta(seconds=self.lookahead)
+        ).values_list('next_execution_at', 'id')
+
+        self._heap = [(due_at, str(schedule_id)) for due_at, schedule_id in due_rows]
+        heapq.heapify(self._heap)
+        self._last_refresh = time.monotonic()
+        return len(self._heap)
+
+    def initialize_missing(self, now: Optional[datetime] = None) -> int:
+        """
+        Compute next_execution_at for active schedules that have none
+
+        Returns:
+            int: Number of schedules updated
+        """
+        now = now or timezone.now()
+        schedules = list(WorkflowSchedule.objects.filter(
+            is_active=True,
+            next_execution_at__isnull=True
+        ).only('id', 'cron_expression', 'timezone', 'start_date'))
+
+        updated = []
+        for schedule in schedules:
+            try:
+                schedule.next_execution_at = next_run_time(
+                    schedule.cron_expression,
+                    schedule.timezone,
+                    max(now, schedule.start_date) if schedule.start_date else now
+                )
+                updated.append(schedule)
+            except ValueError as e:
+                logger.error(f"Schedule {schedule.id} has an invalid cron expression: {str(e)}")
+
+        WorkflowSchedule.objects.bulk_update(updated, ['next_execution_at'], batch_size=self.batch_size)
+        return len(updated)
+
+    def pop_due(self, now: datetime) -> List[str]:
+        """Remove and return the ids of heap entries due at or before now"""
+        due_ids = []
+        while self._heap and self._heap[0][0] <= now:
+            due_ids.append(heapq.heappop(self._heap)[1])
+        return due_ids
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        """Seconds until the earliest due time in the heap, None if it is empty"""
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - now).total_seconds())
+
+    def run_once(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+        """
+        Fire every schedule due now, without using the heap
+
+        Used by the Celery task and the process_schedules command.
+
+        Args:
+            now: Reference time
+            limit: Maximum number of schedules to fire
+
+        Returns:
+            int: Number of executions created
+        """
+        now = now or timezone.now()
+        self.initialize_missing(now)
+
+        due_ids = WorkflowSchedule.objects.filter(
+            is_active=True,
+            workflow__status='active',
+            next_execution_at__lte=now
+        ).order_by('next_execution_at').values_list('id', flat=True)
+        if limit:
+            due_ids = due_ids[:limit]
+
+        return self.fire(list(due_ids), now)
+
+    def fire(self, schedule_ids: Iterable, now: Optional[datetime] = None) -> int:
+        """
+        Claim due schedules, create their executions and advance their next run
+
+        Args:
+            schedule_ids: Candidate schedule ids
+            now: Reference time
+
+        Returns:
+            int: Number of executions created
+        """
+        from .tasks import dispatch_executions
+
+        now = now or timezone.now()
+        schedule_ids = list(schedule_ids)
+        fired = 0
+
+        for start in range(0, len(schedule_ids), self.batch_size):
+            batch = schedule_ids[start:start + self.batch_size]
+
+            with transaction.atomic():
+                claimed = list(self._claim(batch, now))
+                executions, changed = self._advance(claimed, now)
+
+                WorkflowExecution.objects.bulk_create(executions, batch_size=self.batch_size)
+                WorkflowSchedule.objects.bulk_update(
+                    changed,
+                    ['next_execution_at', 'last_executed_at', 'execution_count', 'is_active'],
+                    batch_size=self.batch_size
+                )
+
+                transaction.on_commit(
+                    lambda executions=executions: dispatch_executions(executions)
+                )
+
+            for schedule in changed:
+                if schedule.is_active and schedule.next_execution_at <= now + timedelta(seconds=self.lookahead):
+                    heapq.heappush(self._heap, (schedule.next_execution_at, str(schedule.id)))
+
+            fired += len(executions)
+
+        if fired:
+            logger.info(f"Fired {fired} scheduled workflow executions")
+
+        return fired
+
+    def _claim(self, schedule_ids: List[str], now: datetime):
+        """Lock the still-due rows, skipping rows another replica is firing"""
+        lock_options = {'skip_locked': True}
+        if connection.features.has_select_for_update_of:
+            # Do not lock the joined workflow rows
+            lock_options['of'] = ('self',)
+
+        return WorkflowSchedule.objects.select_for_update(**lock_options).filter(
+            id__in=schedule_ids,
+            is_active=True,
+            workflow__status='active',
+            next_execution_at__lte=now
+        ).only(
+            'id', 'workflow_id', 'cron_expression', 'timezone', 'max_executions',
+            'execution_count', 'start_date', 'end_date', 'next_execution_at', 'is_active'
+        )
+
+    def _advance(self, schedules: List[WorkflowSchedule], now: datetime):
+        """Build the executions of claimed schedules and move their next run forward"""
+        executions = []
+        changed = []
+
+        for schedule in schedules:
+            try:
+                next_execution = next_run_time(schedule.cron_expression, schedule.timezone, now)
+            except ValueError as e:
+                logger.error(f"Deactivating schedule {schedule.id}: {str(e)}")
+                schedule.is_active = False
+                changed.append(schedule)
+                continue
+
+            if schedule.end_date and now > schedule.end_date:
+                schedule.is_active = False
+                changed.append(schedule)
+                continue
+
+            if schedule.start_date and now < schedule.start_date:
+                schedule.next_execution_at = next_run_time(
+                    schedule.cron_expression, schedule.timezone, schedule.start_date
+                )
+                changed.append(schedule)
+                continue
+
+            executions.append(WorkflowExecution(
+                id=uuid.uuid4(),
+                workflow_id=schedule.workflow_id,
+                triggered_by='scheduled',
+                input_data={},
+                execution_context={
+                    'scheduled': True,
+                    'schedule_id': str(schedule.id),
+                    'scheduled_for': schedule.next_execution_at.isoformat()
+                }
+            ))
+
+            # Missed runs are not replayed, the next run is the first one after now
+            schedule.last_executed_at = now
+            schedule.execution_count += 1
+            schedule.next_execution_at = next_execution
+            if schedule.max_executions and schedule.execution_count >= schedule.max_executions:
+                schedule.is_active = False
+            if schedule.end_date and next_execution > schedule.end_date:
+                schedule.is_active = False
+            changed.append(schedule)
+
+        return executions, changed
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None, max_sleep: float = 5.0):
+        """
+        Scheduler loop: sleep until the earliest due time, then fire
+
+        Args:
+            stop_event: Event that ends the loop when set
+            max_sleep: Longest sleep between checks, in seconds
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info("Cron scheduler started")
+
+        while not stop_event.is_set():
+            now = timezone.now()
+
+            if self._last_refresh is None or time.monotonic() - self._last_refresh >= self.refresh_interval:
+                try:
+                    self.refresh(now)
+                except Exception as e:
+                    logger.error(f"Failed to load due schedules: {str(e)}")
+
+            due_ids = self.pop_due(now)
+            if due_ids:
+                try:
+                    self.fire(due_ids, now)
+                except Exception as e:
+                    logger.error(f"Failed to fire due schedules: {str(e)}")
+                continue
+
+            wait = self.seconds_until_next(timezone.now())
+            stop_event.wait(min(max_sleep, wait) if wait is not None else max_sleep)
+
+        logger.info("Cron scheduler stopped")
@@ -0,0 +1,187 @@
+"""
+Read-replica routing for workflow data nodes and the query builder
+
+Read-only node operations go to the WORKFLOW_READ_DATABASE alias, writes
+stay on the primary (WORKFLOW_WRITE_DATABASE, 'default' unless set). A
+node can pick another alias with its database_alias option. With
+WORKFLOW_REPLICA_MAX_LAG set, a replica that is further behind than that
+many seconds (or cannot report its lag) is skipped and reads fall back to
+the primary.
+
+For ORM access, add ReplicaRouter to DATABASE_ROUTERS:
+
+    DATABASES = {'default': {...}, 'replica': {...}}
+    DATABASE_ROUTERS = ['apps.workflow_app.db_routing.ReplicaRouter']
+    WORKFLOW_READ_DATABASE = 'replica'
+
+Locally two SQLite aliases work, e.g. a replica pointing at a copy of the
+primary file, or the same file with 'TEST': {'MIRROR': 'default'}.
+"""
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+def primary_alias() -> str:
+    return getattr(settings, 'WORKFLOW_WRITE_DATABASE', DEFAULT_DB_ALIAS)
+
+def replica_alias() -> str:
+    """Configured read alias, the primary when no replica is configured"""
+    return getattr(settings, 'WORKFLOW_READ_DATABASE', None) or primary_alias()
+
+def replica_aliases():
+    """Aliases that only serve reads"""
+    aliases = set(getattr(settings, 'WORKFLOW_REPLICA_DATABASES', []))
+    if replica_alias() != primary_alias():
+        aliases.add(replica_alias())
+    return aliases
+
+def _check_alias(alias: str) -> str:
+    if alias not in settings.DATABASES:
+        raise ValueError(f"Unknown database alias: {alias}")
+    return alias
+
+class ReplicationLagMonitor:
+    """
+    Measures and caches replication lag per alias
+
+    Lag is queried at most once per WORKFLOW_REPLICA_LAG_CHECK_INTERVAL
+    seconds per alias and process. WORKFLOW_REPLICA_LAG_CHECK may name a
+    callable (alias -> seconds or None) for databases without built-in
+    support, e.g. a heartbeat table.
+    """
+
+    def __init__(self):
+        self._checked: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def check_interval(self) -> float:
+        return getattr(settings, 'WORKFLOW_REPLICA_LAG_CHECK_INTERVAL', 5)
+
+    def lag(self, alias: str) -> Optional[float]:
+        """
+        Replication lag of an alias in seconds
+
+        Returns:
+            Seconds behind the primary, 0 for databases that are not replicas,
+            None if the lag cannot be determined
+        """
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked.get(alias)
+            if checked is not None and now - checked[0] < self.check_interval:
+                return checked[1]
+
+        try:
+            lag = self._measure(alias)
+        except Exception as e:
+            logger.warning(f"Could not measure replication lag of '{alias}': {str(e)}")
+            lag = None
+
+        with self._lock:
+            self._checked[alias] = (now, lag)
+        return lag
+
+    def _measure(self, alias: str) -> Optional[float]:
+        custom_check = getattr(settings, 'WORKFLOW_REPLICA_LAG_CHECK', None)
+        if custom_check:
+            return import_string(custom_check)(alias)
+
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT CASE WHEN pg_is_in_recovery() "
+                    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                    "ELSE 0 END"
+                )
+                return float(cursor.fetchone()[0])
+
+            if connection.vendor == 'mysql':
+                cursor.execute("SHOW SLAVE STATUS")
+                row = cursor.fetchone()
+                if row is None:
+                    return 0.0
+                status = dict(zip([col[0] for col in cursor.description], row))
+                lag = status.get('Seconds_Behind_Master')
+                return float(lag) if lag is not None else None
+
+        # SQLite and other backends have no replication to measure
+        return 0.0
+
+    def is_healthy(self, alias: str) -> bool:
+        """Check whether an alias is within WORKFLOW_REPLICA_MAX_LAG"""
+        max_lag = getattr(settings, 'WORKFLOW_REPLICA_MAX_LAG', None)
+        if max_lag is None:
+            return True
+        lag = self.lag(alias)
+        return lag is not None and lag <= max_lag
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+
+lag_monitor = ReplicationLagMonitor()
+
+def read_alias(config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Database alias for a read-only operation
+
+    Args:
+        config: Node configuration, may set database_alias
+
+    Returns:
+        The configured alias, or the replica when it is within the lag limit
+    """
+    alias = (config or {}).get('database_alias') or replica_alias()
+    _check_alias(alias)
+
+    if alias != primary_alias() and not lag_monitor.is_healthy(alias):
+        logger.warning(f"Replica '{alias}' is lagging, reading from '{primary_alias()}'")
+        return primary_alias()
+    return alias
+
+def write_alias(config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Database alias for an operation that writes
+
+    Raises:
+        ValueError: If the configuration points a write at a read-only alias
+    """
+    alias = (config or {}).get('database_alias') or primary_alias()
+    _check_alias(alias)
+
+    if alias in replica_aliases():
+        raise ValueError(f"Database alias '{alias}' is read-only")
+    return alias
+
+class ReplicaRouter:
+    """
+    Routes reads of unmanaged (GRM) models to the replica
+
+    Workflow bookkeeping models are managed and stay on the primary for
+    both reads and writes, so the engine always reads its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not model._meta.managed:
+            return read_alias()
+        return primary_alias()
+
+    def db_for_write(self, model, **hints):
+        return primary_alias()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
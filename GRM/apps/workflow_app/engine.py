@@ -1,18 +1,25 @@
 """
 Workflow Execution Engine - Core engine for running n8n-like workflows
 """
+import copy
 import time
-import json
 import logging
 import traceback
 from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
 from django.utils import timezone
-from django.db import transaction
+from django.db import transaction, connections
+from django.db.models import F
 from django.conf import settings
 
-from .models import WorkflowExecution, NodeExecution, NodeType
-from .handlers import get_node_handler
+from .models import Workflow, WorkflowExecution, NodeExecution, NodeType
+from .handlers import get_node_handler, NODE_HANDLERS
+from .recorder import NodeExecutionRecorder
+from .streaming import materialize_streams
+from .payload_store import store_payload, load_payload
+from . import node_cache
+from .planner import CompiledWorkflowPlan, plan_cache, workflow_plan_key
 from .utils import VariableResolver, ExpressionEvaluator
 
 logger = logging.getLogger(__name__)
@@ -25,47 +32,23 @@ class WorkflowEngine:
     def __init__(self):
         self.variable_resolver = VariableResolver()
         self.expression_evaluator = ExpressionEvaluator()
+        self._recorders = {}
+        self._resumed = {}
     
-    def execute_workflow(self, execution_id: str) -> bool:
+    def execute_workflow(self, execution_id: str, resume: bool = False) -> bool:
         """
         Execute a complete workflow
         
         Args:
             execution_id: UUID of the WorkflowExecution to run
+            resume: Reuse the outputs of nodes that already succeeded in this
+                execution and run only the rest, e.g. when a task is retried
             
         Returns:
             bool: True if successful, False if failed
         """
         try:
-            execution = WorkflowExecution.objects.select_related('workflow').get(id=execution_id)
-            workflow = execution.workflow
-            
-            logger.info(f"Starting execution of workflow '{workflow.name}' (ID: {execution_id})")
-            
-            execution.status = 'running'
-            execution.save()
-            
-            definition = workflow.definition
-            if not definition or 'nodes' not in definition:
-                raise ValueError("Invalid workflow definition - no nodes found")
-            
-            nodes = definition['nodes']
-            connections = definition.get('connections', [])
-            
-            if not nodes:
-                raise ValueError("Workflow has no nodes to execute")
-            
-            execution_graph = self._build_execution_graph(nodes, connections)
-            
-            node_results = {}
-            execution_context = {
-                'workflow_id': str(workflow.id),
-                'execution_id': str(execution.id),
-                'input_data': execution.input_data,
-                'variables': self._load_workflow_variables(workflow),
-                'node_results': node_results,  # Add node results to context
-                'test_mode': execution.execution_context.get('test_mode', False)
-            }
+            execution, execution_graph, execution_context, node_results = self._start_execution(execution_id, resume)
             
             success = self._execute_nodes(
                 execution, 
@@ -74,30 +57,195 @@ class WorkflowEngine:
                 node_results
             )
             
-            execution.status = 'success' if success else 'failed'
-            execution.finished_at = timezone.now()
-            execution.calculate_duration()
-            execution.output_data = self._sanitize_data_for_storage(node_results)
-            execution.save()
-            
-            logger.info(f"Workflow execution completed with status: {execution.status}")
+            self._finish_execution(execution, success, node_results)
             return success
             
         except Exception as e:
-            logger.error(f"Workflow execution failed: {str(e)}")
-            logger.error(traceback.format_exc())
-            
-            try:
-                execution = WorkflowExecution.objects.get(id=execution_id)
-                execution.status = 'failed'
-                execution.finished_at = timezone.now()
-                execution.error_message = str(e)
-                execution.error_details = { 'error_type': type(e).__name__, 'traceback': traceback.format_exc() }
-                execution.save()
-            except WorkflowExecution.DoesNotExist:
-                pass
-            
+            self._fail_execution(execution_id, e)
             return False
+    
+    def _start_execution(self, execution_id: str, resume: bool = False) -> Tuple[WorkflowExecution, Dict, Dict, Dict]:
+        """
+        Load the execution, mark it as running and build everything needed to run its nodes
+        
+        An execution whose context names a resume_from execution, or one run
+        with resume=True, starts with the outputs of the nodes that already
+        succeeded there (see _restore_node_results).
+        
+        Args:
+            execution_id: UUID of the WorkflowExecution to run
+            resume: Resume from the execution's own earlier attempt
+            
+        Returns:
+            Tuple of (execution, execution graph, execution context, node results)
+        """
+        execution = WorkflowExecution.objects.select_related('workflow').get(id=execution_id)
+        workflow = execution.workflow
+        
+        logger.info(f"Starting execution of workflow '{workflow.name}' (ID: {execution_id})")
+        
+        # Retries and resumes of the same execution are not counted again
+        first_attempt = WorkflowExecution.objects.filter(id=execution.id, status='queued').update(status='running') == 1
+        
+        execution.status = 'running'
+        update_fields = ['status']
+        if resume:
+            # Errors of the earlier attempt no longer apply
+            execution.error_message = ''
+            execution.error_details = {}
+            update_fields += ['error_message', 'error_details']
+        execution.save(update_fields=update_fields)
+        self._update_workflow_summary(execution, started=True, first_attempt=first_attempt)
+        self._recorders[str(execution.id)] = NodeExecutionRecorder()
+        
+        execution_graph = self._get_execution_plan(workflow)
+        
+        node_results = {}
+        resume_from = execution.execution_context.get('resume_from') or (str(execution.id) if resume else None)
+        if resume_from:
+            node_results.update(self._restore_node_results(execution, resume_from, execution_graph))
+        self._resumed[str(execution.id)] = set(node_results)
+        execution_context = {
+            'workflow_id': str(workflow.id),
+            'execution_id': str(execution.id),
+            'input_data': execution.input_data,
+            'variables': self._load_workflow_variables(workflow),
+            'node_results': node_results,  # Add node results to context
+            'test_mode': execution.execution_context.get('test_mode', False)
+        }
+        
+        return execution, execution_graph, execution_context, node_results
+    
+    def _get_execution_plan(self, workflow) -> CompiledWorkflowPlan:
+        """
+        Get the compiled plan of a workflow from the per-process plan cache
+        
+        Args:
+            workflow: Workflow instance
+        
+        Returns:
+            CompiledWorkflowPlan for the current version of the workflow
+        """
+        return plan_cache.get_or_compile(workflow, self._compile_plan)
+    
+    def _compile_plan(self, workflow) -> CompiledWorkflowPlan:
+        """
+        Parse a workflow definition into an immutable execution plan
+        
+        Args:
+            workflow: Workflow instance
+        
+        Returns:
+            CompiledWorkflowPlan with graph, handler instances and node configs
+        """
+        definition = copy.deepcopy(workflow.definition)
+        if not definition or 'nodes' not in definition:
+            raise ValueError("Invalid workflow definition - no nodes found")
+        
+        nodes = definition['nodes']
+        connections = definition.get('connections', [])
+        
+        if not nodes:
+            raise ValueError("Workflow has no nodes to execute")
+        
+        execution_graph = self._build_execution_graph(nodes, connections)
+        
+        # Handlers are stateless, one instance per node is shared by all executions
+        handlers = {}
+        configs = {}
+        for node_id, node_def in execution_graph['nodes'].items():
+            handlers[node_id] = get_node_handler(node_def['type'])
+            configs[node_id] = self.variable_resolver.compile_config(node_def.get('config', {}))
+        
+        logger.debug(f"Compiled execution plan for workflow {workflow.id} (v{workflow.version})")
+        
+        return CompiledWorkflowPlan(
+            workflow_plan_key(workflow),
+            execution_graph,
+            handlers,
+            configs
+        )
+    
+    def _finish_execution(self, execution: WorkflowExecution, success: bool, node_results: Dict):
+        """
+        Store the final status and outputs of an execution
+        
+        Args:
+            execution: WorkflowExecution instance
+            success: Whether all nodes completed successfully
+            node_results: Results of the executed nodes
+        """
+        execution.status = 'success' if success else 'failed'
+        execution.finished_at = timezone.now()
+        execution.calculate_duration()
+        execution.output_data = self._sanitize_data_for_storage(node_results)
+        
+        self._flush_node_records(execution)
+        self._resumed.pop(str(execution.id), None)
+        execution.save()
+        self._update_workflow_summary(execution)
+        
+        logger.info(f"Workflow execution completed with status: {execution.status}")
+    
+    def _update_workflow_summary(self, execution: WorkflowExecution, started: bool = False, first_attempt: bool = False):
+        """
+        Keep the denormalized execution summary of the workflow up to date
+        
+        Uses queryset updates so the workflow's post_save handlers (plan and
+        webhook cache invalidation) do not run for every execution.
+        
+        Args:
+            execution: WorkflowExecution that started or finished
+            started: Whether the execution has just started
+            first_attempt: Whether it left the queue, only then it is counted
+        """
+        workflows = Workflow.objects.filter(id=execution.workflow_id)
+        
+        try:
+            if started:
+                summary = {
+                    'last_executed_at': execution.started_at,
+                    'last_execution_status': execution.status,
+                    'last_execution_duration': None
+                }
+                if first_attempt:
+                    summary['execution_count'] = F('execution_count') + 1
+                workflows.update(**summary)
+            else:
+                # A newer execution of the same workflow owns the summary
+                workflows.filter(last_executed_at__lte=execution.started_at).update(
+                    last_execution_status=execution.status,
+                    last_execution_duration=execution.duration_seconds
+                )
+        except Exception as e:
+            logger.error(f"Failed to update summary of workflow {execution.workflow_id}: {str(e)}")
+    
+    def _fail_execution(self, execution_id: str, error: Exception):
+        """
+        Mark an execution as failed after an unexpected error
+        
+        Args:
+            execution_id: UUID of the WorkflowExecution
+            error: Exception that stopped the execution
+        """
+        error_traceback = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+        
+        logger.error(f"Workflow execution failed: {str(error)}")
+        logger.error(error_traceback)
+        
+        try:
+            execution = WorkflowExecution.objects.get(id=execution_id)
+            self._flush_node_records(execution)
+            self._resumed.pop(str(execution.id), None)
+            execution.status = 'failed'
+            execution.finished_at = timezone.now()
+            execution.error_message = str(error)
+            execution.error_details = { 'error_type': type(error).__name__, 'traceback': error_traceback }
+            execution.calculate_duration()
+            execution.save()
+            self._update_workflow_summary(execution)
+        except WorkflowExecution.DoesNotExist:
+            pass
 
     def _execute_nodes(
         self, 
@@ -108,13 +256,31 @@ class WorkflowEngine:
     ) -> bool:
         """
         Execute nodes in the correct order, handling conditional branching.
+        
+        Workflows with max_parallel_nodes > 1 are run on a bounded thread pool,
+        everything else runs one node at a time in topological order.
         """
+        max_parallel_nodes = execution.workflow.max_parallel_nodes or 1
+        if max_parallel_nodes > 1:
+            return self._execute_nodes_parallel(
+                execution, graph, context, results, max_parallel_nodes
+            )
+        
         execution_order = graph['execution_order']
         node_lookup = graph['nodes']
         
         nodes_to_skip = set()
+        fanned_out = set()
+        resumed = self._resumed.get(str(execution.id), set())
 
         for order_index, node_id in enumerate(execution_order):
+            if node_id in resumed:
+                self._replay_resumed_node(node_id, graph, results, nodes_to_skip)
+                continue
+            
+            if node_id in fanned_out:
+                continue
+            
             if node_id in nodes_to_skip:
                 self._create_node_execution_record(
                     execution, node_lookup[node_id], {}, {}, order_index, 'skipped'
@@ -132,7 +298,7 @@ class WorkflowEngine:
                 context['node_results'] = results
                 
                 node_result = self._execute_single_node(
-                    execution, node_def, node_input, context, order_index
+                    execution, node_def, node_input, context, order_index, graph
                 )
                 
                 results[node_id] = node_result
@@ -149,6 +315,15 @@ class WorkflowEngine:
                         nodes_to_skip
                     )
                 
+                # Split nodes run their downstream sub-chain once per batch
+                if 'fan_out' in node_result:
+                    body, fan_out_success = self._run_fan_out(
+                        execution, node_id, node_result, graph, context, results
+                    )
+                    fanned_out.update(body)
+                    if not fan_out_success and not node_def.get('config', {}).get('continue_on_error', False):
+                        return False
+                
             except Exception as e:
                 logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
                 
@@ -168,7 +343,454 @@ class WorkflowEngine:
                     return False
         
         return True
+    
+    def _execute_nodes_parallel(
+        self,
+        execution: WorkflowExecution,
+        graph: Dict,
+        context: Dict,
+        results: Dict,
+        max_workers: int
+    ) -> bool:
+        """
+        Execute nodes as soon as all of their predecessors are done.
+        
+        Ready nodes are submitted to a thread pool of at most max_workers
+        threads. Results, branching and skip bookkeeping are handled on the
+        calling thread only, so handlers never see a partially updated graph.
+        
+        Args:
+            execution: WorkflowExecution instance
+            graph: Execution graph from _build_execution_graph
+            context: Execution context
+            results: Node results, filled in as nodes complete
+            max_workers: Maximum number of nodes running at the same time
+            
+        Returns:
+            bool: True if successful, False if a node failed without continue_on_error
+        """
+        node_lookup = graph['nodes']
+        order_index = {node_id: index for index, node_id in enumerate(graph['execution_order'])}
+        pending_parents = {
+            node_id: len(graph['incoming'].get(node_id, []))
+            for node_id in graph['execution_order']
+        }
+        ready = deque(node_id for node_id in graph['execution_order'] if pending_parents[node_id] == 0)
+        running = {}
+        nodes_to_skip = set()
+        fanned_out = set()
+        resumed = self._resumed.get(str(execution.id), set())
+        success = True
+        halted = False
+        
+        def release_downstream(node_id):
+            for connection in graph['outgoing'].get(node_id, []):
+                target = connection['target']
+                pending_parents[target] -= 1
+                if pending_parents[target] == 0:
+                    ready.append(target)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='workflow-node') as pool:
+            while running or (ready and not halted):
+                while ready and not halted:
+                    node_id = ready.popleft()
+                    node_def = node_lookup[node_id]
+                    
+                    if node_id in resumed:
+                        self._replay_resumed_node(node_id, graph, results, nodes_to_skip)
+                        release_downstream(node_id)
+                        continue
+                    
+                    if node_id in fanned_out:
+                        release_downstream(node_id)
+                        continue
+                    
+                    if node_id in nodes_to_skip:
+                        self._create_node_execution_record(
+                            execution, node_def, {}, {}, order_index[node_id], 'skipped'
+                        )
+                        release_downstream(node_id)
+                        continue
+                    
+                    try:
+                        node_input = self._prepare_node_input(
+                            node_id, node_def, graph['incoming'], results, context
+                        )
+                    except Exception as e:
+                        logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
+                        self._create_node_execution_record(
+                            execution, node_def, {}, {}, order_index[node_id], 'failed', str(e)
+                        )
+                        if not node_def.get('config', {}).get('continue_on_error', False):
+                            success = False
+                            halted = True
+                        else:
+                            release_downstream(node_id)
+                        continue
+                    
+                    future = pool.submit(
+                        self._execute_node_in_thread,
+                        execution, node_def, node_input, context, order_index[node_id], graph
+                    )
+                    running[future] = node_id
+                
+                if not running:
+                    continue
+                
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    node_id = running.pop(future)
+                    node_def = node_lookup[node_id]
+                    
+                    try:
+                        node_result = future.result()
+                    except Exception as e:
+                        # The failed NodeExecution record is written by _execute_single_node
+                        logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
+                        if not node_def.get('config', {}).get('continue_on_error', False):
+                            success = False
+                            halted = True
+                        else:
+                            release_downstream(node_id)
+                        continue
+                    
+                    results[node_id] = node_result
+                    context['node_results'] = results
+                    
+                    if 'branch_condition' in node_result:
+                        self._handle_conditional_branching(
+                            node_id,
+                            node_result,
+                            graph,
+                            nodes_to_skip
+                        )
+                    
+                    # The sub-chain of a split node has its own worker pool
+                    if 'fan_out' in node_result:
+                        try:
+                            body, fan_out_success = self._run_fan_out(
+                                execution, node_id, node_result, graph, context, results
+                            )
+                        except Exception as e:
+                            logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
+                            body, fan_out_success = [], False
+                        fanned_out.update(body)
+                        if not fan_out_success and not node_def.get('config', {}).get('continue_on_error', False):
+                            success = False
+                            halted = True
+                            continue
+                    
+                    release_downstream(node_id)
+        
+        return success
+    
+    def _execute_node_in_thread(
+        self,
+        execution: WorkflowExecution,
+        node_def: Dict,
+        node_input: Dict,
+        context: Dict,
+        execution_order: int,
+        plan: Optional[CompiledWorkflowPlan] = None
+    ) -> Dict:
+        """
+        Run _execute_single_node on a pool thread and release the thread's
+        database connections afterwards, since Django opens one per thread.
+        """
+        try:
+            return self._execute_single_node(
+                execution, node_def, node_input, context, execution_order, plan
+            )
+        finally:
+            connections.close_all()
+        
+    def _restore_node_results(self, execution: WorkflowExecution, source_id: str, graph: Dict) -> Dict:
+        """
+        Rebuild node results from the NodeExecution rows of an earlier run
+        
+        A node is restored when its latest record in the source execution
+        succeeded with the node's current type and config, its output is
+        stored in full, and all of its parents were restored too. Split
+        nodes always run again so their batches are rebuilt. Everything
+        else runs again, starting at the node that failed. When the source is
+        another execution, the restored records are copied into this one so
+        it can be resumed from in turn.
+        
+        Args:
+            execution: WorkflowExecution being started
+            source_id: UUID of the execution to resume from
+            graph: Execution graph
+            
+        Returns:
+            Dict of restored node results
+        """
+        if not WorkflowExecution.objects.filter(id=source_id, workflow_id=execution.workflow_id).exists():
+            raise ValueError(f"Cannot resume from execution {source_id}: not an execution of this workflow")
+        
+        latest = {}
+        for record in NodeExecution.objects.filter(workflow_execution_id=source_id).order_by('started_at', 'execution_order'):
+            latest[record.node_id] = record
+        
+        restored = {}
+        copy_records = str(source_id) != str(execution.id)
+        
+        for node_id in graph['execution_order']:
+            node_def = graph['nodes'][node_id]
+            record = latest.get(node_id)
+            
+            if record is None or record.status != 'success':
+                continue
+            if record.node_type != node_def['type'] or record.node_config != node_def.get('config', {}):
+                continue
+            if any(connection['source'] not in restored for connection in graph['incoming'].get(node_id, [])):
+                continue
+            
+            try:
+                result = load_payload(record.output_data)
+            except Exception as e:
+                logger.warning(f"Cannot restore output of node {node_id}: {str(e)}")
+                continue
+            
+            data = result.get('data') if isinstance(result, dict) else None
+            if not isinstance(result, dict) or result.get('_truncated') or 'fan_out' in result:
+                continue
+            if isinstance(data, dict) and data.get('_stream'):
+                continue
+            
+            restored[node_id] = result
+            
+            if copy_records:
+                self._recorders[str(execution.id)].add(NodeExecution(
+                    workflow_execution=execution,
+                    node_id=record.node_id,
+                    node_type=record.node_type,
+                    node_name=record.node_name,
+                    status='success',
+                    execution_order=record.execution_order,
+                    started_at=timezone.now(),
+                    finished_at=timezone.now(),
+                    duration_ms=0,
+                    input_data=record.input_data,
+                    output_data=record.output_data,
+                    node_config=record.node_config,
+                    cache_hit=record.cache_hit
+                ))
+        
+        logger.info(f"Resuming execution {execution.id} from {source_id} with {len(restored)} restored nodes")
+        return restored
+    
+    def _replay_resumed_node(self, node_id: str, graph: Dict, results: Dict, nodes_to_skip: set):
+        """
+        Apply the branching decision of a restored node without running it
+        
+        Args:
+            node_id: ID of the restored node
+            graph: Execution graph
+            results: Node results holding the restored result
+            nodes_to_skip: Nodes skipped by branching, updated in place
+        """
+        if 'branch_condition' in results[node_id]:
+            self._handle_conditional_branching(node_id, results[node_id], graph, nodes_to_skip)
+    
+    def _fan_out_body(self, node_id: str, graph: Dict) -> List[str]:
+        """
+        Find the sub-chain a split node runs per batch
+        
+        The sub-chain is every node downstream of the split node up to, but
+        not including, the aggregate_batches nodes that close it.
+        
+        Args:
+            node_id: ID of the split_in_batches or for_each node
+            graph: Execution graph
+            
+        Returns:
+            List of node IDs in execution order
+        """
+        body = set()
+        queue = deque([node_id])
+        
+        while queue:
+            current = queue.popleft()
+            for connection in graph['outgoing'].get(current, []):
+                target = connection['target']
+                handler_class = NODE_HANDLERS.get(graph['nodes'][target]['type'])
+                if target in body or getattr(handler_class, 'closes_fan_out', False):
+                    continue
+                body.add(target)
+                queue.append(target)
+        
+        return [body_node_id for body_node_id in graph['execution_order'] if body_node_id in body]
+    
+    def _run_fan_out(
+        self,
+        execution: WorkflowExecution,
+        node_id: str,
+        node_result: Dict,
+        graph: Dict,
+        context: Dict,
+        results: Dict
+    ) -> Tuple[List[str], bool]:
+        """
+        Run the sub-chain of a split node once per batch on a bounded pool
+        
+        Each batch sees the split node's output as just its batch and keeps
+        its own results, so batches never see each other's data. Afterwards
+        every sub-chain node gets a result whose data lists its output per
+        batch (None where it failed or was skipped), which the closing
+        aggregate_batches node gathers. Unless the split node has
+        continue_on_error, the first failed batch cancels the batches that
+        have not started.
+        
+        Args:
+            execution: WorkflowExecution instance
+            node_id: ID of the split node
+            node_result: Result of the split node, carrying 'fan_out' options
+            graph: Execution graph
+            context: Execution context
+            results: Node results, the sub-chain results are added to it
+            
+        Returns:
+            Tuple of (sub-chain node IDs, whether all batches succeeded)
+        """
+        fan_out = node_result['fan_out']
+        items = node_result.get('data') or []
+        batch_size = max(1, int(fan_out.get('batch_size', 1)))
+        
+        if fan_out.get('single_items'):
+            batches = list(items)
+        else:
+            batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+        
+        body = self._fan_out_body(node_id, graph)
+        stop_on_failure = not graph['nodes'][node_id].get('config', {}).get('continue_on_error', False)
+        batch_results = [None] * len(batches)
+        failed_batches = []
+        
+        logger.info(f"Running {len(body)} nodes for {len(batches)} batches of node {node_id}")
+        
+        if body and batches:
+            max_workers = min(max(1, int(fan_out.get('concurrency', 1))), len(batches))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='workflow-batch') as pool:
+                futures = {}
+                for index, batch in enumerate(batches):
+                    # Each batch sees the split node's output as just its batch
+                    split_result = {key: value for key, value in node_result.items() if key != 'fan_out'}
+                    split_result.update({'data': batch, 'batch_index': index})
+                    
+                    batch_context = dict(context)
+                    batch_context['node_results'] = dict(results)
+                    batch_context['node_results'][node_id] = split_result
+                    batch_context['batch'] = {'index': index, 'count': len(batches)}
+                    
+                    future = pool.submit(self._execute_batch_in_thread, execution, body, graph, batch_context)
+                    futures[future] = index
+                
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        batch_results[index], batch_success = future.result()
+                    except Exception as e:
+                        logger.error(f"Batch {index} of node {node_id} failed: {str(e)}")
+                        batch_success = False
+                    
+                    if not batch_success:
+                        failed_batches.append(index)
+                        if stop_on_failure:
+                            for pending in futures:
+                                pending.cancel()
+        
+        for body_node_id in body:
+            outputs = [
+                (batch_result or {}).get(body_node_id) for batch_result in batch_results
+            ]
+            results[body_node_id] = {
+                'data': [output.get('data') if output else None for output in outputs],
+                'success': not failed_batches,
+                'message': f"Ran {len(batches)} batches, {len(failed_batches)} failed",
+                'batch_count': len(batches),
+                'failed_batches': sorted(failed_batches)
+            }
+        context['node_results'] = results
+        
+        return body, not failed_batches
+    
+    def _execute_batch_in_thread(
+        self,
+        execution: WorkflowExecution,
+        body: List[str],
+        graph: Dict,
+        context: Dict
+    ) -> Tuple[Dict, bool]:
+        """
+        Run the sub-chain of a split node for one batch on a pool thread
+        
+        Nodes run one at a time in topological order with the same branching
+        and continue_on_error rules as the sequential engine.
+        
+        Args:
+            execution: WorkflowExecution instance
+            body: Sub-chain node IDs in execution order
+            graph: Execution graph
+            context: Batch execution context, its node_results hold the batch
+            
+        Returns:
+            Tuple of (batch node results, whether the batch succeeded)
+        """
+        results = context['node_results']
+        order_index = {node_id: index for index, node_id in enumerate(graph['execution_order'])}
+        nodes_to_skip = set()
         
+        try:
+            for node_id in body:
+                node_def = graph['nodes'][node_id]
+                
+                if node_id in nodes_to_skip:
+                    self._create_node_execution_record(
+                        execution, node_def, {}, {}, order_index[node_id], 'skipped'
+                    )
+                    continue
+                
+                try:
+                    node_input = self._prepare_node_input(
+                        node_id, node_def, graph['incoming'], results, context
+                    )
+                except Exception as e:
+                    logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
+                    self._create_node_execution_record(
+                        execution, node_def, {}, {}, order_index[node_id], 'failed', str(e)
+                    )
+                    if not node_def.get('config', {}).get('continue_on_error', False):
+                        return results, False
+                    continue
+                
+                try:
+                    node_result = self._execute_single_node(
+                        execution, node_def, node_input, context, order_index[node_id], graph
+                    )
+                except Exception as e:
+                    # The failed NodeExecution record is written by _execute_single_node
+                    logger.error(f"Node {node_id} ({node_def.get('name', '')}) execution failed: {str(e)}")
+                    if not node_def.get('config', {}).get('continue_on_error', False):
+                        return results, False
+                    continue
+                
+                if 'fan_out' in node_result:
+                    raise ValueError(f"Node {node_id} cannot split inside the batches of another split node")
+                
+                results[node_id] = node_result
+                
+                if 'branch_condition' in node_result:
+                    self._handle_conditional_branching(
+                        node_id,
+                        node_result,
+                        graph,
+                        nodes_to_skip
+                    )
+            
+            return results, True
+        finally:
+            connections.close_all()
+    
     def _handle_conditional_branching(
         self,
         node_id: str,
@@ -370,6 +992,11 @@ class WorkflowEngine:
             
             node_input['data'] = merged_data
         
+        # Row streams are only passed on lazily to handlers that can consume them
+        handler_class = NODE_HANDLERS.get(node_def['type'])
+        if not getattr(handler_class, 'accepts_streams', False):
+            node_input['data'] = materialize_streams(node_input['data'])
+        
         return node_input
     
     def _execute_single_node(
@@ -378,7 +1005,8 @@ class WorkflowEngine:
         node_def: Dict,
         node_input: Dict,
         context: Dict,
-        execution_order: int
+        execution_order: int,
+        plan: Optional[CompiledWorkflowPlan] = None
     ) -> Dict:
         """
         Execute a single node
@@ -389,75 +1017,184 @@ class WorkflowEngine:
             node_input: Prepared input data
             context: Execution context
             execution_order: Order in execution sequence
+            plan: Compiled plan providing the node's handler and config
             
         Returns:
             Dict containing node execution result
         """
-        node_id = node_def['id']
-        node_type = node_def['type']
-        node_name = node_def.get('name', node_type)
+        node_name = node_def.get('name', node_def['type'])
         
-        logger.info(f"Executing node: {node_name} ({node_id})")
+        logger.info(f"Executing node: {node_name} ({node_def['id']})")
         
         start_time = time.time()
         
         try:
-            # Get node handler
-            handler = get_node_handler(node_type)
-            if not handler:
-                raise ValueError(f"No handler found for node type: {node_type}")
-            
-            # Resolve variables in node configuration
-            node_config = self._resolve_node_config(
-                node_def.get('config', {}),
-                context,
-                node_input
-            )
+            handler, node_config = self._prepare_node_handler(node_def, node_input, context, plan)
+            
+            cache_entry, cached_result = self._lookup_node_cache(node_def, node_config, node_input)
+            if cached_result is not None:
+                return self._complete_node(
+                    execution, node_def, node_input, cached_result, execution_order, start_time, cache_hit=True
+                )
             
             # Execute the node
             result = handler.execute(node_config, node_input, context)
             
-            # Ensure result is a dictionary
-            if not isinstance(result, dict):
-                result = {'data': result}
-            
-            execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-            
-            # Create successful node execution record
-            self._create_node_execution_record(
-                execution,
-                node_def,
-                node_input,
-                result,
-                execution_order,
-                'success',
-                None,
-                execution_time
-            )
+            if cache_entry is not None:
+                node_cache.store(*cache_entry, result)
             
-            logger.info(f"Node {node_name} executed successfully in {execution_time:.2f}ms")
-            return result
+            return self._complete_node(execution, node_def, node_input, result, execution_order, start_time)
             
         except Exception as e:
-            execution_time = (time.time() - start_time) * 1000
-            error_msg = str(e)
-            
-            logger.error(f"Node {node_name} failed: {error_msg}")
-            
-            # Create failed node execution record
-            self._create_node_execution_record(
-                execution,
-                node_def,
-                node_input,
-                {},
-                execution_order,
-                'failed',
-                error_msg,
-                execution_time
-            )
-            
+            self._record_node_failure(execution, node_def, node_input, execution_order, start_time, e)
             raise
     
+    def _lookup_node_cache(
+        self,
+        node_def: Dict,
+        node_config: Dict,
+        node_input: Dict
+    ) -> Tuple[Optional[Tuple[str, Dict]], Optional[Dict]]:
+        """
+        Look up a node's memoized result if its config has a cache block
+        
+        Args:
+            node_def: Node definition
+            node_config: Resolved node configuration
+            node_input: Prepared input data
+            
+        Returns:
+            Tuple of ((cache key, cache options) or None if the node is not
+            cached, cached result or None on a miss)
+        """
+        options = node_cache.cache_options(node_config)
+        if options is None:
+            return None, None
+        
+        key = node_cache.cache_key(node_def, node_config, node_input, options)
+        return (key, options), node_cache.lookup(key, options)
+    
+    def _prepare_node_handler(
+        self,
+        node_def: Dict,
+        node_input: Dict,
+        context: Dict,
+        plan: Optional[CompiledWorkflowPlan] = None
+    ) -> Tuple[Any, Dict]:
+        """
+        Look up the handler for a node and resolve its configuration
+        
+        Args:
+            node_def: Node definition
+            node_input: Prepared input data
+            context: Execution context
+            plan: Compiled plan holding pre-built handlers and configs
+            
+        Returns:
+            Tuple of (handler instance, resolved node configuration)
+        """
+        node_id = node_def['id']
+        node_type = node_def['type']
+        
+        if plan is not None and node_id in plan.handlers:
+            handler = plan.handlers[node_id]
+            compiled_config = plan.configs[node_id]
+        else:
+            handler = get_node_handler(node_type)
+            compiled_config = self.variable_resolver.compile_config(node_def.get('config', {}))
+        
+        if not handler:
+            raise ValueError(f"No handler found for node type: {node_type}")
+        
+        # Resolve variables in node configuration
+        node_config = compiled_config.render(context, node_input)
+        
+        return handler, node_config
+    
+    def _complete_node(
+        self,
+        execution: WorkflowExecution,
+        node_def: Dict,
+        node_input: Dict,
+        result: Any,
+        execution_order: int,
+        start_time: float,
+        cache_hit: bool = False
+    ) -> Dict:
+        """
+        Normalize a handler result and record the successful node execution
+        
+        Args:
+            execution: WorkflowExecution instance
+            node_def: Node definition
+            node_input: Prepared input data
+            result: Value returned by the handler
+            execution_order: Order in execution sequence
+            start_time: time.time() when the node started
+            cache_hit: Whether the result came from the node result cache
+            
+        Returns:
+            Dict containing node execution result
+        """
+        # Ensure result is a dictionary
+        if not isinstance(result, dict):
+            result = {'data': result}
+        
+        execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+        
+        # Create successful node execution record
+        self._create_node_execution_record(
+            execution,
+            node_def,
+            node_input,
+            result,
+            execution_order,
+            'success',
+            None,
+            execution_time,
+            cache_hit
+        )
+        
+        logger.info(f"Node {node_def.get('name', node_def['type'])} executed successfully in {execution_time:.2f}ms{' (cached)' if cache_hit else ''}")
+        return result
+    
+    def _record_node_failure(
+        self,
+        execution: WorkflowExecution,
+        node_def: Dict,
+        node_input: Dict,
+        execution_order: int,
+        start_time: float,
+        error: Exception
+    ):
+        """
+        Record a failed node execution
+        
+        Args:
+            execution: WorkflowExecution instance
+            node_def: Node definition
+            node_input: Prepared input data
+            execution_order: Order in execution sequence
+            start_time: time.time() when the node started
+            error: Exception raised by the node
+        """
+        execution_time = (time.time() - start_time) * 1000
+        error_msg = str(error)
+        
+        logger.error(f"Node {node_def.get('name', node_def['type'])} failed: {error_msg}")
+        
+        # Create failed node execution record
+        self._create_node_execution_record(
+            execution,
+            node_def,
+            node_input,
+            {},
+            execution_order,
+            'failed',
+            error_msg,
+            execution_time
+        )
+    
     def _resolve_node_config(self, config: Dict, context: Dict, node_input: Dict) -> Dict:
         """
         Resolve variables and expressions in node configuration
@@ -470,30 +1207,7 @@ class WorkflowEngine:
         Returns:
             Dict with resolved configuration
         """
-        resolved_config = {}
-        
-        for key, value in config.items():
-            if isinstance(value, str):
-                # Resolve variables and expressions
-                resolved_value = self.variable_resolver.resolve(
-                    value, 
-                    context, 
-                    node_input
-                )
-                resolved_config[key] = resolved_value
-            elif isinstance(value, dict):
-                resolved_config[key] = self._resolve_node_config(value, context, node_input)
-            elif isinstance(value, list):
-                resolved_config[key] = [
-                    self._resolve_node_config(item, context, node_input) if isinstance(item, dict)
-                    else self.variable_resolver.resolve(item, context, node_input) if isinstance(item, str)
-                    else item
-                    for item in value
-                ]
-            else:
-                resolved_config[key] = value
-        
-        return resolved_config
+        return self.variable_resolver.compile_config(config).render(context, node_input)
     
     def _create_node_execution_record(
         self,
@@ -504,10 +1218,11 @@ class WorkflowEngine:
         execution_order: int,
         status: str,
         error_message: Optional[str] = None,
-        duration_ms: Optional[float] = None
+        duration_ms: Optional[float] = None,
+        cache_hit: bool = False
     ):
         """
-        Create a NodeExecution record
+        Create a NodeExecution record, buffered until the next flush checkpoint
         
         Args:
             execution: WorkflowExecution instance
@@ -518,8 +1233,13 @@ class WorkflowEngine:
             status: Execution status
             error_message: Error message if failed
             duration_ms: Execution duration in milliseconds
+            cache_hit: Whether the output came from the node result cache
         """
-        node_execution = NodeExecution.objects.create(
+        # The context carries every upstream result, those are stored on their own records
+        if isinstance(input_data, dict) and 'context' in input_data:
+            input_data = {key: value for key, value in input_data.items() if key != 'context'}
+        
+        node_execution = NodeExecution(
             workflow_execution=execution,
             node_id=node_def['id'],
             node_type=node_def['type'],
@@ -532,10 +1252,32 @@ class WorkflowEngine:
             input_data=self._sanitize_data_for_storage(input_data),
             output_data=self._sanitize_data_for_storage(output_data),
             error_message=error_message or '',
-            node_config=node_def.get('config', {})
+            node_config=node_def.get('config', {}),
+            cache_hit=cache_hit
         )
         
-        return node_execution
+        recorder = self._recorders.get(str(execution.id))
+        if recorder is None:
+            node_execution.save(force_insert=True)
+            return node_execution
+        
+        # A resumed execution skips nodes with a stored success record, write it
+        # at once for nodes that must not run twice
+        handler_class = NODE_HANDLERS.get(node_def['type'])
+        flush = status == 'success' and getattr(handler_class, 'has_side_effects', False)
+        
+        return recorder.add(node_execution, flush=flush)
+    
+    def _flush_node_records(self, execution: WorkflowExecution):
+        """
+        Write the buffered NodeExecution records of an execution and release its recorder
+        
+        Args:
+            execution: WorkflowExecution instance
+        """
+        recorder = self._recorders.pop(str(execution.id), None)
+        if recorder is not None:
+            recorder.flush()
     
     def _sanitize_data_for_storage(self, data: Any) -> Dict:
         """
@@ -545,20 +1287,14 @@ class WorkflowEngine:
             data: Data to sanitize
             
         Returns:
-            Sanitized data safe for storage
+            Serialized data, or a payload store reference for large payloads
         """
         if not isinstance(data, (dict, list)):
             return {'value': str(data)[:1000]}  # Limit string length
         
         try:
-            # Convert to JSON and back to ensure serializability
-            json_str = json.dumps(data, default=str)
-            
-            # Limit size to prevent database issues
-            if len(json_str) > 10000:  # 10KB limit
-                return {'_truncated': True, '_size': len(json_str), 'preview': json_str[:1000]}
-            
-            return json.loads(json_str)
+            # Serialized once, large payloads are moved to the payload store
+            return store_payload(data)
         except:
             return {'_error': 'Could not serialize data', 'type': str(type(data))}
     
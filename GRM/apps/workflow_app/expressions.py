@@ -0,0 +1,296 @@
+"""
+Safe expression compiler for filter and condition expressions
+
+Expressions are parsed once with the ast module, checked against a whitelist
+of node types and turned into nested Python closures. Evaluating a compiled
+expression never calls eval() and only reads names, dict keys and items from
+the data it is given.
+"""
+import ast
+import operator
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+# Functions callable from expressions
+ALLOWED_FUNCTIONS = {
+    'len': len,
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'sum': sum,
+    'round': round,
+}
+
+# JavaScript-style literals accepted in filter expressions
+CONSTANTS = {
+    'true': True,
+    'false': False,
+    'null': None,
+}
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+MAX_EXPRESSION_LENGTH = 2000
+MAX_POWER_EXPONENT = 100
+MAX_SEQUENCE_LENGTH = 100000
+
+# Translate JavaScript logical operators outside of string literals, leaving '!=' untouched
+JS_OPERATOR_PATTERN = re.compile(r'''('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")|&&|\|\||!(?!=)''')
+JS_OPERATORS = {'&&': ' and ', '||': ' or ', '!': ' not '}
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be compiled safely"""
+    pass
+
+def _result_length(op_node: ast.operator, left: Any, right: Any) -> int:
+    """
+    Work out the length of a sequence built by '*' or '+' before building it
+
+    Args:
+        op_node: ast.Mult or ast.Add operator node
+        left: Left operand
+        right: Right operand
+
+    Returns:
+        int: Length of the resulting sequence, 0 for numeric operands
+    """
+    sequences = (str, bytes, list, tuple)
+
+    if isinstance(op_node, ast.Mult):
+        if isinstance(left, sequences) and isinstance(right, int):
+            return len(left) * right
+        if isinstance(right, sequences) and isinstance(left, int):
+            return len(right) * left
+        return 0
+
+    if isinstance(left, sequences) and isinstance(right, sequences):
+        return len(left) + len(right)
+    return 0
+
+def _compile_node(node: ast.AST) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Turn a whitelisted AST node into a closure taking the names mapping
+
+    Args:
+        node: AST node
+
+    Returns:
+        Callable evaluating the node
+    """
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda names: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+
+        def load_name(names):
+            if name in names:
+                return names[name]
+            if name in CONSTANTS:
+                return CONSTANTS[name]
+            if name in ALLOWED_FUNCTIONS:
+                return ALLOWED_FUNCTIONS[name]
+            raise NameError(f"Name '{name}' is not defined")
+        return load_name
+
+    if isinstance(node, ast.Attribute):
+        # Attribute access is only allowed on dicts, item.field reads item['field']
+        target = _compile_node(node.value)
+        attr = node.attr
+
+        def load_attribute(names):
+            value = target(names)
+            if isinstance(value, dict):
+                return value[attr]
+            raise AttributeError(f"Cannot read '{attr}' of {type(value).__name__}")
+        return load_attribute
+
+    if isinstance(node, ast.Subscript):
+        target = _compile_node(node.value)
+        index = _compile_slice(node.slice)
+        return lambda names: target(names)[index(names)]
+
+    if isinstance(node, ast.BoolOp):
+        values = [_compile_node(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def evaluate_and(names):
+                result = True
+                for value in values:
+                    result = value(names)
+                    if not result:
+                        return result
+                return result
+            return evaluate_and
+
+        def evaluate_or(names):
+            result = False
+            for value in values:
+                result = value(names)
+                if result:
+                    return result
+            return result
+        return evaluate_or
+
+    if isinstance(node, ast.UnaryOp):
+        op = UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        operand = _compile_node(node.operand)
+        return lambda names: op(operand(names))
+
+    if isinstance(node, ast.BinOp):
+        op = BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+
+        if isinstance(node.op, ast.Pow):
+            def evaluate_power(names):
+                exponent = right(names)
+                if isinstance(exponent, (int, float)) and abs(exponent) > MAX_POWER_EXPONENT:
+                    raise ValueError(f"Exponent {exponent} is too large")
+                return op(left(names), exponent)
+            return evaluate_power
+
+        if isinstance(node.op, (ast.Mult, ast.Add)):
+            def evaluate_sized(names):
+                left_value = left(names)
+                right_value = right(names)
+                length = _result_length(node.op, left_value, right_value)
+                if length > MAX_SEQUENCE_LENGTH:
+                    raise ValueError(f"Result of {length} items is too large")
+                return op(left_value, right_value)
+            return evaluate_sized
+
+        return lambda names: op(left(names), right(names))
+
+    if isinstance(node, ast.Compare):
+        left = _compile_node(node.left)
+        comparisons = []
+        for op_node, comparator in zip(node.ops, node.comparators):
+            op = COMPARE_OPERATORS.get(type(op_node))
+            if op is None:
+                raise ExpressionError(f"Unsupported comparison: {type(op_node).__name__}")
+            comparisons.append((op, _compile_node(comparator)))
+
+        if len(comparisons) == 1:
+            op, right = comparisons[0]
+            return lambda names: op(left(names), right(names))
+
+        def evaluate_chain(names):
+            current = left(names)
+            for op, right in comparisons:
+                value = right(names)
+                if not op(current, value):
+                    return False
+                current = value
+            return True
+        return evaluate_chain
+
+    if isinstance(node, ast.IfExp):
+        test = _compile_node(node.test)
+        body = _compile_node(node.body)
+        orelse = _compile_node(node.orelse)
+        return lambda names: body(names) if test(names) else orelse(names)
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in ALLOWED_FUNCTIONS:
+            raise ExpressionError("Only the built-in helper functions can be called")
+        if node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise ExpressionError("Function calls only support positional arguments")
+        function = ALLOWED_FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+        return lambda names: function(*[arg(names) for arg in args])
+
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        elements = [_compile_node(element) for element in node.elts]
+        container = {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)]
+        return lambda names: container(element(names) for element in elements)
+
+    if isinstance(node, ast.Dict):
+        if any(key is None for key in node.keys):
+            raise ExpressionError("Dict unpacking is not supported")
+        items = [(_compile_node(key), _compile_node(value)) for key, value in zip(node.keys, node.values)]
+        return lambda names: {key(names): value(names) for key, value in items}
+
+    raise ExpressionError(f"Unsupported expression element: {type(node).__name__}")
+
+def _compile_slice(node: ast.AST) -> Callable[[Dict[str, Any]], Any]:
+    """Compile a subscript index, unwrapping ast.Index on Python 3.8"""
+    if hasattr(ast, 'Index') and isinstance(node, ast.Index):
+        return _compile_node(node.value)
+
+    if isinstance(node, ast.Slice):
+        lower = _compile_node(node.lower) if node.lower else (lambda names: None)
+        upper = _compile_node(node.upper) if node.upper else (lambda names: None)
+        step = _compile_node(node.step) if node.step else (lambda names: None)
+        return lambda names: slice(lower(names), upper(names), step(names))
+
+    return _compile_node(node)
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Compile an expression into a closure, cached per expression string
+
+    Args:
+        expression: Python or JavaScript-like expression, e.g.
+            "item.age >= 18 && item.status == 'active'"
+
+    Returns:
+        Callable taking a dict of names and returning the expression value
+
+    Raises:
+        ExpressionError: If the expression is invalid or uses unsupported syntax
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError("Expression is too long")
+
+    source = JS_OPERATOR_PATTERN.sub(
+        lambda match: match.group(1) or JS_OPERATORS[match.group(0)],
+        expression
+    ).strip()
+
+    try:
+        tree = ast.parse(source, mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}")
+
+    return _compile_node(tree)
@@ -11,6 +11,7 @@ from .action_handlers import EmailSendHandler, SlackNotificationHandler, DelayHa
 from .output_handlers import DatabaseSaveHandler, FileExportHandler, ResponseHandler
 from .command_handlers import CommandExecutionHandler, FileOperationHandler
 from .query_integration_handler import QueryIntegrationHandler
+from .batch_handlers import SplitInBatchesHandler, ForEachHandler, AggregateBatchesHandler
 
 # Registry of all node handlers
 NODE_HANDLERS = {
@@ -34,6 +35,11 @@ NODE_HANDLERS = {
     'condition': ConditionHandler,
     'switch': SwitchHandler,
     
+    # Batch handlers
+    'split_in_batches': SplitInBatchesHandler,
+    'for_each': ForEachHandler,
+    'aggregate_batches': AggregateBatchesHandler,
+    
     # Action handlers
     'email_send': EmailSendHandler,
     'slack_notification': SlackNotificationHandler,
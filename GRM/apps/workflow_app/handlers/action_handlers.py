@@ -2,6 +2,7 @@
 Action node handlers for performing operations
 """
 import smtplib
+import asyncio
 import requests
 import time
 import os
@@ -10,10 +11,14 @@ from email.mime.multipart import MIMEMultipart
 from typing import Dict, Any
 from django.conf import settings
 from .base import BaseNodeHandler
+from .async_http import httpx, async_http_available, async_request
+from .http_client import http_request
 
 class EmailSendHandler(BaseNodeHandler):
     """Handler for sending emails"""
     
+    has_side_effects = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         to_email = config.get('to', '')
         subject = config.get('subject', '')
@@ -61,7 +66,37 @@ class EmailSendHandler(BaseNodeHandler):
 class SlackNotificationHandler(BaseNodeHandler):
     """Handler for sending Slack notifications"""
     
+    has_side_effects = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        webhook_url, payload = self._build_payload(config)
+        
+        try:
+            response = http_request('POST', webhook_url, json=payload, timeout=30)
+            
+            return self._build_result(response.status_code, payload, context)
+                
+        except Exception as e:
+            self.log_execution(f"Slack notification failed: {str(e)}", 'error')
+            raise ValueError(f"Failed to send Slack notification: {str(e)}")
+    
+    async def aexecute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        if not async_http_available():
+            return await super().aexecute(config, input_data, context)
+        
+        webhook_url, payload = self._build_payload(config)
+        
+        try:
+            response = await async_request('POST', webhook_url, json=payload, timeout=30)
+            
+            return self._build_result(response.status_code, payload, context)
+                
+        except Exception as e:
+            self.log_execution(f"Slack notification failed: {str(e)}", 'error')
+            raise ValueError(f"Failed to send Slack notification: {str(e)}")
+    
+    def _build_payload(self, config: Dict[str, Any]):
+        """Validate the configuration and build the Slack webhook payload"""
         webhook_url = config.get('webhook_url', '')
         message = config.get('message', '')
         channel = config.get('channel', '')
@@ -73,42 +108,94 @@ class SlackNotificationHandler(BaseNodeHandler):
         if not message:
             raise ValueError("Message is required")
         
-        try:
-            payload = {
-                'text': message,
-                'username': username
+        payload = {
+            'text': message,
+            'username': username
+        }
+        
+        if channel:
+            payload['channel'] = channel
+        
+        return webhook_url, payload
+    
+    def _build_result(self, status_code: int, payload: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the node result from the Slack API status code"""
+        if status_code == 200:
+            return {
+                'data': {
+                    'message': payload['text'],
+                    'channel': payload.get('channel', ''),
+                    'sent_at': context.get('execution_time', 'now')
+                },
+                'success': True,
+                'message': 'Slack notification sent successfully'
             }
+        else:
+            raise ValueError(f"Slack API returned status {status_code}")
+
+class WebhookSendHandler(BaseNodeHandler):
+    """Handler for sending webhook requests"""
+    
+    has_side_effects = True
+    
+    def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        url, method, headers, payload, timeout = self._build_request(config, input_data)
+        
+        try:
+            self.log_execution(f"Sending {method} webhook to {url}")
             
-            if channel:
-                payload['channel'] = channel
+            response = http_request(
+                method,
+                url,
+                json=payload,
+                headers=headers,
+                timeout=timeout
+            )
             
-            response = requests.post(
-                webhook_url,
+            # Try to parse JSON response
+            try:
+                response_data = response.json()
+            except:
+                response_data = response.text
+            
+            return self._build_result(response.status_code, dict(response.headers), response_data)
+            
+        except requests.exceptions.Timeout:
+            raise ValueError(f"Webhook request timed out after {timeout} seconds")
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"Webhook request failed: {str(e)}")
+    
+    async def aexecute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        if not async_http_available():
+            return await super().aexecute(config, input_data, context)
+        
+        url, method, headers, payload, timeout = self._build_request(config, input_data)
+        
+        try:
+            self.log_execution(f"Sending async {method} webhook to {url}")
+            
+            response = await async_request(
+                method,
+                url,
                 json=payload,
-                timeout=30
+                headers=headers,
+                timeout=timeout
             )
             
-            if response.status_code == 200:
-                return {
-                    'data': {
-                        'message': message,
-                        'channel': channel,
-                        'sent_at': context.get('execution_time', 'now')
-                    },
-                    'success': True,
-                    'message': 'Slack notification sent successfully'
-                }
-            else:
-                raise ValueError(f"Slack API returned status {response.status_code}")
-                
-        except Exception as e:
-            self.log_execution(f"Slack notification failed: {str(e)}", 'error')
-            raise ValueError(f"Failed to send Slack notification: {str(e)}")
-
-class WebhookSendHandler(BaseNodeHandler):
-    """Handler for sending webhook requests"""
+            try:
+                response_data = response.json()
+            except:
+                response_data = response.text
+            
+            return self._build_result(response.status_code, dict(response.headers), response_data)
+            
+        except httpx.TimeoutException:
+            raise ValueError(f"Webhook request timed out after {timeout} seconds")
+        except httpx.HTTPError as e:
+            raise ValueError(f"Webhook request failed: {str(e)}")
     
-    def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_request(self, config: Dict[str, Any], input_data: Dict[str, Any]):
+        """Build URL, method, headers, payload and timeout for the webhook"""
         url = config.get('url', '')
         method = config.get('method', 'POST').upper()
         headers = config.get('headers', {})
@@ -129,47 +216,48 @@ class WebhookSendHandler(BaseNodeHandler):
         if not payload:
             payload = input_data.get('data', {})
         
-        try:
-            self.log_execution(f"Sending {method} webhook to {url}")
-            
-            response = requests.request(
-                method=method,
-                url=url,
-                json=payload,
-                headers=headers,
-                timeout=timeout
-            )
-            
-            # Try to parse JSON response
-            try:
-                response_data = response.json()
-            except:
-                response_data = response.text
-            
-            result = {
-                'data': {
-                    'response': response_data,
-                    'status_code': response.status_code,
-                    'headers': dict(response.headers)
-                },
-                'success': response.status_code < 400,
-                'message': f'Webhook sent with status {response.status_code}'
-            }
-            
-            if not result['success']:
-                self.log_execution(f"Webhook failed with status {response.status_code}", 'warning')
-            
-            return result
-            
-        except requests.exceptions.Timeout:
-            raise ValueError(f"Webhook request timed out after {timeout} seconds")
-        except requests.exceptions.RequestException as e:
-            raise ValueError(f"Webhook request failed: {str(e)}")
+        return url, method, headers, payload, timeout
+    
+    def _build_result(self, status_code: int, headers: Dict[str, Any], response_data: Any) -> Dict[str, Any]:
+        """Build the node result from a completed webhook response"""
+        result = {
+            'data': {
+                'response': response_data,
+                'status_code': status_code,
+                'headers': headers
+            },
+            'success': status_code < 400,
+            'message': f'Webhook sent with status {status_code}'
+        }
+        
+        if not result['success']:
+            self.log_execution(f"Webhook failed with status {status_code}", 'warning')
+        
+        return result
 
 class DelayHandler(BaseNodeHandler):
     """Handler for adding delays in workflow execution"""
     
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        delay_seconds = self._get_delay_seconds(config)
+        
+        self.log_execution(f"Delaying execution for {delay_seconds} seconds")
+        
+        time.sleep(delay_seconds)
+        
+        return self._build_result(delay_seconds, config, input_data)
+    
+    async def aexecute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        delay_seconds = self._get_delay_seconds(config)
+        
+        self.log_execution(f"Delaying execution for {delay_seconds} seconds (non-blocking)")
+        
+        await asyncio.sleep(delay_seconds)
+        
+        return self._build_result(delay_seconds, config, input_data)
+    
+    def _get_delay_seconds(self, config: Dict[str, Any]) -> float:
+        """Work out how long to wait from the delay configuration"""
         delay_seconds = config.get('delay_seconds', 1)
         delay_type = config.get('delay_type', 'fixed')
         
@@ -184,15 +272,14 @@ class DelayHandler(BaseNodeHandler):
             max_delay = config.get('max_delay', 5)
             delay_seconds = random.uniform(float(min_delay), float(max_delay))
         
-        self.log_execution(f"Delaying execution for {delay_seconds} seconds")
-        
-        import time
-        time.sleep(delay_seconds)
-        
+        return delay_seconds
+    
+    def _build_result(self, delay_seconds: float, config: Dict[str, Any], input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the node result once the delay has elapsed"""
         return {
             'data': {
                 'delayed_seconds': delay_seconds,
-                'delay_type': delay_type,
+                'delay_type': config.get('delay_type', 'fixed'),
                 'input_data': input_data.get('data', {})
             },
             'success': True,
@@ -202,6 +289,8 @@ class DelayHandler(BaseNodeHandler):
 class FileWriteHandler(BaseNodeHandler):
     """Handler for writing data to files"""
     
+    has_side_effects = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         file_path = config.get('file_path', '')
         content = config.get('content', '')
@@ -0,0 +1,85 @@
+"""
+Async HTTP helpers shared by the outbound request handlers
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .http_client import http_settings
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Client of the executions running in the current asyncio task, see shared_async_client()
+_async_client = ContextVar('workflow_async_http_client', default=None)
+
+def async_http_available() -> bool:
+    """
+    Check whether the optional httpx dependency is installed
+    
+    Returns:
+        True if async HTTP requests can be made
+    """
+    return httpx is not None
+
+def build_async_client():
+    """
+    Create an AsyncClient with the pool sizes of the shared sync session
+    
+    httpx only retries failed connection attempts, which is safe for every
+    method since nothing was sent yet.
+    
+    Returns:
+        httpx.AsyncClient
+    """
+    options = http_settings()
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=options['pool_connections'] * options['pool_maxsize'],
+            max_keepalive_connections=options['pool_maxsize']
+        ),
+        transport=httpx.AsyncHTTPTransport(retries=options['retries'])
+    )
+
+@contextmanager
+def shared_async_client(client):
+    """
+    Make async_request() use a client within the current asyncio task
+    
+    Tasks started inside the block inherit the client. The execution
+    context is not used for this, it is serialized into node records.
+    
+    Args:
+        client: httpx.AsyncClient, None keeps the client already in use
+    """
+    if client is None:
+        yield
+        return
+    token = _async_client.set(client)
+    try:
+        yield
+    finally:
+        _async_client.reset(token)
+
+async def async_request(method: str, url: str, **kwargs):
+    """
+    Send an HTTP request without blocking the event loop
+    
+    Uses the client AsyncWorkflowEngine shares across the nodes of its
+    executions (see shared_async_client) so connections are reused, and
+    falls back to a short-lived client otherwise.
+    
+    Args:
+        method: HTTP method
+        url: Request URL
+        **kwargs: Extra arguments for httpx.AsyncClient.request
+        
+    Returns:
+        httpx.Response
+    """
+    client = _async_client.get()
+    if client is not None:
+        return await client.request(method, url, **kwargs)
+    
+    async with build_async_client() as client:
+        return await client.request(method, url, **kwargs)
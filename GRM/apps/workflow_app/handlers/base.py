@@ -4,6 +4,7 @@ Base node handler class
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 import logging
+from asgiref.sync import sync_to_async
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +13,17 @@ class BaseNodeHandler(ABC):
     Base class for all node handlers
     """
     
+    # Handlers that can consume a lazy RowStream as input data set this to True,
+    # every other handler receives streams as materialized lists
+    accepts_streams = False
+    
+    # aggregate_batches nodes set this to True to end the sub-chain a split node runs per batch
+    closes_fan_out = False
+    
+    # Handlers that change something outside the workflow (mail, webhooks, writes) set
+    # this to True, their execution records are written at once so a resume never repeats them
+    has_side_effects = False
+    
     def __init__(self):
         self.logger = logger
     
@@ -30,6 +42,24 @@ class BaseNodeHandler(ABC):
         """
         pass
     
+    async def aexecute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of execute, used by AsyncWorkflowEngine
+        
+        Handlers doing network I/O override this with a non-blocking
+        implementation. The default runs execute() on a worker thread so
+        synchronous handlers never block the event loop.
+        
+        Args:
+            config: Node configuration (resolved variables)
+            input_data: Input data from previous nodes
+            context: Execution context
+            
+        Returns:
+            Dict containing execution result
+        """
+        return await sync_to_async(self.execute, thread_sensitive=False)(config, input_data, context)
+    
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """
         Validate node configuration
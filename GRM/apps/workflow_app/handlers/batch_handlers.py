@@ -0,0 +1,117 @@
+"""
+Batch node handlers that fan a list out over a sub-chain and gather the results
+"""
+from typing import Dict, Any, List
+from django.conf import settings
+from .base import BaseNodeHandler
+
+class SplitInBatchesHandler(BaseNodeHandler):
+    """
+    Handler for split_in_batches nodes
+    
+    Slices the incoming data list into batches. The engine then runs the
+    nodes downstream of this node, up to the next aggregate_batches node,
+    once per batch (see WorkflowEngine._run_fan_out), at most `concurrency`
+    batches at a time.
+    """
+    
+    # for_each passes single items instead of lists to the sub-chain
+    single_items = False
+    
+    def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        items = self._get_items(config, input_data)
+        
+        batch_size = 1 if self.single_items else int(config.get('batch_size') or 10)
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        
+        default_concurrency = getattr(settings, 'WORKFLOW_FAN_OUT_CONCURRENCY', 4)
+        max_concurrency = getattr(settings, 'WORKFLOW_FAN_OUT_MAX_CONCURRENCY', 32)
+        concurrency = min(max(1, int(config.get('concurrency') or default_concurrency)), max_concurrency)
+        
+        batch_count = (len(items) + batch_size - 1) // batch_size
+        
+        self.log_execution(f"Split {len(items)} items into {batch_count} batches")
+        
+        return {
+            'data': items,
+            'success': True,
+            'message': f"Split {len(items)} items into {batch_count} batches",
+            'item_count': len(items),
+            'batch_count': batch_count,
+            # Used by execution engine to run the downstream nodes per batch
+            'fan_out': {
+                'batch_size': batch_size,
+                'single_items': self.single_items,
+                'concurrency': concurrency
+            }
+        }
+    
+    def _get_items(self, config: Dict[str, Any], input_data: Dict[str, Any]) -> List[Any]:
+        """
+        Get the list to split from the input data
+        
+        Args:
+            config: Node configuration, items_field names a nested list
+            input_data: Input data from previous nodes
+        
+        Returns:
+            List of items
+        """
+        data = input_data.get('data', [])
+        items_field = config.get('items_field', '')
+        
+        if items_field:
+            for part in items_field.split('.'):
+                data = data.get(part) if isinstance(data, dict) else None
+        
+        if data is None:
+            return []
+        if isinstance(data, dict):
+            return [data]
+        if not isinstance(data, list):
+            raise ValueError("Input data must be a list of items")
+        return data
+
+class ForEachHandler(SplitInBatchesHandler):
+    """Handler for for_each nodes, which run the sub-chain once per item"""
+    
+    single_items = True
+
+class AggregateBatchesHandler(BaseNodeHandler):
+    """
+    Handler for aggregate_batches nodes that close a split_in_batches sub-chain
+    
+    The engine hands every node of the sub-chain a list with its output
+    per batch. mode 'flatten' concatenates list outputs into one list,
+    'batches' keeps one entry per batch.
+    """
+    
+    closes_fan_out = True
+    
+    def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        mode = config.get('mode', 'flatten')
+        data = input_data.get('data', [])
+        
+        if not isinstance(data, list):
+            data = [data]
+        
+        if mode == 'flatten':
+            items = []
+            for batch_data in data:
+                if batch_data is None:
+                    continue
+                if isinstance(batch_data, list):
+                    items.extend(batch_data)
+                else:
+                    items.append(batch_data)
+            data = items
+        elif mode != 'batches':
+            raise ValueError(f"Unsupported aggregate mode: {mode}")
+        
+        return {
+            'data': data,
+            'success': True,
+            'message': f"Aggregated {len(data)} results",
+            'count': len(data)
+        }
@@ -0,0 +1,328 @@
+"""
+Columnar aggregation helpers for DataTransformHandler
+
+Rows are turned into one Python list per referenced field in a single pass,
+then aggregated with NumPy when it is installed. The pure-Python helpers at
+the bottom implement the same statistics for the non-columnar path.
+"""
+import math
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Aggregations that only look at non-null values
+STATISTIC_AGGREGATIONS = ('min', 'max', 'percentile', 'stddev', 'distinct_count')
+
+def numpy_available() -> bool:
+    """Check whether the columnar mode can be used"""
+    return np is not None
+
+def extract_column(rows: List[Any], path: str) -> List[Any]:
+    """
+    Read one dot-notation field of every row
+
+    Args:
+        rows: List of row dicts
+        path: Dot-separated field path, empty for the row itself
+
+    Returns:
+        List of field values, None where the field is missing
+    """
+    if not path:
+        return list(rows)
+
+    parts = path.split('.')
+    if len(parts) == 1:
+        return [row.get(path) if isinstance(row, dict) else None for row in rows]
+
+    column = []
+    for row in rows:
+        current = row
+        for part in parts:
+            if isinstance(current, dict) and part in current:
+                current = current[part]
+            elif isinstance(current, list) and part.isdigit() and int(part) < len(current):
+                current = current[int(part)]
+            else:
+                current = None
+                break
+        column.append(current)
+    return column
+
+def group_keys(column: List[Any]) -> Tuple[List[str], List[int]]:
+    """
+    Factorize group values in order of first appearance
+
+    Args:
+        column: Raw group-by values
+
+    Returns:
+        Tuple of (group keys, group code of every row)
+    """
+    key_codes: Dict[str, int] = {}
+    codes = []
+    for value in column:
+        key = str(value) if value is not None else 'null'
+        code = key_codes.get(key)
+        if code is None:
+            code = key_codes[key] = len(key_codes)
+        codes.append(code)
+    return list(key_codes), codes
+
+def _hashable(value: Any) -> Hashable:
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+def _numeric_array(values: List[Any]) -> Optional['np.ndarray']:
+    """Convert values to a float array, None if any value is not numeric"""
+    try:
+        return np.array([float(value) for value in values], dtype=float)
+    except (TypeError, ValueError):
+        return None
+
+def columnar_aggregate(rows: List[Any], agg_type: str, agg_field: str, percentile_rank: float = 50) -> Any:
+    """
+    Aggregate one column of the rows with NumPy
+
+    Args:
+        rows: List of row dicts
+        agg_type: count, sum, avg, min, max, percentile, stddev or distinct_count
+        agg_field: Field to aggregate
+        percentile_rank: Rank used by the percentile aggregation (0-100)
+
+    Returns:
+        Aggregated value as a plain Python object
+    """
+    if agg_type == 'count' or not agg_field:
+        return len(rows)
+
+    column = extract_column(rows, agg_field)
+
+    if agg_type in ('sum', 'avg'):
+        values = np.array([float(value or 0) for value in column], dtype=float)
+        if agg_type == 'sum':
+            return float(values.sum())
+        return float(values.mean()) if len(values) else 0
+
+    present = [value for value in column if value is not None]
+
+    if agg_type == 'distinct_count':
+        return len({_hashable(value) for value in present})
+
+    if agg_type in ('min', 'max'):
+        if not present:
+            return None
+        values = _numeric_array(present)
+        if values is None:
+            return min(present) if agg_type == 'min' else max(present)
+        # Return the original value rather than its float copy
+        index = int(values.argmin() if agg_type == 'min' else values.argmax())
+        return present[index]
+
+    if agg_type in ('percentile', 'stddev'):
+        if not present:
+            return None
+        values = np.array([float(value) for value in present], dtype=float)
+        if agg_type == 'percentile':
+            return float(np.percentile(values, percentile_rank))
+        return float(values.std())
+
+    return len(rows)
+
+def columnar_group_aggregate(
+    rows: List[Any],
+    group_by: str,
+    agg_type: str,
+    agg_field: str,
+    percentile_rank: float = 50
+) -> Dict[str, Any]:
+    """
+    Group rows and aggregate every group with vectorized NumPy operations
+
+    Args:
+        rows: List of row dicts
+        group_by: Field to group by
+        agg_type: count, sum, avg, min, max, percentile, stddev or distinct_count
+        agg_field: Field to aggregate
+        percentile_rank: Rank used by the percentile aggregation (0-100)
+
+    Returns:
+        Dict mapping group key to aggregated value, in order of first appearance
+    """
+    keys, codes = group_keys(extract_column(rows, group_by))
+    codes = np.array(codes, dtype=np.int64)
+    group_count = len(keys)
+
+    if agg_type not in ('sum', 'avg') + STATISTIC_AGGREGATIONS or not agg_field:
+        counts = np.bincount(codes, minlength=group_count)
+        return dict(zip(keys, counts.tolist()))
+
+    column = extract_column(rows, agg_field)
+
+    if agg_type in ('sum', 'avg'):
+        values = np.array([float(value or 0) for value in column], dtype=float)
+        sums = np.bincount(codes, weights=values, minlength=group_count)
+        if agg_type == 'sum':
+            return dict(zip(keys, sums.tolist()))
+        counts = np.bincount(codes, minlength=group_count)
+        return dict(zip(keys, (sums / counts).tolist()))
+
+    # Statistics ignore null values, groups without values get None
+    mask = [value is not None for value in column]
+    present = [value for value, keep in zip(column, mask) if keep]
+    present_codes = codes[np.array(mask, dtype=bool)] if len(mask) else codes
+    counts = np.bincount(present_codes, minlength=group_count)
+    result = dict.fromkeys(keys)
+
+    if agg_type == 'distinct_count':
+        value_codes: Dict[Hashable, int] = {}
+        encoded = np.array(
+            [value_codes.setdefault(_hashable(value), len(value_codes)) for value in present],
+            dtype=np.int64
+        )
+        if not len(encoded):
+            return dict.fromkeys(keys, 0)
+        pairs = np.unique(present_codes * len(value_codes) + encoded)
+        distinct = np.bincount(pairs // len(value_codes), minlength=group_count)
+        return dict(zip(keys, distinct.tolist()))
+
+    values = _numeric_array(present) if present else np.array([], dtype=float)
+    if values is None:
+        if agg_type in ('min', 'max'):
+            # Non-numeric values (strings, dates) are compared in Python
+            return python_group_aggregate(keys, codes.tolist(), column, agg_type, percentile_rank)
+        raise ValueError(f"Field '{agg_field}' must be numeric for {agg_type}")
+
+    # Sort by group, then by value, so every group is a contiguous sorted slice
+    order = np.lexsort((values, present_codes))
+    sorted_values = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])) if group_count else np.array([], dtype=np.int64)
+    has_values = counts > 0
+
+    if agg_type in ('min', 'max'):
+        positions = starts if agg_type == 'min' else starts + counts - 1
+        for group, position in zip(np.nonzero(has_values)[0].tolist(), positions[has_values].tolist()):
+            result[keys[group]] = present[int(order[position])]
+        return result
+
+    if agg_type == 'percentile':
+        rank = (counts - 1) * (float(percentile_rank) / 100.0)
+        lower = np.floor(rank).astype(np.int64)
+        upper = np.ceil(rank).astype(np.int64)
+        fraction = rank - lower
+        valid_starts = starts[has_values]
+        low_values = sorted_values[valid_starts + lower[has_values]]
+        high_values = sorted_values[valid_starts + upper[has_values]]
+        percentiles = low_values + (high_values - low_values) * fraction[has_values]
+        for group, value in zip(np.nonzero(has_values)[0].tolist(), percentiles.tolist()):
+            result[keys[group]] = value
+        return result
+
+    # Population standard deviation, two passes for numerical stability
+    sums = np.bincount(present_codes, weights=values, minlength=group_count)
+    means = np.divide(sums, counts, out=np.zeros(group_count), where=has_values)
+    deviations = values - means[present_codes]
+    variances = np.divide(
+        np.bincount(present_codes, weights=deviations * deviations, minlength=group_count),
+        counts,
+        out=np.zeros(group_count),
+        where=has_values
+    )
+    for group, value in zip(np.nonzero(has_values)[0].tolist(), np.sqrt(variances)[has_values].tolist()):
+        result[keys[group]] = value
+    return result
+
+def percentile(values: List[float], percentile_rank: float) -> Optional[float]:
+    """
+    Percentile with linear interpolation, same as numpy.percentile's default
+
+    Args:
+        values: Numeric values
+        percentile_rank: Rank between 0 and 100
+
+    Returns:
+        Percentile value or None for no values
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * (float(percentile_rank) / 100.0)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+def stddev(values: List[float]) -> Optional[float]:
+    """
+    Population standard deviation
+
+    Args:
+        values: Numeric values
+
+    Returns:
+        Standard deviation or None for no values
+    """
+    if not values:
+        return None
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+
+def python_statistic(values: List[Any], agg_type: str, percentile_rank: float = 50) -> Any:
+    """
+    Compute min, max, percentile, stddev or distinct_count over non-null values
+
+    Args:
+        values: Raw column values
+        agg_type: Statistic to compute
+        percentile_rank: Rank used by the percentile aggregation (0-100)
+
+    Returns:
+        Statistic value, None if there are no values
+    """
+    present = [value for value in values if value is not None]
+
+    if agg_type == 'distinct_count':
+        return len({_hashable(value) for value in present})
+    if not present:
+        return None
+    if agg_type == 'min':
+        return min(present)
+    if agg_type == 'max':
+        return max(present)
+    if agg_type == 'percentile':
+        return percentile([float(value) for value in present], percentile_rank)
+    return stddev([float(value) for value in present])
+
+def python_group_aggregate(
+    keys: List[str],
+    codes: List[int],
+    column: List[Any],
+    agg_type: str,
+    percentile_rank: float = 50
+) -> Dict[str, Any]:
+    """
+    Apply a statistic per group without NumPy
+
+    Args:
+        keys: Group keys
+        codes: Group code of every row
+        column: Values of the aggregated field
+        agg_type: Statistic to compute
+        percentile_rank: Rank used by the percentile aggregation (0-100)
+
+    Returns:
+        Dict mapping group key to statistic value
+    """
+    grouped: List[List[Any]] = [[] for _ in keys]
+    for code, value in zip(codes, column):
+        grouped[code].append(value)
+
+    return {
+        key: python_statistic(values, agg_type, percentile_rank)
+        for key, values in zip(keys, grouped)
+    }
@@ -10,6 +10,8 @@ from .base import BaseNodeHandler
 class CommandExecutionHandler(BaseNodeHandler):
     """Handler for executing system commands"""
     
+    has_side_effects = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         command = config.get('command', '')
         working_directory = config.get('working_directory', '/tmp')
@@ -68,6 +70,8 @@ class CommandExecutionHandler(BaseNodeHandler):
 class FileOperationHandler(BaseNodeHandler):
     """Handler for file operations"""
     
+    has_side_effects = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         operation = config.get('operation', 'read')
         file_path = config.get('file_path', '')
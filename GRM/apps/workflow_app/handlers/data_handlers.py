@@ -4,14 +4,23 @@ Data source node handlers with GRM database integration
 import json
 import requests
 import re
-from typing import Dict, Any
-from django.db import connection
+from typing import Dict, Any, List
+from django.conf import settings
+from django.db import connections
 from .base import BaseNodeHandler
+from .async_http import httpx, async_http_available, async_request
+from .http_client import http_request
+from ..streaming import fetch_rows
+from ..db_routing import read_alias, write_alias
+from ..bulk_write import bulk_write
 from django.apps import apps
 
 class DatabaseQueryHandler(BaseNodeHandler):
     """Handler for database query nodes with GRM models integration"""
     
+    # INSERT, UPDATE and DELETE queries write to the database
+    has_side_effects = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         query_type = config.get('query_type', 'SELECT').upper()
         table_name = config.get('table_name', '')
@@ -24,6 +33,7 @@ class DatabaseQueryHandler(BaseNodeHandler):
         
         # Apply data mappings from previous nodes
         mapped_data = self._apply_data_mappings(config, input_data)
+        rows = None
         
         # Build query based on type
         if query_type == 'SELECT':
@@ -43,16 +53,10 @@ class DatabaseQueryHandler(BaseNodeHandler):
                 raise ValueError("No data provided for INSERT operation")
             
             if isinstance(data, list):
-                # Bulk insert
-                if not data:
-                    return {'data': {'affected_rows': 0}, 'success': True, 'message': 'No data to insert'}
-                
-                columns = list(data[0].keys())
-                placeholders = ', '.join(['%s'] * len(columns))
-                columns_str = ', '.join(columns)
-                
-                query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-                params = [[item.get(col) for col in columns] for item in data]
+                # Bulk insert, bulk_write builds the multi-row statements per chunk
+                query = None
+                params = []
+                rows = data
             else:
                 # Single insert
                 columns = list(data.keys())
@@ -83,8 +87,23 @@ class DatabaseQueryHandler(BaseNodeHandler):
         else:
             raise ValueError(f"Unsupported query type: {query_type}")
         
+        # SELECTs may go to the read replica, everything else to the primary
+        alias = read_alias(config) if query_type == 'SELECT' else write_alias(config)
+        
         try:
-            with connection.cursor() as cursor:
+            if query_type == 'SELECT' and config.get('stream', False):
+                # Rows are read lazily in chunks by whichever node consumes them
+                return {
+                    'data': fetch_rows(query, params, stream=True, using=alias, chunk_size=config.get('chunk_size')),
+                    'count': None,
+                    'streaming': True,
+                    'query_executed': query,
+                    'table_name': table_name,
+                    'success': True,
+                    'message': "Streaming records"
+                }
+            
+            with connections[alias].cursor() as cursor:
                 if query_type == 'SELECT':
                     cursor.execute(query, params)
                     columns = [col[0] for col in cursor.description]
@@ -98,15 +117,15 @@ class DatabaseQueryHandler(BaseNodeHandler):
                         'success': True,
                         'message': f"Retrieved {len(results)} records"
                     }
-                elif query_type == 'INSERT' and isinstance(input_data.get('data'), list):
-                    cursor.executemany(query, params)
-                    affected_rows = cursor.rowcount
+                elif rows is not None:
+                    stats = bulk_write(table_name, rows, using=alias, chunk_size=config.get('chunk_size'))
                     
                     return {
-                        'data': {'affected_rows': affected_rows},
-                        'query_executed': query,
+                        'data': {'affected_rows': stats['affected_rows'], 'rows': stats['rows']},
+                        'table_name': table_name,
+                        'statements': stats['statements'],
                         'success': True,
-                        'message': f"Inserted {affected_rows} rows"
+                        'message': f"Inserted {stats['rows']} rows with {stats['statements']} statements"
                     }
                 else:
                     cursor.execute(query, params)
@@ -211,7 +230,73 @@ class DatabaseQueryHandler(BaseNodeHandler):
 class HttpRequestHandler(BaseNodeHandler):
     """Handler for HTTP request nodes"""
     
+    # POST, PUT and DELETE requests change the remote side
+    has_side_effects = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        request = self._build_request(config, input_data, context)
+        method, url, timeout = request['method'], request['url'], request['timeout']
+        request_body = request['body']
+        
+        try:
+            self.log_execution(f"Making {method} request to {url}")
+            
+            response = http_request(
+                method,
+                url,
+                headers=request['headers'],
+                json=request_body if isinstance(request_body, (dict, list)) else None,
+                data=request_body if isinstance(request_body, str) else None,
+                timeout=timeout
+            )
+            
+            # Try to parse JSON response
+            try:
+                response_data = response.json()
+            except:
+                response_data = response.text
+            
+            return self._build_result(method, url, response.status_code, dict(response.headers), response_data)
+            
+        except requests.exceptions.Timeout:
+            raise ValueError(f"HTTP request timed out after {timeout} seconds")
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"HTTP request failed: {str(e)}")
+    
+    async def aexecute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        if not async_http_available():
+            return await super().aexecute(config, input_data, context)
+        
+        request = self._build_request(config, input_data, context)
+        method, url, timeout = request['method'], request['url'], request['timeout']
+        request_body = request['body']
+        
+        try:
+            self.log_execution(f"Making async {method} request to {url}")
+            
+            response = await async_request(
+                method,
+                url,
+                headers=request['headers'],
+                json=request_body if isinstance(request_body, (dict, list)) else None,
+                content=request_body if isinstance(request_body, str) else None,
+                timeout=timeout
+            )
+            
+            try:
+                response_data = response.json()
+            except:
+                response_data = response.text
+            
+            return self._build_result(method, url, response.status_code, dict(response.headers), response_data)
+            
+        except httpx.TimeoutException:
+            raise ValueError(f"HTTP request timed out after {timeout} seconds")
+        except httpx.HTTPError as e:
+            raise ValueError(f"HTTP request failed: {str(e)}")
+    
+    def _build_request(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Build method, URL, headers and body for the request"""
         method = config.get('method', 'GET').upper()
         url = self._resolve_variables(config.get('url', ''), input_data, context)
         headers = config.get('headers', {})
@@ -246,43 +331,30 @@ class HttpRequestHandler(BaseNodeHandler):
             # Use mapped data or input data as body
             request_body = mapped_data if mapped_data else input_data.get('data', {})
         
-        try:
-            self.log_execution(f"Making {method} request to {url}")
-            
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=request_body if isinstance(request_body, (dict, list)) else None,
-                data=request_body if isinstance(request_body, str) else None,
-                timeout=timeout
-            )
-            
-            # Try to parse JSON response
-            try:
-                response_data = response.json()
-            except:
-                response_data = response.text
-            
-            result = {
-                'data': response_data,
-                'status_code': response.status_code,
-                'headers': dict(response.headers),
-                'url': url,
-                'method': method,
-                'success': response.status_code < 400,
-                'message': f"HTTP {method} request completed with status {response.status_code}"
-            }
-            
-            if not result['success']:
-                self.log_execution(f"HTTP request failed with status {response.status_code}", 'warning')
-            
-            return result
-            
-        except requests.exceptions.Timeout:
-            raise ValueError(f"HTTP request timed out after {timeout} seconds")
-        except requests.exceptions.RequestException as e:
-            raise ValueError(f"HTTP request failed: {str(e)}")
+        return {
+            'method': method,
+            'url': url,
+            'headers': headers,
+            'body': request_body,
+            'timeout': timeout
+        }
+    
+    def _build_result(self, method: str, url: str, status_code: int, headers: Dict[str, Any], response_data: Any) -> Dict[str, Any]:
+        """Build the node result from a completed response"""
+        result = {
+            'data': response_data,
+            'status_code': status_code,
+            'headers': headers,
+            'url': url,
+            'method': method,
+            'success': status_code < 400,
+            'message': f"HTTP {method} request completed with status {status_code}"
+        }
+        
+        if not result['success']:
+            self.log_execution(f"HTTP request failed with status {status_code}", 'warning')
+        
+        return result
     
     def _resolve_variables(self, text: str, input_data: Dict[str, Any], context: Dict[str, Any]) -> str:
         """Resolve variables in text"""
@@ -351,6 +423,8 @@ class GRMDataHandler(BaseNodeHandler):
             return self._update_pnr_status(config, input_data)
         elif operation == 'check_payment_percentage':
             return self._check_payment_percentage(config, input_data)
+        elif operation == 'check_payment_percentage_batch':
+            return self._check_payment_percentage_batch(config, input_data)
         else:
             raise ValueError(f"Unsupported GRM operation: {operation}")
     
@@ -367,7 +441,7 @@ class GRMDataHandler(BaseNodeHandler):
         payment_in_percent = 'Y'  # Default value
         
         try:
-            with connection.cursor() as cursor:
+            with connections[read_alias(config)].cursor() as cursor:
                 # If transaction_master_id and series_group_id are not provided, get them from PNR
                 if not transaction_master_id or not series_group_id:
                     # Get request_approved_flight_id from PNR
@@ -443,6 +517,157 @@ class GRMDataHandler(BaseNodeHandler):
         except Exception as e:
             raise ValueError(f"Failed to check payment percentage: {str(e)}")
     
+    def _check_payment_percentage_batch(self, config: Dict[str, Any], input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Check payment type in percentage for many PNRs at once
+        
+        Same rules as _check_payment_percentage, resolved with one set of
+        IN (...) queries per chunk instead of up to three queries per PNR.
+        The PNRs come from the upstream node: a list of PNR strings or rows
+        (with pnr and optionally transaction_master_id, series_group_id,
+        pnr_blocking_id), either as the data itself or under the key named
+        by the pnrs_field option (default 'pnrs').
+        
+        Returns:
+            Result with data.results mapping each PNR to its check result
+        """
+        items = self._collect_payment_check_items(config, input_data)
+        if not items:
+            raise ValueError("At least one PNR is required")
+        
+        chunk_size = int(config.get('chunk_size') or getattr(settings, 'WORKFLOW_BATCH_IN_CHUNK_SIZE', 500))
+        
+        try:
+            with connections[read_alias(config)].cursor() as cursor:
+                # PNRs without transaction and series group are looked up through their blocking
+                lookup_pnrs = [pnr for pnr, item in items.items() if not item['transaction_master_id'] or not item['series_group_id']]
+                
+                # The database may compare PNRs case-insensitively and ignore
+                # trailing spaces, rows are mapped back to the PNRs as given
+                input_pnrs = {}
+                for pnr in lookup_pnrs:
+                    input_pnrs.setdefault(self._pnr_key(pnr), []).append(pnr)
+                
+                flight_ids = {}
+                for chunk in self._chunks(lookup_pnrs, chunk_size):
+                    cursor.execute(f"""
+                        SELECT pnr, request_approved_flight_id
+                        FROM pnr_blocking_details
+                        WHERE pnr IN ({', '.join(['%s'] * len(chunk))})
+                        ORDER BY pnr_blocking_id
+                    """, chunk)
+                    for pnr, request_approved_flight_id in cursor.fetchall():
+                        for input_pnr in input_pnrs.get(self._pnr_key(pnr), []):
+                            flight_ids.setdefault(input_pnr, request_approved_flight_id)
+                
+                transactions = {}
+                for chunk in self._chunks(sorted(set(flight_ids.values())), chunk_size):
+                    cursor.execute(f"""
+                        SELECT rafd.request_approved_flight_id, rafd.transaction_master_id, srd.series_group_id
+                        FROM request_approved_flight_details rafd
+                        JOIN series_request_details srd ON rafd.series_request_id = srd.series_request_id
+                        WHERE rafd.request_approved_flight_id IN ({', '.join(['%s'] * len(chunk))})
+                        ORDER BY rafd.transaction_master_id DESC
+                    """, chunk)
+                    for request_approved_flight_id, transaction_master_id, series_group_id in cursor.fetchall():
+                        transactions.setdefault(request_approved_flight_id, (transaction_master_id, series_group_id))
+                
+                for pnr, request_approved_flight_id in flight_ids.items():
+                    if request_approved_flight_id in transactions:
+                        items[pnr]['transaction_master_id'], items[pnr]['series_group_id'] = transactions[request_approved_flight_id]
+                
+                # Payment timelines of all transactions, matched per PNR below
+                transaction_ids = sorted({
+                    item['transaction_master_id'] for item in items.values()
+                    if item['transaction_master_id'] and item['series_group_id']
+                })
+                
+                timelines = {}
+                for chunk in self._chunks(transaction_ids, chunk_size):
+                    cursor.execute(f"""
+                        SELECT transaction_id, pnr_blocking_id, series_group_id, percentage_value, absolute_amount
+                        FROM request_timeline_details
+                        WHERE transaction_id IN ({', '.join(['%s'] * len(chunk))})
+                        AND timeline_type = 'PAYMENT' 
+                        AND status != 'TIMELINEEXTEND'
+                        ORDER BY transaction_id ASC, request_timeline_id ASC
+                    """, chunk)
+                    for row in cursor.fetchall():
+                        timelines.setdefault(row[0], []).append(row)
+                
+                results = {}
+                for pnr, item in items.items():
+                    payment_in_percent = 'Y'  # Default value
+                    
+                    if item['transaction_master_id'] and item['series_group_id']:
+                        if item['pnr_blocking_id']:
+                            column, value = 1, item['pnr_blocking_id']
+                        else:
+                            column, value = 2, item['series_group_id']
+                        
+                        timeline_result = next(
+                            (row for row in timelines.get(item['transaction_master_id'], []) if str(row[column]) == str(value)),
+                            None
+                        )
+                        if timeline_result:
+                            percentage_value = timeline_result[3] or 0
+                            absolute_amount = timeline_result[4] or 0
+                            
+                            if percentage_value > 0 and absolute_amount == 0:
+                                payment_in_percent = 'Y'
+                            elif absolute_amount != 0:
+                                payment_in_percent = 'N'
+                    
+                    results[pnr] = {
+                        'pnr': pnr,
+                        'payment_in_percent': payment_in_percent,
+                        'transaction_master_id': item['transaction_master_id'],
+                        'series_group_id': item['series_group_id']
+                    }
+                
+                return {
+                    'data': {
+                        'results': results,
+                        'count': len(results)
+                    },
+                    'success': True,
+                    'message': f"Payment type check completed for {len(results)} PNRs"
+                }
+                
+        except Exception as e:
+            raise ValueError(f"Failed to check payment percentage: {str(e)}")
+    
+    def _collect_payment_check_items(self, config: Dict[str, Any], input_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """PNRs of a batch check with the same defaults as the single-PNR path, keyed by PNR"""
+        data = input_data.get('data', {})
+        if isinstance(data, dict):
+            data = data.get(config.get('pnrs_field', 'pnrs'), [])
+        if isinstance(data, str):
+            data = [pnr.strip() for pnr in data.split(',')]
+        
+        items = {}
+        for entry in data or []:
+            if not isinstance(entry, dict):
+                entry = {'pnr': entry}
+            pnr = entry.get('pnr', '')
+            if not pnr:
+                continue
+            items[pnr] = {
+                'transaction_master_id': entry.get('transaction_master_id', 0),
+                'series_group_id': entry.get('series_group_id', 1),
+                'pnr_blocking_id': entry.get('pnr_blocking_id', '')
+            }
+        return items
+    
+    def _pnr_key(self, pnr: Any) -> str:
+        """PNR as the database compares it, case-insensitive and without padding"""
+        return str(pnr).strip().upper()
+    
+    def _chunks(self, values: List[Any], size: int):
+        """Split values into lists of at most size, to stay under driver parameter limits"""
+        for start in range(0, len(values), size):
+            yield values[start:start + size]
+    
     def _get_request_data(self, config: Dict[str, Any], input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Get request master data"""
         filters = config.get('filters', {})
@@ -482,7 +707,17 @@ class GRMDataHandler(BaseNodeHandler):
         query += f" ORDER BY rm.requested_date DESC LIMIT {limit}"
         
         try:
-            with connection.cursor() as cursor:
+            if config.get('stream', False):
+                return {
+                    'data': fetch_rows(query, params, stream=True, using=read_alias(config), chunk_size=config.get('chunk_size')),
+                    'count': None,
+                    'streaming': True,
+                    'filters_applied': filters,
+                    'success': True,
+                    'message': "Streaming requests"
+                }
+            
+            with connections[read_alias(config)].cursor() as cursor:
                 cursor.execute(query, params)
                 columns = [col[0] for col in cursor.description]
                 results = [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -515,7 +750,7 @@ class GRMDataHandler(BaseNodeHandler):
         """
         
         try:
-            with connection.cursor() as cursor:
+            with connections[read_alias(config)].cursor() as cursor:
                 cursor.execute(query, [request_master_id])
                 columns = [col[0] for col in cursor.description]
                 results = [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -546,7 +781,19 @@ class GRMDataHandler(BaseNodeHandler):
         """
         
         try:
-            with connection.cursor() as cursor:
+            if config.get('stream', False):
+                return {
+                    'data': fetch_rows(
+                        query, [airlines_request_id], stream=True,
+                        using=read_alias(config), chunk_size=config.get('chunk_size')
+                    ),
+                    'count': None,
+                    'streaming': True,
+                    'success': True,
+                    'message': "Streaming transactions"
+                }
+            
+            with connections[read_alias(config)].cursor() as cursor:
                 cursor.execute(query, [airlines_request_id])
                 columns = [col[0] for col in cursor.description]
                 results = [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -575,7 +822,7 @@ class GRMDataHandler(BaseNodeHandler):
         """
         
         try:
-            with connection.cursor() as cursor:
+            with connections[write_alias(config)].cursor() as cursor:
                 cursor.execute(query, [new_status, pnr])
                 affected_rows = cursor.rowcount
                 
@@ -660,10 +907,17 @@ class QueryBuilderHandler(BaseNodeHandler):
             # Execute query
             final_query = ' '.join(query_parts)
             
-            with connection.cursor() as cursor:
-                cursor.execute(final_query, params)
-                columns = [col[0] for col in cursor.description]
-                results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            if config.get('stream', False):
+                return {
+                    'data': fetch_rows(final_query, params, stream=True, using=read_alias(config), chunk_size=config.get('chunk_size')),
+                    'count': None,
+                    'streaming': True,
+                    'query': final_query,
+                    'success': True,
+                    'message': 'Query executed successfully, streaming rows'
+                }
+            
+            results = fetch_rows(final_query, params, using=read_alias(config))
             
             return {
                 'data': results,
@@ -0,0 +1,114 @@
+"""
+Pooled HTTP session shared by the outbound request handlers
+"""
+import os
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Any
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+def http_settings() -> Dict[str, Any]:
+    """
+    Pool and retry settings of the shared HTTP clients
+    
+    Returns:
+        Dict with pool_connections (hosts kept), pool_maxsize (connections
+        per host), retries and backoff_factor
+    """
+    return {
+        'pool_connections': getattr(settings, 'WORKFLOW_HTTP_POOL_CONNECTIONS', 10),
+        'pool_maxsize': getattr(settings, 'WORKFLOW_HTTP_POOL_MAXSIZE', 20),
+        'retries': getattr(settings, 'WORKFLOW_HTTP_RETRIES', 3),
+        'backoff_factor': getattr(settings, 'WORKFLOW_HTTP_RETRY_BACKOFF', 0.3),
+    }
+
+def build_http_session() -> requests.Session:
+    """
+    Create a keep-alive session with per-host connection pools
+    
+    Connection errors and 502/503/504 responses are retried with
+    exponential backoff, for idempotent methods only, so a POST is never
+    sent twice.
+    
+    Returns:
+        requests.Session
+    """
+    options = http_settings()
+    retry = Retry(
+        total=options['retries'],
+        connect=options['retries'],
+        read=options['retries'],
+        status=options['retries'],
+        backoff_factor=options['backoff_factor'],
+        status_forcelist=(502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=options['pool_connections'],
+        pool_maxsize=options['pool_maxsize'],
+        max_retries=retry,
+        pool_block=False
+    )
+    
+    session = requests.Session()
+    # Workflows share the session, cookies from one must not reach another
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_http_session() -> requests.Session:
+    """
+    Return the session of the current worker process, creating it on first use
+    
+    A forked worker gets its own session instead of sharing the parent's
+    sockets.
+    
+    Returns:
+        requests.Session
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = build_http_session()
+                _session_pid = pid
+    return _session
+
+def reset_http_session():
+    """Close the shared session, e.g. after the pool settings changed"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+
+def http_request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send an HTTP request over a pooled keep-alive connection
+    
+    The session is looked up here rather than passed through the execution
+    context, which is serialized into node records and cache keys.
+    
+    Args:
+        method: HTTP method
+        url: Request URL
+        **kwargs: Extra arguments for requests.Session.request
+    
+    Returns:
+        requests.Response
+    """
+    return get_http_session().request(method, url, **kwargs)
@@ -5,12 +5,20 @@ import json
 import csv
 import io
 from typing import Dict, Any
-from django.db import connection
+from django.db import connections, transaction
 from .base import BaseNodeHandler
+from ..streaming import RowStream, json_default
+from ..db_routing import write_alias
+from ..bulk_write import bulk_write, parse_columns, supports_native_upsert
 
 class DatabaseSaveHandler(BaseNodeHandler):
     """Handler for saving data to database"""
     
+    # insert and upsert write streamed rows one chunk at a time
+    accepts_streams = True
+    
+    has_side_effects = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         table_name = config.get('table_name', '')
         operation = config.get('operation', 'insert')
@@ -19,61 +27,53 @@ class DatabaseSaveHandler(BaseNodeHandler):
         if not table_name:
             raise ValueError("Table name is required")
         
+        if isinstance(data, RowStream) and operation not in ('insert', 'upsert'):
+            data = data.materialize()
+        
         if not data:
             raise ValueError("No data to save")
         
+        alias = write_alias(config)
+        
         try:
-            with connection.cursor() as cursor:
-                if operation == 'insert':
-                    return self._insert_data(cursor, table_name, data)
-                elif operation == 'update':
-                    return self._update_data(cursor, table_name, data, config)
-                elif operation == 'upsert':
-                    return self._upsert_data(cursor, table_name, data, config)
-                else:
-                    raise ValueError(f"Unsupported operation: {operation}")
+            if operation == 'insert':
+                result = self._insert_data(table_name, data, alias, config)
+            elif operation == 'update':
+                with connections[alias].cursor() as cursor:
+                    result = self._update_data(cursor, table_name, data, config)
+            elif operation == 'upsert':
+                result = self._upsert_data(table_name, data, alias, config)
+            else:
+                raise ValueError(f"Unsupported operation: {operation}")
                     
         except Exception as e:
             self.log_execution(f"Database save failed: {str(e)}", 'error')
             raise ValueError(f"Database operation failed: {str(e)}")
+        
+        self._invalidate_query_results(table_name, alias)
+        return result
     
-    def _insert_data(self, cursor, table_name: str, data: Any) -> Dict[str, Any]:
-        """Insert data into table"""
-        if isinstance(data, list):
-            # Bulk insert
-            if not data:
-                return {'data': {'affected_rows': 0}, 'success': True, 'message': 'No data to insert'}
-            
-            # Use first item to determine columns
-            columns = list(data[0].keys())
-            placeholders = ', '.join(['%s'] * len(columns))
-            columns_str = ', '.join(columns)
-            
-            query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-            
-            values = []
-            for item in data:
-                values.append([item.get(col) for col in columns])
-            
-            cursor.executemany(query, values)
-            affected_rows = cursor.rowcount
-            
-        else:
-            # Single insert
-            columns = list(data.keys())
-            placeholders = ', '.join(['%s'] * len(columns))
-            columns_str = ', '.join(columns)
-            
-            query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-            values = [data[col] for col in columns]
-            
-            cursor.execute(query, values)
-            affected_rows = cursor.rowcount
+    def _invalidate_query_results(self, table_name: str, alias: str):
+        """Evict cached query builder results that read the written table"""
+        try:
+            from apps.query.result_cache import invalidate_tables
+        except ImportError:
+            return
+        
+        # Only after the commit, or readers could re-cache the old rows under
+        # the new token; cached misses read the primary, so a lagging replica
+        # cannot do the same (see apps.query.execution.execute_query)
+        transaction.on_commit(lambda: invalidate_tables([table_name]), using=alias)
+    
+    def _insert_data(self, table_name: str, data: Any, alias: str, config: Dict) -> Dict[str, Any]:
+        """Insert data into table with chunked multi-row INSERT statements"""
+        rows = [data] if isinstance(data, dict) else data
+        stats = bulk_write(table_name, rows, using=alias, chunk_size=config.get('chunk_size'))
         
         return {
-            'data': {'affected_rows': affected_rows},
+            'data': stats,
             'success': True,
-            'message': f'Inserted {affected_rows} rows into {table_name}'
+            'message': f"Inserted {stats['rows']} rows into {table_name} with {stats['statements']} statements"
         }
     
     def _update_data(self, cursor, table_name: str, data: Dict, config: Dict) -> Dict[str, Any]:
@@ -104,33 +104,69 @@ class DatabaseSaveHandler(BaseNodeHandler):
             'message': f'Updated {affected_rows} rows in {table_name}'
         }
     
-    def _upsert_data(self, cursor, table_name: str, data: Dict, config: Dict) -> Dict[str, Any]:
-        """Insert or update data (upsert)"""
-        unique_columns = config.get('unique_columns', [])
+    def _upsert_data(self, table_name: str, data: Any, alias: str, config: Dict) -> Dict[str, Any]:
+        """Insert or update data (upsert) with the database's native upsert"""
+        unique_columns = parse_columns(config.get('unique_columns'))
         
         if not unique_columns:
             # Fallback to insert
-            return self._insert_data(cursor, table_name, data)
+            return self._insert_data(table_name, data, alias, config)
+        
+        rows = [data] if isinstance(data, dict) else data
+        
+        if not supports_native_upsert(connections[alias]):
+            with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+                affected_rows = sum(self._upsert_row(cursor, table_name, row, unique_columns) for row in rows)
+            return {
+                'data': {'affected_rows': affected_rows},
+                'success': True,
+                'message': f'Upserted {affected_rows} rows into {table_name}'
+            }
+        
+        stats = bulk_write(
+            table_name,
+            rows,
+            using=alias,
+            chunk_size=config.get('chunk_size'),
+            unique_columns=unique_columns,
+            update_columns=parse_columns(config.get('update_columns')) or None
+        )
         
+        return {
+            'data': stats,
+            'success': True,
+            'message': f"Upserted {stats['rows']} rows into {table_name} with {stats['statements']} statements"
+        }
+    
+    def _upsert_row(self, cursor, table_name: str, row: Dict, unique_columns: list) -> int:
+        """Upsert one row with a lookup, for databases without a native upsert"""
         # Check if record exists
         where_clause = ' AND '.join([f"{col} = %s" for col in unique_columns])
         check_query = f"SELECT COUNT(*) FROM {table_name} WHERE {where_clause}"
-        check_values = [data[col] for col in unique_columns]
+        check_values = [row[col] for col in unique_columns]
         
         cursor.execute(check_query, check_values)
         exists = cursor.fetchone()[0] > 0
         
         if exists:
             # Update
-            where_conditions = {col: data[col] for col in unique_columns}
-            return self._update_data(cursor, table_name, data, {'where_conditions': where_conditions})
+            where_conditions = {col: row[col] for col in unique_columns}
+            result = self._update_data(cursor, table_name, row, {'where_conditions': where_conditions})
         else:
             # Insert
-            return self._insert_data(cursor, table_name, data)
+            columns = list(row.keys())
+            query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+            cursor.execute(query, [row[col] for col in columns])
+            result = {'data': {'affected_rows': cursor.rowcount}}
+        
+        return result['data']['affected_rows']
 
 class FileExportHandler(BaseNodeHandler):
     """Handler for exporting data to files"""
     
+    # json, jsonl and csv exports write streamed rows one at a time
+    accepts_streams = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         file_path = config.get('file_path', '')
         file_format = config.get('format', 'json')
@@ -142,9 +178,15 @@ class FileExportHandler(BaseNodeHandler):
         try:
             if file_format == 'json':
                 return self._export_json(file_path, data)
+            elif file_format == 'jsonl':
+                return self._export_jsonl(file_path, data)
             elif file_format == 'csv':
+                if isinstance(data, RowStream):
+                    return self._export_csv_stream(file_path, data, config.get('fieldnames'))
                 return self._export_csv(file_path, data)
             elif file_format == 'txt':
+                if isinstance(data, RowStream):
+                    data = data.materialize()
                 return self._export_text(file_path, data)
             else:
                 raise ValueError(f"Unsupported file format: {file_format}")
@@ -162,17 +204,32 @@ class FileExportHandler(BaseNodeHandler):
         if directory and not os.path.exists(directory):
             os.makedirs(directory)
         
+        rows_exported = None
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            if isinstance(data, RowStream):
+                # Write the array element by element instead of building it in memory
+                rows_exported = 0
+                f.write('[')
+                for item in data:
+                    f.write(',\n  ' if rows_exported else '\n  ')
+                    f.write(json.dumps(item, ensure_ascii=False, default=str))
+                    rows_exported += 1
+                f.write('\n]' if rows_exported else ']')
+            else:
+                json.dump(data, f, indent=2, ensure_ascii=False)
         
         file_size = os.path.getsize(file_path)
         
+        result_data = {
+            'file_path': file_path,
+            'format': 'json',
+            'file_size': file_size
+        }
+        if rows_exported is not None:
+            result_data['rows_exported'] = rows_exported
+        
         return {
-            'data': {
-                'file_path': file_path,
-                'format': 'json',
-                'file_size': file_size
-            },
+            'data': result_data,
             'success': True,
             'message': f'Data exported to JSON file: {file_path}'
         }
@@ -224,6 +281,84 @@ class FileExportHandler(BaseNodeHandler):
             'message': f'Data exported to CSV file: {file_path} ({len(data)} rows)'
         }
     
+    def _export_jsonl(self, file_path: str, data: Any) -> Dict[str, Any]:
+        """Export data as JSON Lines, one row per line"""
+        import os
+        
+        if not isinstance(data, (list, RowStream)):
+            data = [data]
+        
+        # Ensure directory exists
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        rows_exported = 0
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for item in data:
+                f.write(json.dumps(item, ensure_ascii=False, default=json_default))
+                f.write('\n')
+                rows_exported += 1
+        
+        file_size = os.path.getsize(file_path)
+        
+        return {
+            'data': {
+                'file_path': file_path,
+                'format': 'jsonl',
+                'file_size': file_size,
+                'rows_exported': rows_exported
+            },
+            'success': True,
+            'message': f'Data exported to JSONL file: {file_path} ({rows_exported} rows)'
+        }
+    
+    def _export_csv_stream(self, file_path: str, data: RowStream, fieldnames: Any = None) -> Dict[str, Any]:
+        """
+        Export streamed rows as CSV without reading them all first
+        
+        The header comes from the fieldnames config, or from the keys of the
+        first row. Keys missing from the header are left out.
+        """
+        import os
+        
+        # Ensure directory exists
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        if isinstance(fieldnames, str):
+            fieldnames = [name.strip() for name in fieldnames.split(',') if name.strip()]
+        
+        rows_exported = 0
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = None
+            for item in data:
+                if not isinstance(item, dict):
+                    # Convert non-dict items to dict
+                    item = {'value': str(item)}
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(fieldnames or item.keys()), extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow(item)
+                rows_exported += 1
+        
+        if not rows_exported:
+            raise ValueError("No data to export")
+        
+        file_size = os.path.getsize(file_path)
+        
+        return {
+            'data': {
+                'file_path': file_path,
+                'format': 'csv',
+                'file_size': file_size,
+                'rows_exported': rows_exported
+            },
+            'success': True,
+            'message': f'Data exported to CSV file: {file_path} ({rows_exported} rows)'
+        }
+    
     def _export_text(self, file_path: str, data: Any) -> Dict[str, Any]:
         """Export data as text"""
         import os
@@ -4,6 +4,8 @@ Query Integration Handler - Integrates with the query app
 from typing import Dict, Any
 from .base import BaseNodeHandler
 from ..integration import query_integration
+from ..streaming import is_stream
+from ..db_routing import read_alias
 
 class QueryIntegrationHandler(BaseNodeHandler):
     """Handler for integrating with the query app"""
@@ -28,11 +30,22 @@ class QueryIntegrationHandler(BaseNodeHandler):
         resolved_config = self._resolve_query_config(query_config, input_data, context)
         
         try:
-            result = query_integration.execute_query_builder_query(resolved_config)
+            result = query_integration.execute_query_builder_query(
+                resolved_config,
+                stream=bool(config.get('stream', False)),
+                using=read_alias(config)
+            )
+            
+            if is_stream(result['data']):
+                # Rows are read lazily by the nodes downstream
+                count = None
+            else:
+                count = len(result['data']) if isinstance(result['data'], list) else 1
             
             return {
                 'data': result['data'],
-                'count': len(result['data']) if isinstance(result['data'], list) else 1,
+                'count': count,
+                'next_cursor': result['next_cursor'],
                 'query_config': resolved_config,
                 'success': True,
                 'message': result['message']
@@ -66,11 +79,12 @@ class QueryIntegrationHandler(BaseNodeHandler):
         resolved_config = self._resolve_query_config(query_config, input_data, context)
         
         try:
-            sql_query = query_integration.build_query_from_config(resolved_config)
+            sql_query, params = query_integration.build_query_from_config(resolved_config)
             
             return {
                 'data': {
                     'sql_query': sql_query,
+                    'params': params,
                     'query_config': resolved_config
                 },
                 'success': True,
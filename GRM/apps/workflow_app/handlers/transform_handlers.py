@@ -2,19 +2,34 @@
 Transform node handlers for data manipulation
 """
 import json
-import re
 from typing import Dict, Any, List
 from .base import BaseNodeHandler
+from ..expressions import compile_expression
+from ..streaming import RowStream
+from .columnar import (
+    STATISTIC_AGGREGATIONS, numpy_available, extract_column, group_keys,
+    columnar_aggregate, columnar_group_aggregate, python_statistic, python_group_aggregate
+)
 
 class DataTransformHandler(BaseNodeHandler):
     """Handler for data transformation nodes"""
     
+    # map and filter stay lazy on streamed rows, other transforms read them into a list
+    accepts_streams = True
+    
     def execute(self, config: Dict[str, Any], input_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         transform_type = config.get('transform_type', 'map')
         field_mappings = self._parse_field_mappings(config.get('field_mappings', []))
         
         data = input_data.get('data', {})
         
+        if isinstance(data, RowStream):
+            if transform_type == 'map':
+                return self._map_stream(data, field_mappings)
+            elif transform_type == 'filter':
+                return self._filter_stream(data, config)
+            data = data.materialize()
+        
         if transform_type == 'map':
             return self._map_fields(data, field_mappings)
         elif transform_type == 'filter':
@@ -46,23 +61,7 @@ class DataTransformHandler(BaseNodeHandler):
             return {'data': data, 'success': True, 'message': 'No mappings defined, data passed through'}
             
         if isinstance(data, list):
-            result = []
-            for item in data:
-                mapped_item = {}
-                for mapping in mappings:
-                    source_field = mapping.get('source')
-                    target_field = mapping.get('target')
-                    transform_function = mapping.get('transform', '')
-                    
-                    if source_field and target_field:
-                        value = self._get_nested_value(item, source_field)
-                        
-                        # Apply transformation function if specified
-                        if transform_function:
-                            value = self._apply_transform_function(value, transform_function)
-                            
-                        self._set_nested_value(mapped_item, target_field, value)
-                result.append(mapped_item)
+            result = [self._map_item(item, mappings) for item in data]
             return {'data': result, 'success': True, 'message': f'Mapped {len(result)} items'}
         else:
             mapped_data = {}
@@ -80,6 +79,35 @@ class DataTransformHandler(BaseNodeHandler):
                     self._set_nested_value(mapped_data, target_field, value)
             return {'data': mapped_data, 'success': True, 'message': 'Data mapped successfully'}
     
+    def _map_item(self, item: Any, mappings: List[Dict]) -> Dict[str, Any]:
+        """Map the fields of a single item"""
+        mapped_item = {}
+        for mapping in mappings:
+            source_field = mapping.get('source')
+            target_field = mapping.get('target')
+            transform_function = mapping.get('transform', '')
+            
+            if source_field and target_field:
+                value = self._get_nested_value(item, source_field)
+                
+                # Apply transformation function if specified
+                if transform_function:
+                    value = self._apply_transform_function(value, transform_function)
+                    
+                self._set_nested_value(mapped_item, target_field, value)
+        return mapped_item
+    
+    def _map_stream(self, stream: RowStream, mappings: List[Dict]) -> Dict[str, Any]:
+        """Map fields of streamed rows lazily, as they are read downstream"""
+        if not mappings:
+            return {'data': stream, 'success': True, 'message': 'No mappings defined, stream passed through'}
+        
+        return {
+            'data': stream.map(lambda item: self._map_item(item, mappings)),
+            'success': True,
+            'message': 'Mapping streamed rows'
+        }
+    
     def _apply_transform_function(self, value: Any, function: str) -> Any:
         """Apply transformation function to value"""
         try:
@@ -134,24 +162,45 @@ class DataTransformHandler(BaseNodeHandler):
             'message': f'Filtered to {len(filtered_data)} items'
         }
     
+    def _filter_stream(self, stream: RowStream, config: Dict) -> Dict[str, Any]:
+        """Filter streamed rows lazily, as they are read downstream"""
+        filter_expression = config.get('filter_expression', '')
+        
+        if filter_expression:
+            expression_predicate = compile_expression(filter_expression)
+            
+            def predicate(item):
+                try:
+                    return bool(expression_predicate({'item': item}))
+                except Exception:
+                    # Skip items that cause evaluation errors
+                    return False
+        else:
+            filter_field = config.get('filter_field', '')
+            filter_operator = config.get('filter_operator', 'equals')
+            filter_value = config.get('filter_value', '')
+            
+            def predicate(item):
+                item_value = self._get_nested_value(item, filter_field)
+                return self._evaluate_condition(item_value, filter_operator, filter_value)
+        
+        return {
+            'data': stream.filter(predicate),
+            'success': True,
+            'message': 'Filtering streamed rows'
+        }
+    
     def _filter_by_expression(self, data: List[Dict], expression: str) -> Dict[str, Any]:
         """Filter data using JavaScript-like expression"""
+        # Parsed once, then applied to every row
+        predicate = compile_expression(expression)
+        names = {}
         filtered_data = []
         
         for item in data:
+            names['item'] = item
             try:
-                # Simple expression evaluation
-                # Replace item.field with actual values
-                eval_expression = expression
-                for key, value in item.items():
-                    pattern = f'item\\.{key}'
-                    if isinstance(value, str):
-                        eval_expression = re.sub(pattern, f"'{value}'", eval_expression)
-                    else:
-                        eval_expression = re.sub(pattern, str(value), eval_expression)
-                
-                # Evaluate the expression safely
-                if eval(eval_expression, {"__builtins__": {}}):
+                if predicate(names):
                     filtered_data.append(item)
             except Exception:
                 # Skip items that cause evaluation errors
@@ -171,23 +220,25 @@ class DataTransformHandler(BaseNodeHandler):
         agg_type = config.get('aggregation_type', 'count')
         agg_field = config.get('aggregation_field', '')
         group_by = config.get('group_by', '')
+        percentile_rank = float(config.get('percentile', 50))
+        
+        # Columnar mode reads each field once into an array and aggregates with NumPy
+        use_columnar = bool(config.get('columnar', False)) and numpy_available()
         
         if group_by:
-            return self._group_and_aggregate(data, group_by, agg_type, agg_field)
+            return self._group_and_aggregate(data, group_by, agg_type, agg_field, percentile_rank, use_columnar)
         
-        if agg_type == 'count':
+        if use_columnar:
+            result = columnar_aggregate(data, agg_type, agg_field, percentile_rank)
+        elif agg_type == 'count':
             result = len(data)
         elif agg_type == 'sum' and agg_field:
             result = sum(float(self._get_nested_value(item, agg_field) or 0) for item in data)
         elif agg_type == 'avg' and agg_field:
             values = [float(self._get_nested_value(item, agg_field) or 0) for item in data]
             result = sum(values) / len(values) if values else 0
-        elif agg_type == 'min' and agg_field:
-            values = [self._get_nested_value(item, agg_field) for item in data if self._get_nested_value(item, agg_field) is not None]
-            result = min(values) if values else None
-        elif agg_type == 'max' and agg_field:
-            values = [self._get_nested_value(item, agg_field) for item in data if self._get_nested_value(item, agg_field) is not None]
-            result = max(values) if values else None
+        elif agg_type in STATISTIC_AGGREGATIONS and agg_field:
+            result = python_statistic(extract_column(data, agg_field), agg_type, percentile_rank)
         else:
             result = len(data)
         
@@ -197,8 +248,31 @@ class DataTransformHandler(BaseNodeHandler):
             'message': f'Aggregated {len(data)} items using {agg_type}'
         }
     
-    def _group_and_aggregate(self, data: List[Dict], group_by: str, agg_type: str, agg_field: str) -> Dict[str, Any]:
+    def _group_and_aggregate(
+        self,
+        data: List[Dict],
+        group_by: str,
+        agg_type: str,
+        agg_field: str,
+        percentile_rank: float = 50,
+        use_columnar: bool = False
+    ) -> Dict[str, Any]:
         """Group data and apply aggregation"""
+        if use_columnar:
+            return {
+                'data': columnar_group_aggregate(data, group_by, agg_type, agg_field, percentile_rank),
+                'success': True,
+                'message': f'Grouped by {group_by} and aggregated using {agg_type}'
+            }
+        
+        if agg_type in STATISTIC_AGGREGATIONS and agg_field:
+            keys, codes = group_keys(extract_column(data, group_by))
+            return {
+                'data': python_group_aggregate(keys, codes, extract_column(data, agg_field), agg_type, percentile_rank),
+                'success': True,
+                'message': f'Grouped by {group_by} and aggregated using {agg_type}'
+            }
+        
         groups = {}
         
         for item in data:
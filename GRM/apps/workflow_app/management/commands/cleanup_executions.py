@@ -0,0 +1,70 @@
+"""
+Management command to apply execution retention
+"""
+from django.core.management.base import BaseCommand
+import logging
+
+from apps.workflow_app.retention import ExecutionRetention
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Delete finished workflow executions past their retention window, in small chunks'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Executions deleted per transaction (default: WORKFLOW_RETENTION_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=None,
+            help='Seconds to pause between chunks (default: WORKFLOW_RETENTION_CHUNK_DELAY)',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=None,
+            help='Write executions to gzip JSON-lines files in this directory before deleting them',
+        )
+        parser.add_argument(
+            '--max-runtime',
+            type=float,
+            default=None,
+            help='Stop after this many seconds, the next run continues',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the executions that would be deleted',
+        )
+    
+    def handle(self, *args, **options):
+        retention = ExecutionRetention(
+            chunk_size=options['chunk_size'],
+            chunk_delay=options['delay'],
+            archive_dir=options['archive_dir'],
+            max_runtime=options['max_runtime']
+        )
+        
+        if options['dry_run']:
+            self.stdout.write(f'{retention.count_expired()} executions are past their retention window')
+            return
+        
+        result = retention.run()
+        
+        logger.info(f"Retention deleted {result['deleted_executions']} executions")
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {result['deleted_executions']} executions and "
+            f"{result['deleted_node_executions']} node executions"
+        ))
+        if result['dropped_partitions']:
+            self.stdout.write(f"Dropped partitions: {', '.join(result['dropped_partitions'])}")
+        if result['archive_files']:
+            self.stdout.write(f"Wrote {len(result['archive_files'])} archive files")
+        if result['deleted_payloads']:
+            self.stdout.write(f"Deleted {result['deleted_payloads']} unreferenced payloads")
+        if not result['completed']:
+            self.stdout.write(self.style.WARNING('Stopped at the time budget, run again to continue'))
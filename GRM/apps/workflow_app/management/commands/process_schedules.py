@@ -6,9 +6,8 @@ from django.utils import timezone
 from datetime import timedelta
 import logging
 
-from apps.workflow_app.models import Workflow, WorkflowSchedule, WorkflowExecution
-from apps.workflow_app.tasks import execute_workflow_task
-from apps.workflow_app.scheduler import WorkflowScheduler
+from apps.workflow_app.models import WorkflowSchedule
+from apps.workflow_app.cron_scheduler import CronScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -39,66 +38,37 @@ class Command(BaseCommand):
         # Find workflows that should be executed
         now = timezone.now()
         
-        due_schedules = WorkflowSchedule.objects.filter(
+        due_schedules = list(WorkflowSchedule.objects.filter(
             is_active=True,
             workflow__status='active',
             next_execution_at__lte=now
-        ).select_related('workflow')[:limit]
+        ).select_related('workflow').order_by('next_execution_at')[:limit])
         
         if not due_schedules:
             self.stdout.write('No workflows are due for execution')
             return
         
-        scheduler = WorkflowScheduler()
-        executed_count = 0
-        
-        for schedule in due_schedules:
-            workflow = schedule.workflow
-            
+        if dry_run:
+            for schedule in due_schedules:
+                self.stdout.write(
+                    f'Would execute: {schedule.workflow.name} (next: {schedule.next_execution_at})'
+                )
+            executed_count = len(due_schedules)
+        else:
             try:
-                if dry_run:
-                    self.stdout.write(
-                        f'Would execute: {workflow.name} (next: {schedule.next_execution_at})'
-                    )
-                else:
-                    # Create execution
-                    execution = WorkflowExecution.objects.create(
-                        workflow=workflow,
-                        triggered_by='scheduled',
-                        input_data={},
-                        execution_context={
-                            'scheduled': True,
-                            'schedule_id': str(schedule.id)
-                        }
-                    )
-                    
-                    # Execute asynchronously
-                    execute_workflow_task.delay(str(execution.id))
-                    
-                    # Update schedule
-                    schedule.last_executed_at = now
-                    schedule.execution_count += 1
-                    schedule.next_execution_at = scheduler._calculate_next_execution(
-                        schedule.cron_expression,
-                        schedule.timezone
-                    )
-                    schedule.save()
-                    
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Executed: {workflow.name} (execution: {execution.id})'
-                        )
-                    )
-                
-                executed_count += 1
-                
+                # Claims rows with SKIP LOCKED, safe to run next to other schedulers
+                executed_count = CronScheduler().fire(
+                    [schedule.id for schedule in due_schedules],
+                    now
+                )
             except Exception as e:
                 self.stdout.write(
                     self.style.ERROR(
-                        f'Failed to execute {workflow.name}: {str(e)}'
+                        f'Failed to execute scheduled workflows: {str(e)}'
                     )
                 )
-                logger.error(f'Failed to execute scheduled workflow {workflow.id}: {str(e)}')
+                logger.error(f'Failed to execute scheduled workflows: {str(e)}')
+                return
         
         self.stdout.write(
             self.style.SUCCESS(
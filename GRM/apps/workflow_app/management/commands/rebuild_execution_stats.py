@@ -0,0 +1,51 @@
+"""
+Management command to rebuild the ExecutionDailyStats rollup
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+import logging
+
+from apps.workflow_app.retention import default_retention_days
+from apps.workflow_app.rollup import rebuild_execution_stats
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recompute the ExecutionDailyStats rollup from workflow executions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Only rebuild the last N days (default: all history)',
+        )
+        parser.add_argument(
+            '--workflow',
+            action='append',
+            dest='workflow_ids',
+            default=None,
+            help='Only rebuild this workflow ID (can be repeated)',
+        )
+    
+    def handle(self, *args, **options):
+        days = options['days']
+        since = timezone.localdate() - timedelta(days=days - 1) if days else None
+        
+        self.stdout.write(
+            f'Rebuilding execution stats (since={since or "beginning"}, workflows={options["workflow_ids"] or "all"})'
+        )
+        
+        # Days partly removed by retention cleanup would be rebuilt from the executions left
+        retention_days = default_retention_days()
+        if retention_days and (days is None or days > retention_days):
+            self.stdout.write(self.style.WARNING(
+                f'Rebuilding more than the {retention_days} retained days, days partly removed by '
+                f'retention cleanup lose the counts of their deleted executions'
+            ))
+        
+        row_count = rebuild_execution_stats(since=since, workflow_ids=options['workflow_ids'])
+        
+        logger.info(f'Rebuilt {row_count} execution stats rows')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {row_count} execution stats rows'))
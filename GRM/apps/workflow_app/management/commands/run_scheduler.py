@@ -0,0 +1,52 @@
+"""
+Management command to run the cron scheduler loop
+"""
+from django.core.management.base import BaseCommand
+import signal
+import threading
+import logging
+
+from apps.workflow_app.cron_scheduler import CronScheduler
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Run the cron scheduler that fires due workflow schedules (several replicas may run at once)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Maximum number of schedules claimed per transaction',
+        )
+        parser.add_argument(
+            '--lookahead',
+            type=float,
+            default=None,
+            help='Seconds of upcoming due times kept in memory',
+        )
+        parser.add_argument(
+            '--refresh-interval',
+            type=float,
+            default=None,
+            help='Seconds between reloads of the due schedules',
+        )
+    
+    def handle(self, *args, **options):
+        scheduler = CronScheduler(
+            batch_size=options['batch_size'],
+            lookahead=options['lookahead'],
+            refresh_interval=options['refresh_interval']
+        )
+        stop_event = threading.Event()
+        
+        def stop(signum, frame):
+            self.stdout.write('Stopping scheduler...')
+            stop_event.set()
+        
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        
+        self.stdout.write(self.style.SUCCESS('Cron scheduler running, press Ctrl+C to stop'))
+        scheduler.run_forever(stop_event)
@@ -163,6 +163,12 @@ class Command(BaseCommand):
                             'type': 'number',
                             'default': 100,
                             'label': 'Limit'
+                        },
+                        {
+                            'name': 'database_alias',
+                            'type': 'text',
+                            'placeholder': 'replica',
+                            'label': 'Database Alias (empty uses the default routing)'
                         }
                     ]
                 },
@@ -207,6 +213,12 @@ class Command(BaseCommand):
                             'type': 'number',
                             'default': 100,
                             'label': 'Limit'
+                        },
+                        {
+                            'name': 'database_alias',
+                            'type': 'text',
+                            'placeholder': 'replica',
+                            'label': 'Database Alias (empty uses the default routing)'
                         }
                     ]
                 },
@@ -233,6 +245,12 @@ class Command(BaseCommand):
                             'type': 'textarea',
                             'placeholder': 'Query configuration JSON',
                             'label': 'Query Configuration'
+                        },
+                        {
+                            'name': 'database_alias',
+                            'type': 'text',
+                            'placeholder': 'replica',
+                            'label': 'Database Alias (empty uses the default routing)'
                         }
                     ]
                 },
@@ -250,7 +268,7 @@ class Command(BaseCommand):
                         {
                             'name': 'operation',
                             'type': 'select',
-                            'options': ['get_requests', 'get_passengers', 'get_transactions', 'update_pnr_status', 'check_payment_percentage'],
+                            'options': ['get_requests', 'get_passengers', 'get_transactions', 'update_pnr_status', 'check_payment_percentage', 'check_payment_percentage_batch'],
                             'default': 'get_requests',
                             'label': 'Operation'
                         },
@@ -259,6 +277,18 @@ class Command(BaseCommand):
                             'type': 'textarea',
                             'placeholder': 'Filters JSON',
                             'label': 'Filters'
+                        },
+                        {
+                            'name': 'pnrs_field',
+                            'type': 'text',
+                            'default': 'pnrs',
+                            'label': 'PNR List Field (batch payment check)'
+                        },
+                        {
+                            'name': 'database_alias',
+                            'type': 'text',
+                            'placeholder': 'replica',
+                            'label': 'Database Alias (empty uses the default routing)'
                         }
                     ]
                 },
@@ -406,6 +436,84 @@ class Command(BaseCommand):
                 'handler_class': 'apps.workflow_app.handlers.condition_handlers.SwitchHandler'
             },
             
+            # Batches
+            {
+                'name': 'split_in_batches',
+                'display_name': 'Split In Batches',
+                'category': 'transform',
+                'description': 'Run the following nodes once per batch of items',
+                'icon': 'fa-layer-group',
+                'color': '#0ea5e9',
+                'config_schema': {
+                    'fields': [
+                        {
+                            'name': 'items_field',
+                            'type': 'text',
+                            'placeholder': 'rows (empty uses the input data)',
+                            'label': 'Items Field'
+                        },
+                        {
+                            'name': 'batch_size',
+                            'type': 'number',
+                            'default': 10,
+                            'label': 'Batch Size'
+                        },
+                        {
+                            'name': 'concurrency',
+                            'type': 'number',
+                            'default': 4,
+                            'label': 'Parallel Batches'
+                        }
+                    ]
+                },
+                'handler_class': 'apps.workflow_app.handlers.batch_handlers.SplitInBatchesHandler'
+            },
+            {
+                'name': 'for_each',
+                'display_name': 'For Each',
+                'category': 'transform',
+                'description': 'Run the following nodes once per item',
+                'icon': 'fa-redo',
+                'color': '#0ea5e9',
+                'config_schema': {
+                    'fields': [
+                        {
+                            'name': 'items_field',
+                            'type': 'text',
+                            'placeholder': 'rows (empty uses the input data)',
+                            'label': 'Items Field'
+                        },
+                        {
+                            'name': 'concurrency',
+                            'type': 'number',
+                            'default': 4,
+                            'label': 'Parallel Items'
+                        }
+                    ]
+                },
+                'handler_class': 'apps.workflow_app.handlers.batch_handlers.ForEachHandler'
+            },
+            {
+                'name': 'aggregate_batches',
+                'display_name': 'Aggregate Batches',
+                'category': 'transform',
+                'description': 'Gather the results of a split or for each',
+                'icon': 'fa-compress',
+                'color': '#0ea5e9',
+                'config_schema': {
+                    'fields': [
+                        {
+                            'name': 'mode',
+                            'type': 'select',
+                            'options': ['flatten', 'batches'],
+                            'default': 'flatten',
+                            'label': 'Mode'
+                        }
+                    ]
+                },
+                'handler_class': 'apps.workflow_app.handlers.batch_handlers.AggregateBatchesHandler'
+            },
+            
             # Actions
             {
                 'name': 'email_send',
@@ -562,6 +670,24 @@ class Command(BaseCommand):
                             'type': 'text',
                             'placeholder': 'id,email',
                             'label': 'Unique Columns (for upsert)'
+                        },
+                        {
+                            'name': 'update_columns',
+                            'type': 'text',
+                            'placeholder': 'name,status (empty updates all other columns)',
+                            'label': 'Update Columns (for upsert)'
+                        },
+                        {
+                            'name': 'chunk_size',
+                            'type': 'number',
+                            'default': 1000,
+                            'label': 'Rows Per Transaction'
+                        },
+                        {
+                            'name': 'database_alias',
+                            'type': 'text',
+                            'placeholder': 'replica',
+                            'label': 'Database Alias (empty uses the default routing)'
                         }
                     ]
                 },
@@ -586,7 +712,7 @@ class Command(BaseCommand):
                         {
                             'name': 'format',
                             'type': 'select',
-                            'options': ['json', 'csv', 'txt'],
+                            'options': ['json', 'jsonl', 'csv', 'txt'],
                             'default': 'json',
                             'label': 'Format'
                         }
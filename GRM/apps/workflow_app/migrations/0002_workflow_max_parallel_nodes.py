@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='max_parallel_nodes',
+            field=models.IntegerField(default=1, help_text='Maximum number of independent nodes executed concurrently (1 runs nodes one at a time)'),
+        ),
+    ]
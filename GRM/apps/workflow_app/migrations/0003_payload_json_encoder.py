@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-17 11:40
+
+import apps.workflow_app.payload_store
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_app', '0002_workflow_max_parallel_nodes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workflowexecution',
+            name='output_data',
+            field=models.JSONField(blank=True, default=dict, encoder=apps.workflow_app.payload_store.PayloadJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='nodeexecution',
+            name='input_data',
+            field=models.JSONField(blank=True, default=dict, encoder=apps.workflow_app.payload_store.PayloadJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='nodeexecution',
+            name='output_data',
+            field=models.JSONField(blank=True, default=dict, encoder=apps.workflow_app.payload_store.PayloadJSONEncoder),
+        ),
+    ]
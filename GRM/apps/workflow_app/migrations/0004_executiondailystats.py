@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-17 12:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_app', '0003_payload_json_encoder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecutionDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('success', 'Success'), ('failed', 'Failed'), ('cancelled', 'Cancelled'), ('timeout', 'Timeout')], max_length=20)),
+                ('execution_count', models.IntegerField(default=0)),
+                ('timed_count', models.IntegerField(default=0, help_text='Executions with a recorded duration')),
+                ('total_duration_seconds', models.FloatField(default=0)),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='workflow_app.workflow')),
+            ],
+            options={
+                'unique_together': {('workflow', 'day', 'status')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='executiondailystats',
+            index=models.Index(fields=['day', 'status'], name='workflow_ap_day_bb9e26_idx'),
+        ),
+    ]
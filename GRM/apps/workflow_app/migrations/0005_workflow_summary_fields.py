@@ -0,0 +1,74 @@
+# Generated by Django 3.2.25 on 2026-10-17 12:30
+
+from django.db import migrations, models
+
+
+def populate_workflow_summaries(apps, schema_editor):
+    Workflow = apps.get_model('workflow_app', 'Workflow')
+    WorkflowExecution = apps.get_model('workflow_app', 'WorkflowExecution')
+
+    execution_counts = dict(
+        WorkflowExecution.objects.values('workflow_id').annotate(
+            total=models.Count('id')
+        ).order_by().values_list('workflow_id', 'total')
+    )
+
+    workflows = []
+    for workflow in Workflow.objects.all().iterator():
+        definition = workflow.definition if isinstance(workflow.definition, dict) else {}
+        workflow.node_count = len(definition.get('nodes', []) or [])
+        workflow.connection_count = len(definition.get('connections', []) or [])
+        workflow.execution_count = execution_counts.get(workflow.id, 0)
+
+        last_execution = WorkflowExecution.objects.filter(
+            workflow_id=workflow.id
+        ).order_by('-started_at').values('status', 'started_at', 'duration_seconds').first()
+        if last_execution:
+            workflow.last_execution_status = last_execution['status']
+            workflow.last_execution_duration = last_execution['duration_seconds']
+            workflow.last_executed_at = last_execution['started_at']
+
+        workflows.append(workflow)
+
+    Workflow.objects.bulk_update(
+        workflows,
+        ['node_count', 'connection_count', 'execution_count', 'last_execution_status',
+         'last_execution_duration', 'last_executed_at'],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_app', '0004_executiondailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='connection_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='execution_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='last_execution_duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='last_execution_status',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='node_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_workflow_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-17 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_app', '0005_workflow_summary_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='retention_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Days finished executions are kept (empty uses WORKFLOW_EXECUTION_RETENTION_DAYS, 0 keeps them forever)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='workflowexecution',
+            index=models.Index(fields=['finished_at'], name='workflow_ap_finishe_f5bb62_idx'),
+        ),
+    ]
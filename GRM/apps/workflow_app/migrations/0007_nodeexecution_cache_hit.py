@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_app', '0006_execution_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nodeexecution',
+            name='cache_hit',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:10
+
+from django.db import migrations
+
+from apps.workflow_app.rollup import rebuild_stats_rows
+
+
+def backfill_execution_stats(apps, schema_editor):
+    rebuild_stats_rows(
+        apps.get_model('workflow_app', 'WorkflowExecution'),
+        apps.get_model('workflow_app', 'ExecutionDailyStats')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_app', '0007_nodeexecution_cache_hit'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_execution_stats, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from .payload_store import PayloadJSONEncoder
 
 class NodeType(models.Model):
     """Registry of available node types with their schemas"""
@@ -66,6 +67,15 @@ class Workflow(models.Model):
     timeout_seconds = models.IntegerField(default=300)
     max_retries = models.IntegerField(default=3)
     retry_delay_seconds = models.IntegerField(default=60)
+    max_parallel_nodes = models.IntegerField(
+        default=1,
+        help_text="Maximum number of independent nodes executed concurrently (1 runs nodes one at a time)"
+    )
+    retention_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Days finished executions are kept (empty uses WORKFLOW_EXECUTION_RETENTION_DAYS, 0 keeps them forever)"
+    )
     
     # Scheduling
     is_scheduled = models.BooleanField(default=False)
@@ -78,6 +88,13 @@ class Workflow(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     last_executed_at = models.DateTimeField(null=True, blank=True)
     
+    # Denormalized summary, so lists never need the definition or the executions
+    execution_count = models.IntegerField(default=0)
+    last_execution_status = models.CharField(max_length=20, blank=True)
+    last_execution_duration = models.FloatField(null=True, blank=True)
+    node_count = models.IntegerField(default=0)
+    connection_count = models.IntegerField(default=0)
+    
     class Meta:
         ordering = ['-updated_at']
         indexes = [
@@ -88,6 +105,31 @@ class Workflow(models.Model):
     def __str__(self):
         return f"{self.name} (v{self.version})"
     
+    # Maintained by the engine with F() updates, a save of a stale instance must not write them back
+    EXECUTION_SUMMARY_FIELDS = ('execution_count', 'last_executed_at', 'last_execution_status', 'last_execution_duration')
+    
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.EXECUTION_SUMMARY_FIELDS
+            ]
+        
+        # Keep node_count / connection_count in step with the definition
+        if 'definition' not in self.get_deferred_fields():
+            definition = self.definition if isinstance(self.definition, dict) else {}
+            self.node_count = len(definition.get('nodes', []) or [])
+            self.connection_count = len(definition.get('connections', []) or [])
+            
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'definition' in update_fields:
+                kwargs['update_fields'] = set(update_fields) | {'node_count', 'connection_count'}
+        
+        super().save(*args, **kwargs)
+    
     def get_nodes(self):
         """Extract nodes from workflow definition"""
         return self.definition.get('nodes', [])
@@ -129,7 +171,7 @@ class WorkflowExecution(models.Model):
     
     # Data
     input_data = models.JSONField(default=dict, blank=True)
-    output_data = models.JSONField(default=dict, blank=True)
+    output_data = models.JSONField(default=dict, blank=True, encoder=PayloadJSONEncoder)
     error_message = models.TextField(blank=True)
     error_details = models.JSONField(default=dict, blank=True)
     
@@ -141,6 +183,7 @@ class WorkflowExecution(models.Model):
         indexes = [
             models.Index(fields=['workflow', 'status']),
             models.Index(fields=['status', 'started_at']),
+            models.Index(fields=['finished_at']),
         ]
     
     def __str__(self):
@@ -182,13 +225,14 @@ class NodeExecution(models.Model):
     duration_ms = models.FloatField(null=True, blank=True)
     
     # Data
-    input_data = models.JSONField(default=dict, blank=True)
-    output_data = models.JSONField(default=dict, blank=True)
+    input_data = models.JSONField(default=dict, blank=True, encoder=PayloadJSONEncoder)
+    output_data = models.JSONField(default=dict, blank=True, encoder=PayloadJSONEncoder)
     error_message = models.TextField(blank=True)
     error_details = models.JSONField(default=dict, blank=True)
     
     # Configuration used during execution
     node_config = models.JSONField(default=dict, blank=True)
+    cache_hit = models.BooleanField(default=False)  # Output served from the node result cache
     
     class Meta:
         ordering = ['execution_order', 'started_at']
@@ -200,6 +244,26 @@ class NodeExecution(models.Model):
     def __str__(self):
         return f"{self.node_name} - {self.status}"
 
+class ExecutionDailyStats(models.Model):
+    """Per-day rollup of finished executions, maintained as executions finish"""
+    workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=WorkflowExecution.STATUS_CHOICES)
+    
+    # Counters
+    execution_count = models.IntegerField(default=0)
+    timed_count = models.IntegerField(default=0, help_text="Executions with a recorded duration")
+    total_duration_seconds = models.FloatField(default=0)
+    
+    class Meta:
+        unique_together = [['workflow', 'day', 'status']]
+        indexes = [
+            models.Index(fields=['day', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.workflow_id} {self.day} {self.status}: {self.execution_count}"
+
 class WorkflowWebhook(models.Model):
     """Webhook endpoints for triggering workflows"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
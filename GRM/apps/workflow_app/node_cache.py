@@ -0,0 +1,198 @@
+"""
+Opt-in memoization of node results
+
+A node enables it with a cache block in its config:
+
+    "cache": {"ttl": 300, "key_fields": ["currency", "date"], "backend": "shared"}
+
+`true` or a number of seconds also work. Results are keyed on a hash of
+the node type, the resolved config and the selected input fields (the
+whole input data without key_fields). The 'local' backend is an LRU in
+the worker process, 'shared' uses the Django cache named by
+WORKFLOW_NODE_CACHE_ALIAS so all workers see the same entries.
+"""
+import json
+import time
+import pickle
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .streaming import RowStream
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+
+class LocalResultStore:
+    """Thread-safe LRU of pickled results with per-entry expiry"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, 'WORKFLOW_NODE_CACHE_SIZE', 256)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(0, self.max_size):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SharedResultStore:
+    """Result store backed by a Django cache alias"""
+
+    def _cache(self):
+        return caches[getattr(settings, 'WORKFLOW_NODE_CACHE_ALIAS', 'default')]
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache().get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._cache().set(key, value, ttl)
+
+local_store = LocalResultStore()
+shared_store = SharedResultStore()
+
+def cache_options(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Normalized cache options of a resolved node config
+
+    Args:
+        config: Resolved node configuration
+
+    Returns:
+        Dict with ttl, key_fields and backend, None when caching is off
+    """
+    option = config.get('cache')
+    if not option:
+        return None
+
+    if option is True:
+        option = {}
+    elif isinstance(option, (int, float)):
+        option = {'ttl': option}
+    elif not isinstance(option, dict):
+        return None
+
+    if option.get('enabled', True) in (False, 'false', 0):
+        return None
+
+    try:
+        ttl = float(option.get('ttl', getattr(settings, 'WORKFLOW_NODE_CACHE_TTL', DEFAULT_TTL)))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cache ttl: {option.get('ttl')}")
+    if ttl <= 0:
+        return None
+
+    key_fields = option.get('key_fields') or []
+    if isinstance(key_fields, str):
+        key_fields = [field.strip() for field in key_fields.split(',') if field.strip()]
+
+    backend = option.get('backend') or getattr(settings, 'WORKFLOW_NODE_CACHE_BACKEND', 'local')
+    if backend not in ('local', 'shared'):
+        raise ValueError(f"Unsupported cache backend: {backend}")
+
+    return {'ttl': ttl, 'key_fields': key_fields, 'backend': backend}
+
+def _get_path(data: Any, path: str) -> Any:
+    for part in path.split('.'):
+        if isinstance(data, dict):
+            data = data.get(part)
+        elif isinstance(data, list) and part.isdigit() and int(part) < len(data):
+            data = data[int(part)]
+        else:
+            return None
+    return data
+
+def cache_key(node_def: Dict[str, Any], config: Dict[str, Any], node_input: Dict[str, Any], options: Dict[str, Any]) -> str:
+    """
+    Content hash of everything that determines a node's result
+
+    Args:
+        node_def: Node definition
+        config: Resolved node configuration
+        node_input: Prepared node input
+        options: Options from cache_options()
+
+    Returns:
+        Cache key
+    """
+    data = node_input.get('data')
+    if options['key_fields']:
+        key_input = {field: _get_path(data, field) for field in options['key_fields']}
+    else:
+        key_input = data
+
+    material = json.dumps(
+        [node_def['type'], {key: value for key, value in config.items() if key != 'cache'}, key_input],
+        sort_keys=True,
+        default=str
+    )
+    return f"workflow_node_result:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+def _store(options: Dict[str, Any]):
+    return shared_store if options['backend'] == 'shared' else local_store
+
+def lookup(key: str, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Cached result of a node, a fresh copy on every hit
+
+    Returns:
+        The result dict, None on a miss or when the store fails
+    """
+    try:
+        value = _store(options).get(key)
+        return pickle.loads(value) if value is not None else None
+    except Exception as e:
+        logger.warning(f"Node result cache lookup failed: {str(e)}")
+        return None
+
+def store(key: str, options: Dict[str, Any], result: Any) -> bool:
+    """
+    Store a successful node result
+
+    Lazy row streams are not stored, they would only cache the query.
+    Results reporting success False (e.g. an HTTP status of 400 or above)
+    are not stored either, so the next run retries the call.
+
+    Returns:
+        True if the result was stored
+    """
+    if not isinstance(result, dict) or isinstance(result.get('data'), RowStream):
+        return False
+    if result.get('success') is False:
+        return False
+    try:
+        _store(options).set(key, pickle.dumps(result, pickle.HIGHEST_PROTOCOL), options['ttl'])
+        return True
+    except Exception as e:
+        logger.warning(f"Node result cache store failed: {str(e)}")
+        return False
@@ -0,0 +1,278 @@
+"""
+Out-of-line storage for large node inputs and outputs
+
+Payloads above WORKFLOW_PAYLOAD_INLINE_LIMIT bytes of JSON are compressed
+and written to a content-addressed payload store. The database row keeps a
+reference and a short preview, and the full payload is read back only when
+it is asked for. Blobs no execution references any more are deleted by
+retention.collect_payloads().
+"""
+import os
+import gzip
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .streaming import json_default
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INLINE_LIMIT = 10000
+PREVIEW_LENGTH = 1000
+REFERENCE_KEY = '_payload_ref'
+CODEC_EXTENSIONS = {'zstd': 'zst', 'gzip': 'gz'}
+
+class PayloadStoreError(Exception):
+    """Raised when a payload cannot be written to or read from the store"""
+    pass
+
+class SerializedJSON:
+    """
+    JSON text prepared once by store_payload()
+
+    PayloadJSONEncoder writes the text as is, so the payload is not parsed
+    back into Python objects only to be serialized again on save.
+    """
+    __slots__ = ('json',)
+
+    def __init__(self, json_text: str):
+        self.json = json_text
+
+    def __repr__(self):
+        return f"<SerializedJSON {len(self.json)} bytes>"
+
+class PayloadJSONEncoder(json.JSONEncoder):
+    """JSONField encoder for node data that accepts SerializedJSON values"""
+
+    def encode(self, o):
+        if isinstance(o, SerializedJSON):
+            return o.json
+        return super().encode(o)
+
+    def default(self, o):
+        return json_default(o)
+
+def available_codecs():
+    """Compression codecs usable in this process, preferred first"""
+    if zstandard is not None:
+        return ('zstd', 'gzip')
+    return ('gzip',)
+
+def compress(raw: bytes, codec: str) -> bytes:
+    """Compress bytes with the given codec"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    if codec == 'gzip':
+        return gzip.compress(raw, compresslevel=6)
+    raise PayloadStoreError(f"Unsupported compression codec: {codec}")
+
+def decompress(blob: bytes, codec: str) -> bytes:
+    """Decompress bytes written with the given codec"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise PayloadStoreError("Payload is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if codec == 'gzip':
+        return gzip.decompress(blob)
+    raise PayloadStoreError(f"Unsupported compression codec: {codec}")
+
+class BasePayloadStore:
+    """
+    Interface of a content-addressed blob store
+
+    Keys are derived from the content, so writing the same payload twice is
+    a no-op. An object-store backend only needs to implement these methods.
+    """
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def write(self, key: str, blob: bytes):
+        raise NotImplementedError
+
+    def read(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def touch(self, key: str) -> bool:
+        """Mark a blob as used now (see keys()), False if there is no such blob"""
+        raise NotImplementedError
+
+    def keys(self, unused_since: float) -> Iterator[str]:
+        """Keys of blobs last written or touched before a Unix timestamp"""
+        raise NotImplementedError
+
+class LocalFilePayloadStore(BasePayloadStore):
+    """
+    Payload store on the local filesystem
+
+    Blobs are kept in a two-level directory fan-out under root, e.g.
+    root/ab/cd/abcd....zst, and are written through a temporary file so
+    readers never see a partial blob.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        if root is None:
+            base = getattr(settings, 'MEDIA_ROOT', '') or getattr(settings, 'BASE_DIR', '') or os.getcwd()
+            root = os.path.join(str(base), 'workflow_payloads')
+        self.root = str(root)
+
+    def _path(self, key: str) -> str:
+        digest = key.split(':', 1)[-1]
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def write(self, key: str, blob: bytes):
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def read(self, key: str) -> bytes:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise PayloadStoreError(f"Payload {key} not found")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def touch(self, key: str) -> bool:
+        try:
+            os.utime(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def keys(self, unused_since: float) -> Iterator[str]:
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.startswith('.tmp-'):
+                    continue
+                try:
+                    if os.path.getmtime(os.path.join(directory, filename)) < unused_since:
+                        yield f"sha256:{filename}"
+                except FileNotFoundError:
+                    continue
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_payload_store() -> BasePayloadStore:
+    """
+    Return the configured payload store, created on first use
+
+    WORKFLOW_PAYLOAD_STORE is the dotted path of the store class and
+    WORKFLOW_PAYLOAD_STORE_OPTIONS the keyword arguments it is built with.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_class = import_string(getattr(
+                    settings,
+                    'WORKFLOW_PAYLOAD_STORE',
+                    'apps.workflow_app.payload_store.LocalFilePayloadStore'
+                ))
+                _store = store_class(**getattr(settings, 'WORKFLOW_PAYLOAD_STORE_OPTIONS', {}))
+    return _store
+
+def reset_payload_store():
+    """Forget the configured store, e.g. after settings changed"""
+    global _store
+    with _store_lock:
+        _store = None
+
+def is_payload_reference(value: Any) -> bool:
+    """Check whether stored node data points to an out-of-line payload"""
+    return isinstance(value, dict) and REFERENCE_KEY in value
+
+def store_payload(data: Any, inline_limit: Optional[int] = None) -> Any:
+    """
+    Prepare node data for a JSONField, moving large payloads out of line
+
+    The data is serialized exactly once. Small payloads are returned as
+    SerializedJSON and written as is, large ones are compressed into the
+    payload store and replaced by a reference with a preview.
+
+    Args:
+        data: Node input or output data
+        inline_limit: Largest JSON size kept in the database row
+
+    Returns:
+        SerializedJSON or reference dict
+    """
+    if inline_limit is None:
+        inline_limit = getattr(settings, 'WORKFLOW_PAYLOAD_INLINE_LIMIT', DEFAULT_INLINE_LIMIT)
+
+    json_text = json.dumps(data, default=json_default)
+    if len(json_text) <= inline_limit:
+        return SerializedJSON(json_text)
+
+    raw = json_text.encode('utf-8')
+    preferred = getattr(settings, 'WORKFLOW_PAYLOAD_COMPRESSION', 'zstd')
+    codec = preferred if preferred in available_codecs() else available_codecs()[-1]
+    key = f"sha256:{hashlib.sha256(raw).hexdigest()}.{CODEC_EXTENSIONS[codec]}"
+
+    try:
+        store = get_payload_store()
+        # Touching an existing blob keeps the collector from deleting it before this row is written
+        if not store.touch(key):
+            store.write(key, compress(raw, codec))
+    except Exception as e:
+        # Keep the preview rather than failing the node over its log data
+        logger.error(f"Failed to store payload {key}: {str(e)}")
+        return {'_truncated': True, '_size': len(raw), 'preview': json_text[:PREVIEW_LENGTH]}
+
+    return {
+        REFERENCE_KEY: key,
+        '_codec': codec,
+        '_size': len(raw),
+        '_truncated': True,
+        'preview': json_text[:PREVIEW_LENGTH]
+    }
+
+def load_payload(value: Any) -> Any:
+    """
+    Resolve stored node data, reading out-of-line payloads from the store
+
+    Args:
+        value: input_data or output_data as read from the database
+
+    Returns:
+        Original payload, or the value itself if it is stored inline
+    """
+    if not is_payload_reference(value):
+        return value
+
+    key = value[REFERENCE_KEY]
+    blob = get_payload_store().read(key)
+    return json.loads(decompress(blob, value.get('_codec', 'gzip')).decode('utf-8'))
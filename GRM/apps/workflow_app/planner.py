@@ -0,0 +1,149 @@
+"""
+Compiled workflow plans and their per-process cache
+"""
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+class CompiledWorkflowPlan(Mapping):
+    """
+    Immutable execution plan of one workflow version
+
+    Behaves like the graph dict built by WorkflowEngine._build_execution_graph
+    ('nodes', 'incoming', 'outgoing', 'trigger_nodes', 'execution_order') and
+    also carries one handler instance and one pre-parsed config per node.
+    Plans are shared between executions and threads, so nothing in them may
+    be modified after compilation; handlers must treat their config as
+    read-only.
+    """
+
+    __slots__ = ('key', '_graph', 'handlers', 'configs')
+
+    def __init__(self, key: Hashable, graph: Dict, handlers: Dict[str, Any], configs: Dict[str, Any]):
+        self.key = key
+        self._graph = MappingProxyType({
+            'nodes': MappingProxyType(dict(graph['nodes'])),
+            'incoming': MappingProxyType({
+                node_id: tuple(connections) for node_id, connections in graph['incoming'].items()
+            }),
+            'outgoing': MappingProxyType({
+                node_id: tuple(connections) for node_id, connections in graph['outgoing'].items()
+            }),
+            'trigger_nodes': tuple(graph['trigger_nodes']),
+            'execution_order': tuple(graph['execution_order']),
+        })
+        self.handlers = MappingProxyType(dict(handlers))
+        self.configs = MappingProxyType(dict(configs))
+
+    def __getitem__(self, key):
+        return self._graph[key]
+
+    def __iter__(self):
+        return iter(self._graph)
+
+    def __len__(self):
+        return len(self._graph)
+
+    def __repr__(self):
+        return f"<CompiledWorkflowPlan {self.key!r} ({len(self._graph['nodes'])} nodes)>"
+
+def workflow_plan_key(workflow) -> Tuple:
+    """
+    Cache key of a workflow plan, changes whenever the workflow is saved
+
+    Args:
+        workflow: Workflow instance
+
+    Returns:
+        Tuple of (workflow id, version, updated_at)
+    """
+    return (str(workflow.id), workflow.version, workflow.updated_at)
+
+class WorkflowPlanCache:
+    """
+    Thread-safe LRU cache of compiled workflow plans
+
+    The size is taken from the WORKFLOW_PLAN_CACHE_SIZE setting, 0 disables
+    caching.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self._max_size = max_size
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, 'WORKFLOW_PLAN_CACHE_SIZE', 256)
+
+    def get_or_compile(self, workflow, compile_plan: Callable[[Any], CompiledWorkflowPlan]) -> CompiledWorkflowPlan:
+        """
+        Return the cached plan of a workflow, compiling it on a miss
+
+        Args:
+            workflow: Workflow instance
+            compile_plan: Callable building a CompiledWorkflowPlan from the workflow
+
+        Returns:
+            CompiledWorkflowPlan
+        """
+        key = workflow_plan_key(workflow)
+
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+
+        plan = compile_plan(workflow)
+
+        max_size = self.max_size
+        if max_size <= 0:
+            return plan
+
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > max_size:
+                self._plans.popitem(last=False)
+
+        return plan
+
+    def invalidate(self, workflow_id) -> int:
+        """
+        Drop every cached plan of a workflow
+
+        Args:
+            workflow_id: ID of the workflow
+
+        Returns:
+            int: Number of plans removed
+        """
+        workflow_id = str(workflow_id)
+
+        with self._lock:
+            stale_keys = [key for key in self._plans if key[0] == workflow_id]
+            for key in stale_keys:
+                del self._plans[key]
+
+        if stale_keys:
+            logger.debug(f"Invalidated {len(stale_keys)} compiled plans of workflow {workflow_id}")
+
+        return len(stale_keys)
+
+    def clear(self):
+        """Drop all cached plans"""
+        with self._lock:
+            self._plans.clear()
+
+# Per-process plan cache shared by all engines
+plan_cache = WorkflowPlanCache()
@@ -0,0 +1,95 @@
+"""
+Buffered writer for NodeExecution records
+"""
+import logging
+import threading
+from typing import List
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import NodeExecution
+
+logger = logging.getLogger(__name__)
+
+class NodeExecutionRecorder:
+    """
+    Collects NodeExecution records of one workflow execution in memory and
+    writes them with bulk_create at checkpoints
+
+    A checkpoint is reached every WORKFLOW_NODE_RECORD_FLUSH_EVERY records,
+    whenever a failed record or the record of a side-effecting node is added
+    and when the run ends. If a bulk insert fails the records are written one
+    by one so a single bad row cannot lose the rest of the log.
+
+    A worker killed between checkpoints loses the buffered records, so a
+    resumed execution runs those nodes again. Side-effecting nodes always end
+    with a checkpoint, only side-effect free nodes can be repeated that way.
+    """
+
+    def __init__(self, flush_every: int = None):
+        if flush_every is None:
+            flush_every = getattr(settings, 'WORKFLOW_NODE_RECORD_FLUSH_EVERY', 50)
+
+        self.flush_every = max(1, int(flush_every))
+        self._pending: List[NodeExecution] = []
+        self._lock = threading.Lock()
+
+    def add(self, node_execution: NodeExecution, flush: bool = False) -> NodeExecution:
+        """
+        Buffer a record and flush if a checkpoint is reached
+
+        Args:
+            node_execution: Unsaved NodeExecution instance
+            flush: Force a checkpoint after this record
+
+        Returns:
+            The buffered NodeExecution instance
+        """
+        with self._lock:
+            self._pending.append(node_execution)
+            should_flush = (
+                flush
+                or len(self._pending) >= self.flush_every
+                or node_execution.status == 'failed'
+            )
+
+        if should_flush:
+            self.flush()
+
+        return node_execution
+
+    def flush(self) -> int:
+        """
+        Write all buffered records to the database
+
+        Returns:
+            int: Number of records written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                NodeExecution.objects.bulk_create(pending, batch_size=self.flush_every)
+            return len(pending)
+        except Exception as e:
+            logger.warning(f"Bulk insert of {len(pending)} node execution records failed, writing them one by one: {str(e)}")
+
+        written = 0
+        for node_execution in pending:
+            try:
+                node_execution.save(force_insert=True)
+                written += 1
+            except Exception as e:
+                logger.error(f"Failed to store node execution record for node {node_execution.node_id}: {str(e)}")
+
+        return written
+
+    @property
+    def pending_count(self) -> int:
+        """Number of records waiting to be written"""
+        return len(self._pending)
@@ -0,0 +1,446 @@
+"""
+Execution retention - chunked deletion, cold archive and monthly partition drops
+
+Finished executions older than their workflow's retention window are
+removed in bounded primary-key chunks, each in its own short transaction,
+with a pause between chunks so cleanup never holds long locks or loads
+whole tables into memory. Chunks can be written to gzip-compressed
+JSON-lines archives before they are deleted.
+
+On PostgreSQL the execution tables may be range-partitioned by month on
+started_at (partitions named <table>_pYYYY_MM). Partitions past the
+longest retention window are then dropped whole before the chunked pass.
+
+Afterwards payload store blobs that no execution row references any more
+are collected, see collect_payloads().
+"""
+import os
+import re
+import gzip
+import json
+import time
+import logging
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import Workflow, WorkflowExecution, NodeExecution
+from .payload_store import REFERENCE_KEY, get_payload_store, is_payload_reference, load_payload
+from .streaming import json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 30
+
+# Node records are buffered during an execution, younger blobs may not be referenced yet
+DEFAULT_PAYLOAD_GRACE_SECONDS = 86400
+
+def default_retention_days() -> int:
+    """Days executions of workflows without their own retention_days are kept, 0 keeps them forever"""
+    return getattr(settings, 'WORKFLOW_EXECUTION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+
+def retention_windows() -> List[Tuple[Dict[str, Any], int]]:
+    """
+    Retention windows in use
+
+    Returns:
+        List of (execution lookup, days kept), windows that keep executions forever are left out
+    """
+    windows = []
+    default_days = default_retention_days()
+    if default_days:
+        windows.append(({'workflow__retention_days__isnull': True}, default_days))
+
+    custom_days = Workflow.objects.filter(retention_days__gt=0).values_list(
+        'retention_days', flat=True
+    ).order_by().distinct()
+    for days in sorted(custom_days):
+        windows.append(({'workflow__retention_days': days}, days))
+
+    return windows
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1, tzinfo=pytz.UTC)
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=pytz.UTC)
+
+def _load_archived_payload(value: Any) -> Any:
+    """Resolve a payload reference for the archive, keeping the reference if the blob is gone"""
+    if not is_payload_reference(value):
+        return value
+    try:
+        return load_payload(value)
+    except Exception as e:
+        logger.warning(f"Archiving payload reference {value[REFERENCE_KEY]} unresolved: {str(e)}")
+        return value
+
+def referenced_payloads(using: str = 'default') -> set:
+    """Payload store keys referenced by execution and node execution rows"""
+    references = set()
+    for model, fields in ((NodeExecution, ('input_data', 'output_data')), (WorkflowExecution, ('output_data',))):
+        for field in fields:
+            values = model.objects.using(using).filter(
+                **{f'{field}__has_key': REFERENCE_KEY}
+            ).values_list(field, flat=True).order_by()
+            for value in values.iterator(chunk_size=2000):
+                if is_payload_reference(value):
+                    references.add(value[REFERENCE_KEY])
+    return references
+
+def collect_payloads(grace_seconds: Optional[float] = None, using: str = 'default') -> int:
+    """
+    Delete payload store blobs that no execution row references
+
+    Blobs are shared by every row with the same content, so they are
+    collected by a sweep instead of when a single row is deleted. Blobs
+    written or reused within the grace period are kept, the rows pointing
+    at them may still be buffered by a running execution.
+
+    Args:
+        grace_seconds: Minimum age of a deleted blob (WORKFLOW_PAYLOAD_COLLECT_GRACE by default)
+        using: Database alias of the execution tables
+
+    Returns:
+        int: Number of deleted blobs
+    """
+    if grace_seconds is None:
+        grace_seconds = getattr(settings, 'WORKFLOW_PAYLOAD_COLLECT_GRACE', DEFAULT_PAYLOAD_GRACE_SECONDS)
+
+    # References are read first, blobs touched since then are younger than the cutoff
+    unused_since = time.time() - grace_seconds
+    references = referenced_payloads(using)
+    store = get_payload_store()
+    deleted = 0
+
+    for key in store.keys(unused_since):
+        if key not in references:
+            store.delete(key)
+            deleted += 1
+
+    if deleted:
+        logger.info(f"Deleted {deleted} unreferenced payloads")
+    return deleted
+
+class ExecutionArchiver:
+    """
+    Writes executions and their node records to gzip JSON-lines files
+
+    Each line is one execution with its node executions under
+    "node_executions". Out-of-line payloads are written in full, the
+    archive does not depend on the payload store. Files go to
+    <directory>/YYYY/MM/ and are written through a temporary file, so a
+    partial archive is never left behind.
+    """
+
+    def __init__(self, directory: str, using: str = 'default'):
+        self.directory = str(directory)
+        self.using = using
+
+    def write(self, execution_ids: List[Any]) -> str:
+        """
+        Archive a chunk of executions
+
+        Args:
+            execution_ids: IDs of the executions to archive
+
+        Returns:
+            str: Path of the archive file
+        """
+        node_executions = defaultdict(list)
+        for node in NodeExecution.objects.using(self.using).filter(
+            workflow_execution_id__in=execution_ids
+        ).order_by('execution_order').values():
+            node['input_data'] = _load_archived_payload(node['input_data'])
+            node['output_data'] = _load_archived_payload(node['output_data'])
+            node_executions[node['workflow_execution_id']].append(node)
+
+        now = timezone.now()
+        directory = os.path.join(self.directory, f"{now:%Y}", f"{now:%m}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"executions-{now:%Y%m%dT%H%M%S%f}-{execution_ids[0]}.jsonl.gz")
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                for execution in WorkflowExecution.objects.using(self.using).filter(
+                    id__in=execution_ids
+                ).order_by().values():
+                    execution['output_data'] = _load_archived_payload(execution['output_data'])
+                    execution['node_executions'] = node_executions.get(execution['id'], [])
+                    archive.write((json.dumps(execution, default=json_default) + '\n').encode('utf-8'))
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return path
+
+class ExecutionPartitions:
+    """
+    Monthly range partitions of the execution tables on PostgreSQL
+
+    Converting the tables to partitioned tables is an operational step (the
+    primary keys must include started_at), this class only maintains the
+    partitions of tables that already are partitioned. Other databases
+    report no partitioned tables and everything is a no-op.
+    """
+
+    def __init__(self, using: str = 'default'):
+        self.using = using
+
+    @property
+    def tables(self) -> List[str]:
+        # Node executions reference executions, so they are dropped first
+        return [NodeExecution._meta.db_table, WorkflowExecution._meta.db_table]
+
+    @staticmethod
+    def partition_name(table: str, month: datetime) -> str:
+        return f"{table}_p{month:%Y_%m}"
+
+    def partitioned_tables(self) -> List[str]:
+        """Execution tables that are partitioned, children first"""
+        connection = connections[self.using]
+        if connection.vendor != 'postgresql':
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = ANY(%s)",
+                [self.tables]
+            )
+            partitioned = {row[0] for row in cursor.fetchall()}
+
+        return [table for table in self.tables if table in partitioned]
+
+    def partitions(self, table: str) -> List[Tuple[str, datetime]]:
+        """
+        Monthly partitions of a table
+
+        Returns:
+            List of (partition name, first day of its month), oldest first
+        """
+        pattern = re.compile(rf"^{re.escape(table)}_p(\d{{4}})_(\d{{2}})$")
+
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s",
+                [table]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        partitions = []
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=pytz.UTC)))
+
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def ensure(self, months_ahead: int = 2, now: Optional[datetime] = None) -> List[str]:
+        """
+        Create the partitions of the current and the next months
+
+        Returns:
+            List of partition names that were checked or created
+        """
+        now = now or timezone.now()
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+        created = []
+
+        for table in self.partitioned_tables():
+            for offset in range(months_ahead + 1):
+                month = _add_months(_month_start(now), offset)
+                name = self.partition_name(table, month)
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF {quote(table)} "
+                        f"FOR VALUES FROM (%s) TO (%s)",
+                        [month, _add_months(month, 1)]
+                    )
+                created.append(name)
+
+        return created
+
+    def drop_expired(self, cutoff: datetime) -> List[str]:
+        """
+        Drop partitions whose whole month is older than cutoff
+
+        Returns:
+            List of dropped partition names
+        """
+        connection = connections[self.using]
+        dropped = []
+
+        for table in self.partitioned_tables():
+            for name, month in self.partitions(table):
+                if _add_months(month, 1) > cutoff:
+                    break
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE IF EXISTS {connection.ops.quote_name(name)}")
+                logger.info(f"Dropped expired execution partition {name}")
+                dropped.append(name)
+
+        return dropped
+
+def partition_cutoff(now: datetime) -> Optional[datetime]:
+    """
+    Time before which no workflow keeps executions, None if some keep them forever
+
+    Partitions hold executions of every workflow, so only the longest
+    retention window allows dropping one.
+    """
+    default_days = default_retention_days()
+    if Workflow.objects.filter(retention_days=0).exists():
+        return None
+    if not default_days and Workflow.objects.filter(retention_days__isnull=True).exists():
+        return None
+
+    windows = [days for _, days in retention_windows()]
+    if not windows:
+        return None
+    return now - timedelta(days=max(windows))
+
+class ExecutionRetention:
+    """
+    Deletes finished executions past their workflow's retention window
+
+    Executions are selected in primary-key order, chunk_size at a time.
+    Each chunk is optionally archived and then deleted with two plain
+    DELETE statements (node executions, then executions) in one short
+    transaction, followed by a chunk_delay pause so replicas and other
+    writers keep up. A run stops early after max_runtime seconds, the next
+    run continues where it left off.
+    """
+
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        chunk_delay: Optional[float] = None,
+        archive_dir: Optional[str] = None,
+        max_runtime: Optional[float] = None,
+        using: str = 'default'
+    ):
+        self.chunk_size = chunk_size or getattr(settings, 'WORKFLOW_RETENTION_CHUNK_SIZE', 1000)
+        self.chunk_delay = chunk_delay if chunk_delay is not None else getattr(
+            settings, 'WORKFLOW_RETENTION_CHUNK_DELAY', 0.1
+        )
+        self.archive_dir = archive_dir or getattr(settings, 'WORKFLOW_RETENTION_ARCHIVE_DIR', None)
+        self.max_runtime = max_runtime or getattr(settings, 'WORKFLOW_RETENTION_MAX_RUNTIME', None)
+        self.using = using
+        self.partitions = ExecutionPartitions(using)
+
+    def expired(self, now: Optional[datetime] = None) -> List[Tuple[Dict[str, Any], datetime]]:
+        """
+        Execution lookups and cutoffs of all retention windows
+
+        Returns:
+            List of (execution lookup, cutoff)
+        """
+        now = now or timezone.now()
+        return [(lookup, now - timedelta(days=days)) for lookup, days in retention_windows()]
+
+    def count_expired(self, now: Optional[datetime] = None) -> int:
+        """Number of executions the next run would delete"""
+        return sum(
+            WorkflowExecution.objects.using(self.using).filter(finished_at__lt=cutoff, **lookup).count()
+            for lookup, cutoff in self.expired(now)
+        )
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Apply retention once
+
+        Args:
+            now: Reference time
+
+        Returns:
+            Dict with deleted_executions, deleted_node_executions, dropped_partitions,
+            archive_files, deleted_payloads and completed (False if max_runtime
+            cut the run short)
+        """
+        now = now or timezone.now()
+        deadline = time.monotonic() + self.max_runtime if self.max_runtime else None
+        stats = {
+            'deleted_executions': 0,
+            'deleted_node_executions': 0,
+            'dropped_partitions': [],
+            'archive_files': [],
+            'deleted_payloads': 0,
+            'completed': True,
+        }
+
+        if self.partitions.partitioned_tables():
+            self.partitions.ensure(now=now)
+            cutoff = partition_cutoff(now)
+            if cutoff is not None and not self.archive_dir:
+                # Archiving needs the rows, archived deployments purge partitions chunk by chunk
+                stats['dropped_partitions'] = self.partitions.drop_expired(cutoff)
+
+        for lookup, cutoff in self.expired(now):
+            if not self._purge(lookup, cutoff, stats, deadline):
+                stats['completed'] = False
+                break
+
+        if getattr(settings, 'WORKFLOW_PAYLOAD_COLLECT', True):
+            try:
+                stats['deleted_payloads'] = collect_payloads(using=self.using)
+            except Exception as e:
+                logger.error(f"Payload collection failed: {str(e)}")
+
+        logger.info(
+            f"Retention removed {stats['deleted_executions']} executions, "
+            f"{stats['deleted_node_executions']} node executions and "
+            f"{len(stats['dropped_partitions'])} partitions"
+        )
+        return stats
+
+    def _purge(self, lookup: Dict[str, Any], cutoff: datetime, stats: Dict[str, Any], deadline) -> bool:
+        """Delete one window chunk by chunk, False if the deadline was reached"""
+        executions = WorkflowExecution.objects.using(self.using).filter(finished_at__lt=cutoff, **lookup)
+        last_id = None
+
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.info("Retention run reached its time budget")
+                return False
+
+            chunk = executions if last_id is None else executions.filter(id__gt=last_id)
+            execution_ids = list(chunk.order_by('id').values_list('id', flat=True)[:self.chunk_size])
+            if not execution_ids:
+                return True
+
+            last_id = execution_ids[-1]
+            self._delete_chunk(execution_ids, stats)
+
+            if len(execution_ids) < self.chunk_size:
+                return True
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+
+    def _delete_chunk(self, execution_ids: List[Any], stats: Dict[str, Any]):
+        if self.archive_dir:
+            stats['archive_files'].append(ExecutionArchiver(self.archive_dir, self.using).write(execution_ids))
+
+        # _raw_delete issues a single DELETE without collecting the rows in
+        # memory; nothing listens for execution deletes and the rollup keeps
+        # the history of deleted executions
+        with transaction.atomic(using=self.using):
+            stats['deleted_node_executions'] += NodeExecution.objects.using(self.using).filter(
+                workflow_execution_id__in=execution_ids
+            )._raw_delete(self.using)
+            stats['deleted_executions'] += WorkflowExecution.objects.using(self.using).filter(
+                id__in=execution_ids
+            )._raw_delete(self.using)
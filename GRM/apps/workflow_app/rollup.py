@@ -0,0 +1,231 @@
+"""
+Execution rollups - incrementally maintained ExecutionDailyStats and the dashboard reads built on them
+
+A finished execution adds one to the (workflow, day, status) row of the
+day it started on. Rows are kept when executions are deleted, so dashboard
+totals also cover history removed by retention cleanup.
+"""
+import logging
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ExecutionDailyStats, WorkflowExecution
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('success', 'failed', 'cancelled', 'timeout')
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Fields of an execution that its rollup contribution depends on
+ExecutionSnapshot = namedtuple('ExecutionSnapshot', ['status', 'started_at', 'duration_seconds'])
+
+def execution_snapshot(execution: WorkflowExecution) -> Optional[ExecutionSnapshot]:
+    """Rollup-relevant state of an execution, None if part of it was not loaded"""
+    if execution.get_deferred_fields() & {'status', 'started_at', 'duration_seconds'}:
+        return None
+    return ExecutionSnapshot(execution.status, execution.started_at, execution.duration_seconds)
+
+def _stats_day(started_at=None):
+    """Day an execution is counted on, in the current timezone like started_at__date"""
+    started_at = started_at or timezone.now()
+    if timezone.is_aware(started_at):
+        return timezone.localdate(started_at)
+    return started_at.date()
+
+def _add_to_rollup(workflow_id, snapshot: ExecutionSnapshot, sign: int):
+    """Add (sign=1) or remove (sign=-1) one execution from its rollup row"""
+    day = _stats_day(snapshot.started_at)
+    timed = 1 if snapshot.duration_seconds is not None else 0
+    duration = snapshot.duration_seconds or 0
+    lookup = {'workflow_id': workflow_id, 'day': day, 'status': snapshot.status}
+    changes = {
+        'execution_count': F('execution_count') + sign,
+        'timed_count': F('timed_count') + sign * timed,
+        'total_duration_seconds': F('total_duration_seconds') + sign * duration,
+    }
+
+    if ExecutionDailyStats.objects.filter(**lookup).update(**changes) or sign < 0:
+        return
+
+    try:
+        with transaction.atomic():
+            ExecutionDailyStats.objects.create(
+                execution_count=1,
+                timed_count=timed,
+                total_duration_seconds=duration,
+                **lookup
+            )
+    except IntegrityError:
+        # Another process created the row first
+        ExecutionDailyStats.objects.filter(**lookup).update(**changes)
+
+def record_execution_change(
+    execution: WorkflowExecution,
+    previous: Optional[ExecutionSnapshot],
+    current: Optional[ExecutionSnapshot]
+):
+    """
+    Move an execution's contribution when its status or duration changed
+
+    Args:
+        execution: Saved WorkflowExecution
+        previous: Snapshot taken when the instance was loaded or last saved
+        current: Snapshot after the save
+    """
+    if previous is None or current is None or previous == current:
+        return
+
+    try:
+        if previous.status in FINISHED_STATUSES:
+            _add_to_rollup(execution.workflow_id, previous, -1)
+        if current.status in FINISHED_STATUSES:
+            _add_to_rollup(execution.workflow_id, current, 1)
+    except Exception as e:
+        # Stats are rebuilt by rebuild_execution_stats, never fail the save over them
+        logger.error(f"Failed to update execution stats for {execution.id}: {str(e)}")
+
+def rebuild_execution_stats(since=None, workflow_ids=None) -> int:
+    """
+    Recompute rollup rows from WorkflowExecution
+
+    Only (workflow, day) pairs that still have finished executions are
+    rebuilt, rows of days whose executions were all removed by retention
+    cleanup are kept. A day retention cleanup removed part of is rebuilt
+    from the executions left, so keep since inside the retention window.
+
+    Args:
+        since: First day to rebuild, all history if None
+        workflow_ids: Only rebuild these workflows
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    return rebuild_stats_rows(WorkflowExecution, ExecutionDailyStats, since=since, workflow_ids=workflow_ids)
+
+def rebuild_stats_rows(execution_model, stats_model, since=None, workflow_ids=None) -> int:
+    """
+    rebuild_execution_stats on the given model classes, migrations pass their historical models
+
+    Args:
+        execution_model: WorkflowExecution model class
+        stats_model: ExecutionDailyStats model class
+        since: First day to rebuild, all history if None
+        workflow_ids: Only rebuild these workflows
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    executions = execution_model.objects.filter(
+        status__in=FINISHED_STATUSES
+    ).annotate(stats_day=TruncDate('started_at'))
+
+    if since is not None:
+        executions = executions.filter(stats_day__gte=since)
+    if workflow_ids is not None:
+        executions = executions.filter(workflow_id__in=workflow_ids)
+
+    rows = list(executions.values(
+        'workflow_id', 'stats_day', 'status'
+    ).annotate(
+        execution_count=Count('id'),
+        timed_count=Count('duration_seconds'),
+        total_duration_seconds=Sum('duration_seconds')
+    ).order_by())
+
+    workflows_per_day = defaultdict(set)
+    for row in rows:
+        workflows_per_day[row['stats_day']].add(row['workflow_id'])
+
+    with transaction.atomic():
+        for day, day_workflow_ids in workflows_per_day.items():
+            stats_model.objects.filter(day=day, workflow_id__in=day_workflow_ids).delete()
+
+        created = stats_model.objects.bulk_create([
+            stats_model(
+                workflow_id=row['workflow_id'],
+                day=row['stats_day'],
+                status=row['status'],
+                execution_count=row['execution_count'],
+                timed_count=row['timed_count'],
+                total_duration_seconds=row['total_duration_seconds'] or 0
+            )
+            for row in rows
+        ], batch_size=1000)
+
+    return len(created)
+
+def _workflow_lookup(workflow_filter: Dict[str, Any]) -> Dict[str, Any]:
+    return {f'workflow__{key}': value for key, value in workflow_filter.items()}
+
+def get_execution_totals(**workflow_filter) -> Dict[str, Any]:
+    """
+    Execution counts per status and average duration from the rollup
+
+    Queued and running executions are counted live, they are few and the
+    (status, started_at) index covers them.
+
+    Args:
+        **workflow_filter: Workflow lookups, e.g. created_by_id=1 or id=workflow_id
+
+    Returns:
+        Dict with total, per-status counts and avg_duration_seconds
+    """
+    lookup = _workflow_lookup(workflow_filter)
+    counts = {status: 0 for status in FINISHED_STATUSES + ACTIVE_STATUSES}
+    timed_count = 0
+    total_duration = 0.0
+
+    for row in ExecutionDailyStats.objects.filter(**lookup).values('status').annotate(
+        executions=Sum('execution_count'),
+        timed=Sum('timed_count'),
+        duration=Sum('total_duration_seconds')
+    ).order_by():
+        counts[row['status']] = row['executions'] or 0
+        timed_count += row['timed'] or 0
+        total_duration += row['duration'] or 0
+
+    for row in WorkflowExecution.objects.filter(status__in=ACTIVE_STATUSES, **lookup).values(
+        'status'
+    ).annotate(executions=Count('id')).order_by():
+        counts[row['status']] = row['executions']
+
+    counts['total'] = sum(counts.values())
+    counts['avg_duration_seconds'] = total_duration / timed_count if timed_count else 0
+    return counts
+
+def get_daily_execution_counts(days: int = 7, **workflow_filter) -> List[Dict[str, Any]]:
+    """
+    Successful and failed executions per day for the dashboard charts
+
+    Args:
+        days: Number of days ending today
+        **workflow_filter: Workflow lookups, e.g. created_by_id=1
+
+    Returns:
+        List of {'day', 'successful', 'failed'} dicts, oldest first
+    """
+    today = _stats_day()
+    first_day = today - timedelta(days=days - 1)
+    per_day = {}
+
+    for row in ExecutionDailyStats.objects.filter(
+        day__gte=first_day,
+        status__in=('success', 'failed'),
+        **_workflow_lookup(workflow_filter)
+    ).values('day', 'status').annotate(executions=Sum('execution_count')).order_by():
+        per_day[(row['day'], row['status'])] = row['executions'] or 0
+
+    return [
+        {
+            'day': day.strftime('%m/%d'),
+            'successful': per_day.get((day, 'success'), 0),
+            'failed': per_day.get((day, 'failed'), 0)
+        }
+        for day in (first_day + timedelta(days=offset) for offset in range(days))
+    ]
@@ -7,17 +7,21 @@ from typing import List, Dict, Any, Optional
 from croniter import croniter
 from django.utils import timezone
 from django.conf import settings
-from django_celery_beat.models import PeriodicTask, CrontabSchedule
-import json
+from django_celery_beat.models import PeriodicTask
 
 from .models import Workflow, WorkflowSchedule, WorkflowExecution
-from .tasks import execute_workflow_task
+from .tasks import dispatch_executions
+from .webhooks import trigger_counter
+from .cron_scheduler import next_run_time
 
 logger = logging.getLogger(__name__)
 
 class WorkflowScheduler:
     """
-    Manages workflow scheduling using django-celery-beat
+    Manages workflow schedules
+    
+    Schedules are WorkflowSchedule rows fired by CronScheduler (the
+    process_scheduled_workflows task or the run_scheduler command).
     """
     
     def __init__(self):
@@ -45,35 +49,8 @@ class WorkflowScheduler:
             if len(cron_parts) != 5:
                 raise ValueError("Cron expression must have 5 parts: minute hour day month weekday")
             
-            minute, hour, day, month, day_of_week = cron_parts
-            
-            # Create or get crontab schedule
-            crontab, created = CrontabSchedule.objects.get_or_create(
-                minute=minute,
-                hour=hour,
-                day_of_month=day,
-                month_of_year=month,
-                day_of_week=day_of_week,
-                timezone=timezone_str
-            )
-            
-            # Create periodic task
-            task_name = f"workflow_{workflow.id}_{workflow.name}"
-            periodic_task, created = PeriodicTask.objects.get_or_create(
-                name=task_name,
-                defaults={
-                    'crontab': crontab,
-                    'task': 'apps.workflow_app.tasks.execute_scheduled_workflow',
-                    'args': json.dumps([str(workflow.id)]),
-                    'enabled': True,
-                }
-            )
-            
-            if not created:
-                # Update existing task
-                periodic_task.crontab = crontab
-                periodic_task.enabled = True
-                periodic_task.save()
+            # CronScheduler fires the schedule, a beat entry would fire every due time a second time
+            self._remove_periodic_task(workflow)
             
             # Create or update workflow schedule
             schedule, created = WorkflowSchedule.objects.get_or_create(
@@ -97,7 +74,7 @@ class WorkflowScheduler:
             workflow.is_scheduled = True
             workflow.cron_expression = cron_expression
             workflow.timezone = timezone_str
-            workflow.save()
+            workflow.save(update_fields=['is_scheduled', 'cron_expression', 'timezone', 'updated_at'])
             
             self.logger.info(f"Scheduled workflow '{workflow.name}' with cron '{cron_expression}'")
             
@@ -107,6 +84,13 @@ class WorkflowScheduler:
             self.logger.error(f"Failed to schedule workflow {workflow.id}: {str(e)}")
             raise
     
+    def _remove_periodic_task(self, workflow: Workflow):
+        """Delete the django-celery-beat entry older versions created for a workflow"""
+        PeriodicTask.objects.filter(
+            name__startswith=f"workflow_{workflow.id}_",
+            task='apps.workflow_app.tasks.execute_scheduled_workflow'
+        ).delete()
+    
     def unschedule_workflow(self, workflow: Workflow) -> bool:
         """
         Remove workflow from schedule
@@ -118,16 +102,14 @@ class WorkflowScheduler:
             True if successful
         """
         try:
-            # Remove periodic task
-            task_name = f"workflow_{workflow.id}_{workflow.name}"
-            PeriodicTask.objects.filter(name=task_name).delete()
+            self._remove_periodic_task(workflow)
             
             # Deactivate schedule
             WorkflowSchedule.objects.filter(workflow=workflow).update(is_active=False)
             
             # Update workflow
             workflow.is_scheduled = False
-            workflow.save()
+            workflow.save(update_fields=['is_scheduled', 'updated_at'])
             
             self.logger.info(f"Unscheduled workflow '{workflow.name}'")
             
@@ -226,15 +208,8 @@ class WorkflowScheduler:
             Next execution datetime
         """
         try:
-            import pytz
-            tz = pytz.timezone(timezone_str)
-            now = timezone.now().astimezone(tz)
-            
-            cron = croniter(cron_expression, now)
-            next_time = cron.get_next(datetime)
-            
-            # Convert back to UTC
-            return next_time.astimezone(pytz.UTC)
+            # Compiled cron objects are cached per (expression, timezone)
+            return next_run_time(cron_expression, timezone_str)
             
         except Exception as e:
             self.logger.error(f"Failed to calculate next execution: {str(e)}")
@@ -326,13 +301,11 @@ class TriggerManager:
             }
         )
         
-        # Update webhook stats
-        webhook.last_triggered_at = timezone.now()
-        webhook.trigger_count += 1
-        webhook.save()
+        # Update webhook stats atomically, a full save() would race with other hits
+        trigger_counter.record(webhook.id)
         
         # Execute workflow asynchronously
-        execute_workflow_task.delay(str(execution.id))
+        dispatch_executions([execution])
         
         self.logger.info(f"Triggered workflow '{webhook.workflow.name}' via webhook {webhook.endpoint_path}")
         
@@ -362,7 +335,7 @@ class TriggerManager:
         )
         
         # Execute workflow asynchronously
-        execute_workflow_task.delay(str(execution.id))
+        dispatch_executions([execution])
         
         self.logger.info(f"Manually triggered workflow '{workflow.name}' by user {user.username}")
         
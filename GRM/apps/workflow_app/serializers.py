@@ -30,26 +30,27 @@ class WorkflowVariableSerializer(serializers.ModelSerializer):
         return data
 
 class WorkflowSerializer(serializers.ModelSerializer):
-    execution_count = serializers.SerializerMethodField()
-    last_execution_status = serializers.SerializerMethodField()
-
     class Meta:
         model = Workflow
         fields = [
             'id', 'name', 'description', 'status', 'version', 'definition',
-            'timeout_seconds', 'max_retries', 'retry_delay_seconds',
+            'timeout_seconds', 'max_retries', 'retry_delay_seconds', 'max_parallel_nodes', 'retention_days',
             'is_scheduled', 'cron_expression', 'timezone', 'tags',
-            'created_by_id', 'execution_count', 'last_execution_status',
+            'created_by_id', 'execution_count', 'last_execution_status', 'last_execution_duration',
+            'node_count', 'connection_count',
             'created_at', 'updated_at', 'last_executed_at'
         ]
-        read_only_fields = ['id', 'created_by_id', 'version', 'created_at', 'updated_at', 'last_executed_at']
+        read_only_fields = [
+            'id', 'created_by_id', 'version', 'created_at', 'updated_at', 'last_executed_at',
+            'execution_count', 'last_execution_status', 'last_execution_duration',
+            'node_count', 'connection_count'
+        ]
 
-    def get_execution_count(self, obj):
-        return obj.executions.count()
+class WorkflowListSerializer(WorkflowSerializer):
+    """Workflow summary for list endpoints, without the definition"""
 
-    def get_last_execution_status(self, obj):
-        last_execution = obj.executions.first()
-        return last_execution.status if last_execution else None
+    class Meta(WorkflowSerializer.Meta):
+        fields = [field for field in WorkflowSerializer.Meta.fields if field != 'definition']
 
 class NodeExecutionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -57,9 +58,10 @@ class NodeExecutionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'node_id', 'node_type', 'node_name', 'status',
             'execution_order', 'started_at', 'finished_at', 'duration_ms',
-            'input_data', 'output_data', 'error_message', 'error_details'
+            'input_data', 'output_data', 'error_message', 'error_details',
+            'cache_hit'
         ]
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'cache_hit']
 
 class WorkflowExecutionSerializer(serializers.ModelSerializer):
     workflow_name = serializers.CharField(source='workflow.name', read_only=True)
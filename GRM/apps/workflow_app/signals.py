@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
-from .models import Workflow, WorkflowExecution, NodeType
+from .models import Workflow, WorkflowExecution, WorkflowWebhook, NodeType
+from .planner import plan_cache
+from .webhooks import endpoint_cache
+from .rollup import execution_snapshot, record_execution_change
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,23 +14,64 @@ def workflow_saved(sender, instance, created, **kwargs):
     """Clear cache when workflow is saved"""
     cache_key = f"workflow_{instance.id}"
     cache.delete(cache_key)
+    plan_cache.invalidate(instance.id)
+    
+    # Webhook endpoints are only served while their workflow is active
+    if not created:
+        endpoint_cache.invalidate(*WorkflowWebhook.objects.filter(
+            workflow_id=instance.id
+        ).values_list('endpoint_path', flat=True))
     
     if created:
         logger.info(f"New workflow created: {instance.name} (ID: {instance.id})")
     else:
         logger.info(f"Workflow updated: {instance.name} (ID: {instance.id})")
 
+@receiver(post_init, sender=WorkflowExecution)
+def execution_loaded(sender, instance, **kwargs):
+    """Remember the state the execution's rollup contribution is based on"""
+    instance._stats_snapshot = execution_snapshot(instance)
+
 @receiver(post_save, sender=WorkflowExecution)
 def execution_saved(sender, instance, created, **kwargs):
-    """Log execution status changes"""
+    """Log execution status changes and keep ExecutionDailyStats up to date"""
+    snapshot = execution_snapshot(instance)
+    record_execution_change(instance, getattr(instance, '_stats_snapshot', None), snapshot)
+    instance._stats_snapshot = snapshot
+    
+    # Avoid a query per execution when only the workflow id is loaded (webhook fast path)
+    if WorkflowExecution.workflow.is_cached(instance):
+        workflow_label = instance.workflow.name
+    else:
+        workflow_label = instance.workflow_id
+    
     if created:
-        logger.info(f"Execution started for workflow {instance.workflow.name}: {instance.id}")
+        logger.info(f"Execution started for workflow {workflow_label}: {instance.id}")
     elif instance.status in ['completed', 'failed', 'cancelled']:
-        logger.info(f"Execution {instance.status} for workflow {instance.workflow.name}: {instance.id}")
+        logger.info(f"Execution {instance.status} for workflow {workflow_label}: {instance.id}")
 
 @receiver(post_delete, sender=Workflow)
 def workflow_deleted(sender, instance, **kwargs):
     """Clean up when workflow is deleted"""
     cache_key = f"workflow_{instance.id}"
     cache.delete(cache_key)
+    plan_cache.invalidate(instance.id)
     logger.info(f"Workflow deleted: {instance.name} (ID: {instance.id})")
+
+@receiver(pre_save, sender=WorkflowWebhook)
+def webhook_saving(sender, instance, **kwargs):
+    """Remember the stored endpoint path so a renamed endpoint stops resolving"""
+    instance._previous_endpoint_path = WorkflowWebhook.objects.filter(
+        pk=instance.pk
+    ).values_list('endpoint_path', flat=True).first()
+
+@receiver(post_save, sender=WorkflowWebhook)
+def webhook_saved(sender, instance, **kwargs):
+    """Drop the cached endpoint when a webhook changes"""
+    previous_path = getattr(instance, '_previous_endpoint_path', None)
+    endpoint_cache.invalidate(*{path for path in (instance.endpoint_path, previous_path) if path})
+
+@receiver(post_delete, sender=WorkflowWebhook)
+def webhook_deleted(sender, instance, **kwargs):
+    """Drop the cached endpoint when a webhook is deleted"""
+    endpoint_cache.invalidate(instance.endpoint_path)
@@ -404,7 +404,7 @@ class NodePalette {
             {
               name: "format",
               type: "select",
-              options: ["json", "csv", "txt"],
+              options: ["json", "jsonl", "csv", "txt"],
               default: "json",
               label: "Format",
             },
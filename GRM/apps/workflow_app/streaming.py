@@ -0,0 +1,189 @@
+"""
+Lazy row streams passed between data, transform and output nodes
+"""
+import logging
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2000
+
+class RowStream:
+    """
+    Re-iterable, lazily evaluated sequence of row dicts
+
+    Every iteration calls the source factory again, so a stream backed by a
+    query re-runs the query instead of keeping rows in memory. map() and
+    filter() return new streams and do no work until they are iterated.
+    """
+
+    def __init__(self, source: Callable[[], Iterator[Any]], description: str = 'rows'):
+        self._source = source
+        self.description = description
+
+    @classmethod
+    def from_query(
+        cls,
+        query: str,
+        params: Optional[List[Any]] = None,
+        using: str = 'default',
+        chunk_size: Optional[int] = None
+    ) -> 'RowStream':
+        """
+        Stream the rows of a SELECT through a server-side cursor
+
+        Args:
+            query: SQL query
+            params: Query parameters
+            using: Database alias
+            chunk_size: Rows fetched per fetchmany() call
+
+        Returns:
+            RowStream executing the query when iterated
+        """
+        if chunk_size is None:
+            chunk_size = getattr(settings, 'WORKFLOW_STREAM_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        params = list(params or [])
+
+        def source():
+            return _iterate_query(query, params, using, int(chunk_size))
+
+        return cls(source, f"query on '{using}': {query.strip()[:200]}")
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._source())
+
+    def map(self, function: Callable[[Any], Any]) -> 'RowStream':
+        """Lazily apply a function to every row"""
+        return RowStream(lambda: map(function, self), f"map of {self.description}")
+
+    def filter(self, predicate: Callable[[Any], bool]) -> 'RowStream':
+        """Lazily keep the rows the predicate accepts"""
+        return RowStream(lambda: filter(predicate, self), f"filter of {self.description}")
+
+    def materialize(self, limit: Optional[int] = None) -> List[Any]:
+        """
+        Read the stream into a list
+
+        Args:
+            limit: Maximum number of rows to read
+
+        Returns:
+            List of rows
+        """
+        if limit is None:
+            return list(self)
+        return list(islice(self, limit))
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON-safe placeholder used when the stream is stored or logged"""
+        return {'_stream': True, 'description': self.description}
+
+    def __repr__(self):
+        return f"<RowStream {self.description}>"
+
+def _open_server_side_cursor(connection):
+    """
+    Open a cursor that fetches rows from the server in chunks
+
+    PostgreSQL gets a named cursor through Django's chunked_cursor(). MySQL
+    uses an unbuffered SSCursor, since the default cursor downloads the
+    whole result set on execute(). An unbuffered MySQL connection accepts no
+    other statement until the result is read, while a database_save fed by
+    the stream or the node execution records write to the same alias, so
+    the SSCursor gets a connection of its own.
+
+    Returns:
+        Tuple of the cursor and the dedicated connection to close after it, or None
+    """
+    if connection.vendor == 'mysql':
+        try:
+            from MySQLdb.cursors import SSCursor
+        except ImportError:
+            SSCursor = None
+
+        if SSCursor is not None:
+            dedicated = connection.get_new_connection(connection.get_connection_params())
+            return dedicated.cursor(SSCursor), dedicated
+
+    connection.ensure_connection()
+    return connection.chunked_cursor(), None
+
+def _iterate_query(query: str, params: List[Any], using: str, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    """Yield the rows of a query as dicts, fetching chunk_size rows at a time"""
+    cursor, dedicated = _open_server_side_cursor(connections[using])
+    try:
+        cursor.execute(query, params)
+        columns = [col[0] for col in cursor.description]
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(columns, row))
+    finally:
+        cursor.close()
+        if dedicated is not None:
+            dedicated.close()
+
+def fetch_rows(
+    query: str,
+    params: Optional[List[Any]] = None,
+    stream: bool = False,
+    using: str = 'default',
+    chunk_size: Optional[int] = None
+):
+    """
+    Run a SELECT and return its rows as a list or as a lazy RowStream
+
+    Args:
+        query: SQL query
+        params: Query parameters
+        stream: Return a RowStream instead of fetching every row
+        using: Database alias
+        chunk_size: Rows fetched per round trip when streaming
+
+    Returns:
+        List of row dicts, or RowStream if stream is True
+    """
+    if stream:
+        return RowStream.from_query(query, params, using=using, chunk_size=chunk_size)
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(query, params or [])
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def materialize_streams(data: Any) -> Any:
+    """
+    Replace RowStreams in node data by lists, for handlers that need random access
+
+    Args:
+        data: Node input data, a stream or a dict of merged inputs
+
+    Returns:
+        Data without RowStream values
+    """
+    if isinstance(data, RowStream):
+        return data.materialize()
+    if isinstance(data, dict) and any(isinstance(value, RowStream) for value in data.values()):
+        return {
+            key: value.materialize() if isinstance(value, RowStream) else value
+            for key, value in data.items()
+        }
+    return data
+
+def is_stream(data: Any) -> bool:
+    """Check whether node data is a RowStream"""
+    return isinstance(data, RowStream)
+
+def json_default(value: Any) -> Any:
+    """json.dumps default that stores streams as placeholders instead of reading them"""
+    if isinstance(value, RowStream):
+        return value.describe()
+    return str(value)
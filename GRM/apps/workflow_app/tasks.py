@@ -12,16 +12,22 @@ def execute_workflow_task(self, execution_id: str):
     """
     Celery task to execute a workflow asynchronously
     
+    Retries resume the execution: nodes that already succeeded keep their
+    outputs and only the failed node and everything after it run again,
+    unless WORKFLOW_RESUME_ON_RETRY is False.
+    
     Args:
         execution_id: UUID of the WorkflowExecution to run
     """
     try:
+        from django.conf import settings
         from .engine import WorkflowEngine
         
-        logger.info(f"Starting workflow execution task for execution {execution_id}")
+        resume = self.request.retries > 0 and getattr(settings, 'WORKFLOW_RESUME_ON_RETRY', True)
+        logger.info(f"Starting workflow execution task for execution {execution_id}{' (resuming)' if resume else ''}")
         
         engine = WorkflowEngine()
-        success = engine.execute_workflow(execution_id)
+        success = engine.execute_workflow(execution_id, resume=resume)
         
         if success:
             logger.info(f"Workflow execution {execution_id} completed successfully")
@@ -56,70 +62,175 @@ def execute_workflow_task(self, execution_id: str):
         raise
 
 @shared_task
-def cleanup_old_executions():
+def execute_workflows_async_task(execution_ids):
     """
-    Clean up old workflow executions to prevent database bloat
+    Celery task to execute a batch of workflows on a single event loop
+
+    I/O-bound workflows (HTTP requests, webhooks, delays) spend most of their
+    time waiting, so one worker process can drive many of them at once.
+    dispatch_executions() queues executions here when WORKFLOW_ASYNC_EXECUTION
+    is enabled for their workflow.
+
+    Args:
+        execution_ids: UUIDs of the WorkflowExecutions to run
     """
-    from datetime import timedelta
+    import asyncio
+    from .async_engine import AsyncWorkflowEngine
+
+    execution_ids = [str(execution_id) for execution_id in execution_ids]
+    logger.info(f"Starting async workflow execution task for {len(execution_ids)} executions")
+
+    engine = AsyncWorkflowEngine()
+    outcomes = asyncio.run(engine.aexecute_many(execution_ids))
+
+    return {
+        'results': [
+            {'execution_id': execution_id, 'success': success}
+            for execution_id, success in outcomes.items()
+        ],
+        'completed_at': timezone.now().isoformat()
+    }
+
+def dispatch_executions(executions):
+    """
+    Queue executions on the engine their workflow prefers
+    
+    Executions of workflows selected by WORKFLOW_ASYNC_EXECUTION (see
+    async_engine.prefers_async_engine) are sent together to one
+    execute_workflows_async_task, all others to execute_workflow_task.
+    
+    Args:
+        executions: WorkflowExecution instances to run
+    """
+    from django.conf import settings
+    from .models import Workflow, WorkflowExecution
+    
+    executions = list(executions)
+    async_ids = []
+    
+    if getattr(settings, 'WORKFLOW_ASYNC_EXECUTION', False):
+        from .async_engine import prefers_async_engine
+        
+        workflows = {
+            execution.workflow_id: execution.workflow
+            for execution in executions
+            if WorkflowExecution.workflow.is_cached(execution)
+        }
+        missing = {execution.workflow_id for execution in executions} - set(workflows)
+        if missing:
+            workflows.update(
+                (workflow.id, workflow)
+                for workflow in Workflow.objects.filter(id__in=missing).only('id', 'definition')
+            )
+        
+        async_ids = [
+            str(execution.id) for execution in executions
+            if execution.workflow_id in workflows and prefers_async_engine(workflows[execution.workflow_id])
+        ]
+        if async_ids:
+            execute_workflows_async_task.delay(async_ids)
+    
+    for execution in executions:
+        if str(execution.id) not in async_ids:
+            execute_workflow_task.delay(str(execution.id))
+
+@shared_task
+def ingest_webhook_task(execution_id: str, webhook_id: str, workflow_id: str,
+                        body, content_type: str, headers: dict):
+    """
+    Create and run the execution of a webhook call queued by the receiver
+
+    The receiver only enqueues the raw request, so a burst of calls costs
+    one broker publish each and the execution rows are written here.
+
+    Args:
+        execution_id: UUID reserved for the execution by the receiver
+        webhook_id: UUID of the WorkflowWebhook that was called
+        workflow_id: UUID of the workflow to run
+        body: Raw JSON body text, or the already parsed form data
+        content_type: Request content type
+        headers: Request headers
+    """
+    import json
+    from django.conf import settings
     from .models import WorkflowExecution
+    from .engine import WorkflowEngine
+    from .async_engine import AsyncWorkflowEngine, prefers_async_engine
     
-    # Delete executions older than 30 days
-    cutoff_date = timezone.now() - timedelta(days=30)
+    if content_type == 'application/json':
+        try:
+            request_data = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            request_data = {}
+    else:
+        request_data = body
     
-    deleted_count = WorkflowExecution.objects.filter(
-        finished_at__lt=cutoff_date
-    ).delete()[0]
+    # get_or_create keeps retries from creating a second execution
+    execution, _ = WorkflowExecution.objects.get_or_create(
+        id=execution_id,
+        defaults={
+            'workflow_id': workflow_id,
+            'triggered_by': 'webhook',
+            'input_data': request_data,
+            'execution_context': {
+                'webhook_id': webhook_id,
+                'webhook_data': request_data,
+                'request_headers': headers
+            }
+        }
+    )
     
-    logger.info(f"Cleaned up {deleted_count} old workflow executions")
+    if execution.status != 'queued':
+        logger.info(f"Webhook execution {execution_id} already {execution.status}, skipping")
+        return {'execution_id': execution_id, 'success': execution.status == 'success'}
+    
+    if getattr(settings, 'WORKFLOW_ASYNC_EXECUTION', False) and prefers_async_engine(execution.workflow):
+        engine = AsyncWorkflowEngine()
+    else:
+        engine = WorkflowEngine()
+    success = engine.execute_workflow(execution_id)
     
-    return {'deleted_count': deleted_count}
+    return {
+        'execution_id': execution_id,
+        'success': success,
+        'completed_at': timezone.now().isoformat()
+    }
 
 @shared_task
-def process_scheduled_workflows():
+def cleanup_old_executions():
     """
-    Process workflows that are scheduled to run
+    Clean up old workflow executions to prevent database bloat
+    
+    Executions past their workflow's retention window are deleted in small
+    chunks, see retention.ExecutionRetention for the settings.
     """
-    from .models import Workflow, WorkflowExecution
-    from django.db.models import Q
+    from .retention import ExecutionRetention
     
-    # Find workflows that should be executed
-    now = timezone.now()
+    result = ExecutionRetention().run()
     
-    scheduled_workflows = Workflow.objects.filter(
-        status='active',
-        is_scheduled=True,
-        schedule__is_active=True,
-        schedule__next_execution_at__lte=now
-    ).select_related('schedule')
+    logger.info(f"Cleaned up {result['deleted_executions']} old workflow executions")
     
-    executed_count = 0
+    return {
+        'deleted_count': result['deleted_executions'],
+        'deleted_node_executions': result['deleted_node_executions'],
+        'dropped_partitions': result['dropped_partitions'],
+        'archive_files': result['archive_files'],
+        'deleted_payloads': result['deleted_payloads'],
+        'completed': result['completed']
+    }
+
+@shared_task
+def process_scheduled_workflows():
+    """
+    Process workflows that are scheduled to run
     
-    for workflow in scheduled_workflows:
-        try:
-            # Create execution
-            execution = WorkflowExecution.objects.create(
-                workflow=workflow,
-                triggered_by='scheduled',
-                input_data={},
-                execution_context={'scheduled': True}
-            )
-            
-            # Execute asynchronously
-            execute_workflow_task.delay(str(execution.id))
-            
-            # Update next execution time
-            schedule = workflow.schedule
-            # This would calculate next execution time based on cron expression
-            # For now, just increment by 1 hour as placeholder
-            schedule.next_execution_at = now + timedelta(hours=1)
-            schedule.last_executed_at = now
-            schedule.execution_count += 1
-            schedule.save()
-            
-            executed_count += 1
-            
-        except Exception as e:
-            logger.error(f"Failed to schedule workflow {workflow.id}: {str(e)}")
+    Due schedules are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+    overlapping runs of this task and the run_scheduler command never fire
+    the same due time twice.
+    """
+    from .cron_scheduler import CronScheduler
+    
+    executed_count = CronScheduler().run_once()
     
     logger.info(f"Scheduled {executed_count} workflows for execution")
     
@@ -130,11 +241,19 @@ def execute_scheduled_workflow(workflow_id: str):
     """
     Execute a scheduled workflow
     
+    Only django-celery-beat entries created by older versions call this.
+    Workflows with an active WorkflowSchedule are fired by CronScheduler,
+    which claims each due time once, so they are skipped here.
+    
     Args:
         workflow_id: UUID of the workflow to execute
     """
     try:
-        from .models import Workflow, WorkflowExecution
+        from .models import Workflow, WorkflowExecution, WorkflowSchedule
+        
+        if WorkflowSchedule.objects.filter(workflow_id=workflow_id, is_active=True).exists():
+            logger.info(f"Workflow {workflow_id} is fired by the cron scheduler, skipping beat entry")
+            return {'workflow_id': workflow_id, 'status': 'skipped'}
         
         workflow = Workflow.objects.get(id=workflow_id, status='active')
         
@@ -147,7 +266,7 @@ def execute_scheduled_workflow(workflow_id: str):
         )
         
         # Execute the workflow
-        execute_workflow_task.delay(str(execution.id))
+        dispatch_executions([execution])
         
         logger.info(f"Scheduled execution created for workflow {workflow.name}")
         
@@ -187,31 +306,30 @@ def update_schedule_next_executions():
     Update next execution times for all active schedules
     """
     from .models import WorkflowSchedule
-    from .scheduler import WorkflowScheduler
+    from .cron_scheduler import next_run_time
     
-    scheduler = WorkflowScheduler()
-    updated_count = 0
+    now = timezone.now()
+    changed = []
     
     active_schedules = WorkflowSchedule.objects.filter(
         is_active=True,
         workflow__status='active'
-    )
+    ).only('id', 'cron_expression', 'timezone', 'next_execution_at').iterator(chunk_size=2000)
     
     for schedule in active_schedules:
         try:
-            next_execution = scheduler._calculate_next_execution(
-                schedule.cron_expression,
-                schedule.timezone
-            )
+            next_execution = next_run_time(schedule.cron_expression, schedule.timezone, now)
             
             if next_execution != schedule.next_execution_at:
                 schedule.next_execution_at = next_execution
-                schedule.save()
-                updated_count += 1
+                changed.append(schedule)
                 
         except Exception as e:
             logger.error(f"Failed to update schedule {schedule.id}: {str(e)}")
     
+    WorkflowSchedule.objects.bulk_update(changed, ['next_execution_at'], batch_size=500)
+    updated_count = len(changed)
+    
     logger.info(f"Updated next execution times for {updated_count} schedules")
     
     return {'updated_count': updated_count}
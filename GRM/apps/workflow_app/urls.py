@@ -22,6 +22,7 @@ urlpatterns = [
     path('api/dashboard/stats/', api_views.dashboard_stats_api, name='dashboard_stats'),
     path('api/dashboard/recent-activity/', api_views.recent_activity_api, name='recent_activity'),
     path('api/executions/<uuid:execution_id>/logs/', api_views.execution_logs_api, name='execution_logs'),
+    path('api/executions/<uuid:execution_id>/nodes/<uuid:node_execution_id>/<str:field>/', api_views.node_payload_api, name='node_payload'),
     path('api/workflows/<uuid:workflow_id>/test/', api_views.test_workflow_api, name='test_workflow'),
     
     # Main views
@@ -1,17 +1,217 @@
 """
 Utility classes for workflow execution
 """
+import os
 import re
 import json
-from typing import Dict, Any, Optional
+import time
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple, Callable
 from django.template import Template, Context
 from django.template.engine import Engine
+from django.utils import timezone
+
+from .expressions import ALLOWED_FUNCTIONS, compile_expression as compile_safe_expression
+
+VARIABLE_PATTERN = re.compile(r'\{\{([^}]+)\}\}')
+
+class TemplateAccessor:
+    """Pre-parsed {{...}} expression with its dotted path already split"""
+    
+    __slots__ = ('root', 'path', 'evaluate')
+    
+    def __init__(self, root: str, path: Optional[Tuple[str, ...]] = None):
+        self.root = root
+        self.path = path
+        
+        # Pick the evaluation function once instead of re-checking the root on every render
+        if root == 'input':
+            self.evaluate = lambda context, input_data: get_path_value(input_data.get('data', {}), path)
+        elif root == 'context':
+            self.evaluate = lambda context, input_data: get_path_value(context, path)
+        elif root == 'variables':
+            self.evaluate = lambda context, input_data: get_path_value(context.get('variables', {}), path)
+        elif root == 'now':
+            self.evaluate = _current_iso_time
+        elif root == 'timestamp':
+            self.evaluate = _current_timestamp
+        elif root == 'env':
+            self.evaluate = lambda context, input_data: os.getenv(path[0], '')
+        else:
+            raise ValueError(f"Unknown template root: {root}")
+
+def _current_iso_time(context: Dict[str, Any], input_data: Dict[str, Any]) -> str:
+    return timezone.now().isoformat()
+
+def _current_timestamp(context: Dict[str, Any], input_data: Dict[str, Any]) -> str:
+    return str(int(time.time()))
+
+class CompiledTemplate:
+    """
+    A config string split into literal chunks and TemplateAccessors
+    
+    Rendering only evaluates the accessors and joins the chunks.
+    """
+    
+    __slots__ = ('source', 'chunks')
+    
+    def __init__(self, source: str, chunks: Tuple[Any, ...]):
+        self.source = source
+        self.chunks = chunks
+    
+    def render(self, context: Dict[str, Any], input_data: Dict[str, Any]) -> str:
+        return ''.join([
+            chunk if chunk.__class__ is str else str(chunk.evaluate(context, input_data))
+            for chunk in self.chunks
+        ])
+
+class CompiledConfig:
+    """
+    Node configuration with every templated string pre-compiled
+    
+    Static parts of the configuration are returned as they are, so a config
+    without any {{...}} renders to the original object without copying.
+    """
+    
+    __slots__ = ('value', 'renderer', 'is_static')
+    
+    def __init__(self, value: Any):
+        self.value = value
+        self.renderer = _compile_config_value(value)
+        self.is_static = self.renderer is None
+    
+    def render(self, context: Dict[str, Any], input_data: Dict[str, Any]) -> Any:
+        if self.renderer is None:
+            return self.value
+        return self.renderer(context, input_data)
+
+def get_path_value(data: Any, path: Tuple[str, ...]) -> Any:
+    """
+    Get nested value using a pre-split dot notation path
+    
+    Args:
+        data: Data dictionary
+        path: Path parts
+        
+    Returns:
+        Value at path or empty string if not found
+    """
+    current = data
+    for part in path:
+        if isinstance(current, dict) and part in current:
+            current = current[part]
+        elif isinstance(current, list) and part.isdigit():
+            index = int(part)
+            if 0 <= index < len(current):
+                current = current[index]
+            else:
+                return ''
+        else:
+            return ''
+    
+    return current
+
+def compile_expression(expression: str) -> TemplateAccessor:
+    """
+    Parse the inside of a {{...}} placeholder
+    
+    Args:
+        expression: Stripped variable expression
+        
+    Returns:
+        TemplateAccessor evaluating the expression
+    """
+    if expression == 'now()':
+        return TemplateAccessor('now')
+    elif expression == 'timestamp':
+        return TemplateAccessor('timestamp')
+    elif expression.startswith('env.'):
+        return TemplateAccessor('env', (expression[4:],))
+    
+    if expression.startswith('input.'):
+        return TemplateAccessor('input', tuple(expression[6:].split('.')))
+    elif expression.startswith('context.'):
+        return TemplateAccessor('context', tuple(expression[8:].split('.')))
+    elif expression.startswith('variables.'):
+        return TemplateAccessor('variables', tuple(expression[10:].split('.')))
+    
+    # Default to looking in input data
+    return TemplateAccessor('input', tuple(expression.split('.')))
+
+@lru_cache(maxsize=4096)
+def compile_template(value: str) -> CompiledTemplate:
+    """
+    Split a string into literal chunks and accessors, cached per string
+    
+    Args:
+        value: String containing {{...}} variables
+        
+    Returns:
+        CompiledTemplate for the string
+    """
+    chunks = []
+    position = 0
+    
+    for match in VARIABLE_PATTERN.finditer(value):
+        if match.start() > position:
+            chunks.append(value[position:match.start()])
+        chunks.append(compile_expression(match.group(1).strip()))
+        position = match.end()
+    
+    if position < len(value):
+        chunks.append(value[position:])
+    
+    return CompiledTemplate(value, tuple(chunks))
+
+def _compile_config_value(value: Any) -> Optional[Callable]:
+    """
+    Build a renderer for a config value, None if the value has no templates
+    
+    Mirrors the walk of the previous resolver: dicts are resolved recursively,
+    list items are resolved when they are dicts or strings.
+    """
+    if isinstance(value, str):
+        if '{{' not in value:
+            return None
+        template = compile_template(value)
+        if not any(chunk.__class__ is not str for chunk in template.chunks):
+            return None
+        return template.render
+    
+    if isinstance(value, dict):
+        renderers = [(key, _compile_config_value(item), item) for key, item in value.items()]
+        if all(renderer is None for _, renderer, _ in renderers):
+            return None
+        
+        def render_dict(context, input_data):
+            return {
+                key: item if renderer is None else renderer(context, input_data)
+                for key, renderer, item in renderers
+            }
+        return render_dict
+    
+    if isinstance(value, list):
+        renderers = [
+            (_compile_config_value(item) if isinstance(item, (dict, str)) else None, item)
+            for item in value
+        ]
+        if all(renderer is None for renderer, _ in renderers):
+            return None
+        
+        def render_list(context, input_data):
+            return [
+                item if renderer is None else renderer(context, input_data)
+                for renderer, item in renderers
+            ]
+        return render_list
+    
+    return None
 
 class VariableResolver:
     """Resolves variables and expressions in configuration strings"""
     
     def __init__(self):
-        self.variable_pattern = re.compile(r'\{\{([^}]+)\}\}')
+        self.variable_pattern = VARIABLE_PATTERN
     
     def resolve(self, value: str, context: Dict[str, Any], input_data: Dict[str, Any]) -> str:
         """
@@ -25,14 +225,22 @@ class VariableResolver:
         Returns:
             String with resolved variables
         """
-        if not isinstance(value, str):
+        if not isinstance(value, str) or '{{' not in value:
             return value
         
-        def replace_variable(match):
-            var_expression = match.group(1).strip()
-            return str(self._evaluate_expression(var_expression, context, input_data))
+        return compile_template(value).render(context, input_data)
+    
+    def compile_config(self, config: Any) -> CompiledConfig:
+        """
+        Pre-compile every templated string of a node configuration
         
-        return self.variable_pattern.sub(replace_variable, value)
+        Args:
+            config: Raw node configuration
+            
+        Returns:
+            CompiledConfig that renders the resolved configuration
+        """
+        return CompiledConfig(config)
     
     def _evaluate_expression(self, expression: str, context: Dict[str, Any], input_data: Dict[str, Any]) -> Any:
         """
@@ -46,28 +254,7 @@ class VariableResolver:
         Returns:
             Evaluated value
         """
-        # Handle special variables
-        if expression == 'now()':
-            from django.utils import timezone
-            return timezone.now().isoformat()
-        elif expression == 'timestamp':
-            import time
-            return str(int(time.time()))
-        elif expression.startswith('env.'):
-            import os
-            env_var = expression[4:]
-            return os.getenv(env_var, '')
-        
-        # Handle input data references
-        if expression.startswith('input.'):
-            return self._get_nested_value(input_data.get('data', {}), expression[6:])
-        elif expression.startswith('context.'):
-            return self._get_nested_value(context, expression[8:])
-        elif expression.startswith('variables.'):
-            return self._get_nested_value(context.get('variables', {}), expression[10:])
-        
-        # Default to looking in input data
-        return self._get_nested_value(input_data.get('data', {}), expression)
+        return compile_expression(expression).evaluate(context, input_data)
     
     def _get_nested_value(self, data: Dict[str, Any], path: str) -> Any:
         """
@@ -80,37 +267,28 @@ class VariableResolver:
         Returns:
             Value at path or empty string if not found
         """
-        current = data
-        for part in path.split('.'):
-            if isinstance(current, dict) and part in current:
-                current = current[part]
-            elif isinstance(current, list) and part.isdigit():
-                index = int(part)
-                if 0 <= index < len(current):
-                    current = current[index]
-                else:
-                    return ''
-            else:
-                return ''
-        
-        return current
+        return get_path_value(data, path.split('.'))
 
 class ExpressionEvaluator:
     """Safely evaluates expressions in workflow configurations"""
     
     def __init__(self):
-        self.allowed_functions = {
-            'len': len,
-            'str': str,
-            'int': int,
-            'float': float,
-            'bool': bool,
-            'abs': abs,
-            'min': min,
-            'max': max,
-            'sum': sum,
-            'round': round,
-        }
+        self.allowed_functions = ALLOWED_FUNCTIONS
+    
+    def compile(self, expression: str) -> Callable[[Dict[str, Any]], Any]:
+        """
+        Compile an expression once for repeated evaluation
+        
+        Args:
+            expression: Expression to compile
+            
+        Returns:
+            Callable taking a dict of names and returning the expression value
+            
+        Raises:
+            ExpressionError: If the expression uses unsupported syntax
+        """
+        return compile_safe_expression(expression)
     
     def evaluate(self, expression: str, context: Dict[str, Any]) -> Any:
         """
@@ -123,18 +301,8 @@ class ExpressionEvaluator:
         Returns:
             Evaluated result
         """
-        # This is a simplified evaluator
-        # In production, you'd want a more robust and secure expression evaluator
         try:
-            # Create a safe evaluation context
-            safe_context = {
-                '__builtins__': {},
-                **self.allowed_functions,
-                **context
-            }
-            
-            # Evaluate the expression
-            return eval(expression, safe_context)
+            return compile_safe_expression(expression)(context)
         except Exception as e:
             # Return the original expression if evaluation fails
             return expression
@@ -5,21 +5,22 @@ from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, Avg
-from django.utils import timezone
+from django.db.models import Q
 from django.apps import apps
+from django.conf import settings
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.middleware.csrf import get_token
 import json
 import uuid
-from datetime import datetime, timedelta
 
 from .models import (
     NodeType, Workflow, WorkflowExecution, NodeExecution,
     WorkflowWebhook, WorkflowSchedule, WorkflowTemplate, WorkflowVariable
 )
 from .engine import WorkflowEngine
-from .tasks import execute_workflow_task
+from .tasks import dispatch_executions, ingest_webhook_task
+from .webhooks import endpoint_cache, trigger_counter
+from .rollup import get_execution_totals, get_daily_execution_counts
 
 # Dashboard View
 @login_required
@@ -35,41 +36,33 @@ def dashboard_view(request):
     total_workflows = user_workflows.count()
     active_workflows = user_workflows.filter(status='active').count()
     
-    # Execution statistics
+    # Execution statistics, served from the ExecutionDailyStats rollup
     user_executions = WorkflowExecution.objects.filter(workflow__in=user_workflows)
-    total_executions = user_executions.count()
-    successful_executions = user_executions.filter(status='success').count()
-    failed_executions = user_executions.filter(status='failed').count()
-    running_executions = user_executions.filter(status='running').count()
+    totals = get_execution_totals(created_by_id=request.user.id)
+    total_executions = totals['total']
+    successful_executions = totals['success']
+    failed_executions = totals['failed']
+    running_executions = totals['running']
     
     success_rate = round((successful_executions / total_executions * 100) if total_executions > 0 else 0, 1)
     error_rate = round((failed_executions / total_executions * 100) if total_executions > 0 else 0, 1)
     
     # Average execution time
-    avg_execution_time = user_executions.filter(
-        duration_seconds__isnull=False
-    ).aggregate(avg_time=Avg('duration_seconds'))['avg_time'] or 0
+    avg_execution_time = totals['avg_duration_seconds']
     
     # Recent activity
-    recent_executions = user_executions.order_by('-started_at')[:10]
-    recent_workflows = user_workflows.order_by('-updated_at')[:10]
+    recent_executions = user_executions.select_related('workflow').defer(
+        'workflow__definition'
+    ).order_by('-started_at')[:10]
+    recent_workflows = user_workflows.defer('definition').order_by('-updated_at')[:10]
     
     # Top performing workflows
-    top_workflows = user_workflows.annotate(
-        execution_count=Count('executions')
-    ).filter(execution_count__gt=0).order_by('-execution_count')[:5]
+    top_workflows = user_workflows.filter(
+        execution_count__gt=0
+    ).defer('definition').order_by('-execution_count')[:5]
     
     # Daily execution data for chart
-    daily_executions = []
-    for i in range(7):
-        date = timezone.now().date() - timedelta(days=i)
-        day_executions = user_executions.filter(started_at__date=date)
-        daily_executions.append({
-            'day': date.strftime('%m/%d'),
-            'successful': day_executions.filter(status='success').count(),
-            'failed': day_executions.filter(status='failed').count()
-        })
-    daily_executions.reverse()
+    daily_executions = get_daily_execution_counts(7, created_by_id=request.user.id)
     
     context = {
         'csrf_token': csrf_token,
@@ -97,7 +90,7 @@ def workflow_list_view(request):
     """List all workflows for the user"""
     csrf_token = get_token(request)
     
-    workflows = Workflow.objects.filter(created_by_id=request.user.id).order_by('-updated_at')
+    workflows = Workflow.objects.filter(created_by_id=request.user.id).defer('definition').order_by('-updated_at')
     
     # Apply filters
     search_query = request.GET.get('search', '')
@@ -112,9 +105,6 @@ def workflow_list_view(request):
     if status_filter:
         workflows = workflows.filter(status=status_filter)
     
-    # Add execution counts
-    workflows = workflows.annotate(execution_count=Count('executions'))
-    
     # Statistics
     total_workflows = workflows.count()
     active_workflows = workflows.filter(status='active').count()
@@ -146,11 +136,12 @@ def workflow_detail_view(request, workflow_id):
     
     workflow = get_object_or_404(Workflow, id=workflow_id, created_by_id=request.user.id)
     
-    # Execution statistics
+    # Execution statistics, served from the ExecutionDailyStats rollup
     executions = workflow.executions.all()
-    total_executions = executions.count()
-    successful_executions = executions.filter(status='success').count()
-    failed_executions = executions.filter(status='failed').count()
+    totals = get_execution_totals(id=workflow.id)
+    total_executions = totals['total']
+    successful_executions = totals['success']
+    failed_executions = totals['failed']
     success_rate = round((successful_executions / total_executions * 100) if total_executions > 0 else 0, 1)
     
     # Recent executions
@@ -162,16 +153,7 @@ def workflow_detail_view(request, workflow_id):
     connection_count = len(definition.get('connections', []))
     
     # Execution history for chart
-    execution_history = []
-    for i in range(7):
-        date = timezone.now().date() - timedelta(days=i)
-        day_executions = executions.filter(started_at__date=date)
-        execution_history.append({
-            'day': date.strftime('%m/%d'),
-            'successful': day_executions.filter(status='success').count(),
-            'failed': day_executions.filter(status='failed').count()
-        })
-    execution_history.reverse()
+    execution_history = get_daily_execution_counts(7, id=workflow.id)
     
     context = {
         'csrf_token': csrf_token,
@@ -420,16 +402,34 @@ def execution_list_view(request):
 def webhook_receiver(request, endpoint_path):
     """Receive webhook requests and trigger workflows"""
     try:
-        webhook = WorkflowWebhook.objects.get(
-            endpoint_path=f"/{endpoint_path}",
-            is_active=True,
-            workflow__status='active'
-        )
+        webhook = endpoint_cache.get(f"/{endpoint_path}")
+        if webhook is None:
+            raise WorkflowWebhook.DoesNotExist()
         
         # Validate HTTP method
         if webhook.http_method != request.method:
             return JsonResponse({'error': 'Method not allowed'}, status=405)
         
+        if getattr(settings, 'WORKFLOW_WEBHOOK_DEFERRED_EXECUTION', False):
+            # Enqueue the raw request, the worker creates the execution row
+            execution_id = str(uuid.uuid4())
+            if request.content_type == 'application/json':
+                body = request.body.decode('utf-8', errors='replace')
+            else:
+                body = dict(request.POST)
+            
+            ingest_webhook_task.delay(
+                execution_id, webhook.id, webhook.workflow_id,
+                body, request.content_type, dict(request.headers)
+            )
+            trigger_counter.record(webhook.id)
+            
+            return JsonResponse({
+                'status': 'queued',
+                'execution_id': execution_id,
+                'message': 'Workflow trigger queued'
+            }, status=202)
+        
         # Get request data
         if request.content_type == 'application/json':
             try:
@@ -441,23 +441,21 @@ def webhook_receiver(request, endpoint_path):
         
         # Create execution
         execution = WorkflowExecution.objects.create(
-            workflow=webhook.workflow,
+            workflow_id=webhook.workflow_id,
             triggered_by='webhook',
             input_data=request_data,
             execution_context={
-                'webhook_id': str(webhook.id),
+                'webhook_id': webhook.id,
                 'webhook_data': request_data,
                 'request_headers': dict(request.headers)
             }
         )
         
         # Update webhook stats
-        webhook.last_triggered_at = timezone.now()
-        webhook.trigger_count += 1
-        webhook.save()
+        trigger_counter.record(webhook.id)
         
         # Execute workflow asynchronously
-        execute_workflow_task.delay(str(execution.id))
+        dispatch_executions([execution])
         
         return JsonResponse({
             'status': 'success',
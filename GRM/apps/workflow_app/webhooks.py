@@ -0,0 +1,211 @@
+"""
+Webhook ingestion fast path: cached endpoint lookup and batched trigger counters
+"""
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Immutable snapshot of what the receiver needs from a WorkflowWebhook
+WebhookEndpoint = namedtuple('WebhookEndpoint', ['id', 'workflow_id', 'endpoint_path', 'http_method'])
+
+# Cached in place of an endpoint for paths that have no active webhook
+_MISSING = 'missing'
+
+def _shared_cache_key(endpoint_path: str) -> str:
+    return f"workflow_webhook_endpoint:{endpoint_path}"
+
+class WebhookEndpointCache:
+    """
+    Two-level cache of active webhook endpoints keyed by path
+
+    Lookups hit a per-process LRU first and the Django cache second, so a
+    burst of calls to one endpoint costs no database query. Entries are
+    dropped from both levels when a webhook or its workflow is saved, and
+    the per-process level also expires after WORKFLOW_WEBHOOK_CACHE_TTL
+    seconds so other processes pick up changes quickly. Paths without an
+    active webhook are only kept in the shared level for
+    WORKFLOW_WEBHOOK_MISSING_CACHE_TTL seconds, so a workflow activated
+    without a save signal starts serving its endpoints soon after.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, 'WORKFLOW_WEBHOOK_CACHE_SIZE', 1024)
+
+    @property
+    def ttl(self) -> float:
+        return getattr(settings, 'WORKFLOW_WEBHOOK_CACHE_TTL', 5)
+
+    def get(self, endpoint_path: str) -> Optional[WebhookEndpoint]:
+        """
+        Return the active endpoint for a path
+
+        Args:
+            endpoint_path: Webhook path including the leading slash
+
+        Returns:
+            WebhookEndpoint, or None if no active webhook of an active workflow uses the path
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(endpoint_path)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(endpoint_path)
+                return None if entry[1] == _MISSING else entry[1]
+
+        endpoint = cache.get(_shared_cache_key(endpoint_path))
+        if endpoint is None:
+            endpoint = self._load(endpoint_path)
+            if endpoint == _MISSING:
+                shared_ttl = getattr(settings, 'WORKFLOW_WEBHOOK_MISSING_CACHE_TTL', 10)
+            else:
+                shared_ttl = getattr(settings, 'WORKFLOW_WEBHOOK_SHARED_CACHE_TTL', 300)
+            cache.set(_shared_cache_key(endpoint_path), endpoint, shared_ttl)
+
+        if self.max_size > 0:
+            with self._lock:
+                self._entries[endpoint_path] = (now + self.ttl, endpoint)
+                self._entries.move_to_end(endpoint_path)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        return None if endpoint == _MISSING else endpoint
+
+    def _load(self, endpoint_path: str):
+        from .models import WorkflowWebhook
+
+        row = WorkflowWebhook.objects.filter(
+            endpoint_path=endpoint_path,
+            is_active=True,
+            workflow__status='active'
+        ).values_list('id', 'workflow_id', 'endpoint_path', 'http_method').first()
+
+        if row is None:
+            return _MISSING
+        return WebhookEndpoint(str(row[0]), str(row[1]), row[2], row[3])
+
+    def invalidate(self, *endpoint_paths: str):
+        """Drop cached endpoints from this process and from the shared cache"""
+        with self._lock:
+            for endpoint_path in endpoint_paths:
+                self._entries.pop(endpoint_path, None)
+        cache.delete_many([_shared_cache_key(endpoint_path) for endpoint_path in endpoint_paths])
+
+    def clear(self):
+        """Drop all endpoints cached in this process"""
+        with self._lock:
+            self._entries.clear()
+
+class WebhookTriggerCounter:
+    """
+    Atomic, optionally batched trigger_count / last_triggered_at updates
+
+    Every hit is applied with an F() expression so concurrent requests
+    never lose increments. With WORKFLOW_WEBHOOK_COUNTER_FLUSH_INTERVAL > 0
+    hits are summed in memory and written at most once per interval per
+    process, turning a burst of calls into a single UPDATE per webhook.
+    A daemon thread of the process writes the sums once per interval as
+    well, so the counts of the last burst do not wait for the next hit.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self._flush_interval = flush_interval
+        self._pending: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def flush_interval(self) -> float:
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'WORKFLOW_WEBHOOK_COUNTER_FLUSH_INTERVAL', 0)
+
+    def record(self, webhook_id: str, triggered_at=None):
+        """
+        Count one trigger of a webhook
+
+        Args:
+            webhook_id: ID of the WorkflowWebhook
+            triggered_at: Trigger time, defaults to now
+        """
+        triggered_at = triggered_at or timezone.now()
+
+        if self.flush_interval <= 0:
+            self._apply(str(webhook_id), 1, triggered_at)
+            return
+
+        with self._lock:
+            pending = self._pending.setdefault(str(webhook_id), [0, triggered_at])
+            pending[0] += 1
+            pending[1] = max(pending[1], triggered_at)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+
+            # Threads do not survive a fork, so check on every hit rather than once
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically,
+                    name='webhook-trigger-counter',
+                    daemon=True
+                )
+                self._flusher.start()
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write all pending counts to the database"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+
+        for webhook_id, (count, triggered_at) in pending.items():
+            try:
+                self._apply(webhook_id, count, triggered_at)
+            except Exception as e:
+                logger.error(f"Failed to update trigger count of webhook {webhook_id}: {str(e)}")
+
+    def _flush_periodically(self):
+        """Flusher thread loop, writes pending counts once per flush interval"""
+        while True:
+            time.sleep(max(self.flush_interval, 0.1))
+
+            if self._pending:
+                try:
+                    self.flush()
+                finally:
+                    # Do not keep an idle database connection open for this thread
+                    connections.close_all()
+
+    def _apply(self, webhook_id: str, count: int, triggered_at):
+        from .models import WorkflowWebhook
+
+        WorkflowWebhook.objects.filter(id=webhook_id).update(
+            trigger_count=F('trigger_count') + count,
+            last_triggered_at=triggered_at
+        )
+
+# Per-process instances shared by the webhook receiver and the trigger manager
+endpoint_cache = WebhookEndpointCache()
+trigger_counter = WebhookTriggerCounter()
+
+atexit.register(trigger_counter.flush)